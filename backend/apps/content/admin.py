@@ -1,6 +1,10 @@
 ﻿from django.contrib import admin
+from django.template.defaultfilters import filesizeformat
 from django.utils.html import format_html
-from . import models
+from . import documents, jobs, models
+from .renditions import preview_url
+from .search import FullTextSearchAdminMixin
+from .uploads import ResumableUploadAdminMixin
 
 
 class NewsImageInline(admin.TabularInline):
@@ -11,16 +15,16 @@ class NewsImageInline(admin.TabularInline):
 
     def preview(self, obj):
         try:
-            return format_html('<img src="{}" style="height:60px;border-radius:4px;" />', obj.image.url)
+            return format_html('<img src="{}" style="height:60px;border-radius:4px;" />', preview_url(obj, "image"))
         except Exception:
             return ""
 
 
 @admin.register(models.News)
-class NewsAdmin(admin.ModelAdmin):
+class NewsAdmin(FullTextSearchAdminMixin, admin.ModelAdmin):
     def image_preview(self, obj):
         if obj.image:
-            return format_html('<img src="{}" style="height:40px;border-radius:4px;" />', obj.image.url)
+            return format_html('<img src="{}" style="height:40px;border-radius:4px;" />', preview_url(obj, "image"))
         return ""
 
     list_display = ("title", "published_at", "is_featured", "image_preview")
@@ -45,13 +49,13 @@ class NoticeImageInline(admin.TabularInline):
 
     def preview(self, obj):
         try:
-            return format_html('<img src="{}" style="height:60px;border-radius:4px;" />', obj.image.url)
+            return format_html('<img src="{}" style="height:60px;border-radius:4px;" />', preview_url(obj, "image"))
         except Exception:
             return ""
 
 
 @admin.register(models.Notice)
-class NoticeAdmin(admin.ModelAdmin):
+class NoticeAdmin(FullTextSearchAdminMixin, admin.ModelAdmin):
     list_display = ("title", "published_at", "expires_at", "priority")
     list_filter = ("published_at", "expires_at")
     search_fields = ("title", "title_si", "content", "content_si")
@@ -63,36 +67,52 @@ class NoticeAdmin(admin.ModelAdmin):
     )
 
     def image_preview(self, obj):
-        return format_html('<img src="{}" style="height:40px;border-radius:4px" />', obj.image.url) if obj.image else "-"
+        return format_html('<img src="{}" style="height:40px;border-radius:4px" />', preview_url(obj, "image")) if obj.image else "-"
 
     image_preview.short_description = "Image"
 
 
+class DocumentInfoAdminMixin:
+    """Read-only size and page count of the ingested document file."""
+
+    @admin.display(description="Document")
+    def document_info(self, obj):
+        info = documents.metadata(obj.document, getattr(obj, documents.document_field(type(obj))))
+        if info is None:
+            return "Not processed yet"
+        parts = [
+            filesizeformat(info["size"]) if info["size"] is not None else "",
+            f"{info['pages']} pages" if info["pages"] else "",
+        ]
+        return ", ".join(part for part in parts if part) or "-"
+
+
 @admin.register(models.Publication)
-class PublicationAdmin(admin.ModelAdmin):
+class PublicationAdmin(ResumableUploadAdminMixin, DocumentInfoAdminMixin, admin.ModelAdmin):
     def cover_preview(self, obj):
         if getattr(obj, "cover", None):
             try:
-                return format_html('<img src="{}" style="height:40px;border-radius:4px;" />', obj.cover.url)
+                return format_html('<img src="{}" style="height:40px;border-radius:4px;" />', preview_url(obj, "cover"))
             except Exception:
                 return ""
         return ""
 
-    list_display = ("title", "category", "published_at", "is_active")
+    list_display = ("title", "category", "published_at", "is_active", "download_count")
     list_filter = ("category", "is_active", "published_at")
     search_fields = ("title", "title_si", "description", "description_si")
     autocomplete_fields = ("category",)
-    readonly_fields = ("created_at", "updated_at")
+    resumable_upload_fields = ("file",)
+    readonly_fields = ("document_info", "download_count", "created_at", "updated_at")
     fieldsets = (
         ("English", {"fields": ("title", "description", "department", "category")}),
         ("Sinhala", {"fields": ("title_si", "description_si", "department_si")}),
-        ("File", {"fields": ("file",)}),
+        ("File", {"fields": ("file", "document_info", "download_count")}),
         ("Publishing", {"fields": ("is_active", "published_at", "created_at", "updated_at")}),
     )
 
 
 @admin.register(models.Video)
-class VideoAdmin(admin.ModelAdmin):
+class VideoAdmin(ResumableUploadAdminMixin, admin.ModelAdmin):
     def thumb(self, obj):
         if getattr(obj, "thumbnail", None):
             try:
@@ -104,6 +124,7 @@ class VideoAdmin(admin.ModelAdmin):
     list_display = ("title", "published_at", "thumb")
     list_filter = ("published_at",)
     search_fields = ("title", "title_si", "description", "description_si")
+    resumable_upload_fields = ("file",)
     fieldsets = (
         ("English", {"fields": ("title", "description")}),
         ("Sinhala", {"fields": ("title_si", "description_si")}),
@@ -121,7 +142,7 @@ class GalleryImageInline(admin.TabularInline):
 
     def preview(self, obj):
         try:
-            return format_html('<img src="{}" style="height:60px;border-radius:4px" />', obj.image.url)
+            return format_html('<img src="{}" style="height:60px;border-radius:4px" />', preview_url(obj, "image"))
         except Exception:
             return ""
 
@@ -144,7 +165,7 @@ class AlbumAdmin(admin.ModelAdmin):
     def thumb(self, obj):
         if obj.cover:
             try:
-                return format_html('<img src="{}" style="height:40px;border-radius:4px" />', obj.cover.url)
+                return format_html('<img src="{}" style="height:40px;border-radius:4px" />', preview_url(obj, "cover"))
             except Exception:
                 return ""
         return ""
@@ -201,7 +222,7 @@ class DownloadCategoryAdmin(admin.ModelAdmin):
 class HeroSlideAdmin(admin.ModelAdmin):
     def image_preview(self, obj):
         if obj.image:
-            return format_html('<img src="{}" style="height:40px;border-radius:4px;" />', obj.image.url)
+            return format_html('<img src="{}" style="height:40px;border-radius:4px;" />', preview_url(obj, "image"))
         return ""
 
     list_display = ("title", "position", "created_at", "image_preview")
@@ -267,16 +288,17 @@ class LibraryPublicationCategoryAdmin(admin.ModelAdmin):
 
 
 @admin.register(models.LibraryPublicationEntry)
-class LibraryPublicationEntryAdmin(admin.ModelAdmin):
-    list_display = ("title", "category", "year", "published_at", "is_active", "is_featured")
+class LibraryPublicationEntryAdmin(ResumableUploadAdminMixin, DocumentInfoAdminMixin, FullTextSearchAdminMixin, admin.ModelAdmin):
+    list_display = ("title", "category", "year", "published_at", "is_active", "is_featured", "download_count")
     list_filter = ("is_active", "is_featured", "category", "year")
     search_fields = ("title", "title_si", "subtitle", "subtitle_si", "authors", "authors_si", "description", "description_si")
-    readonly_fields = ("created_at", "updated_at")
+    readonly_fields = ("document_info", "download_count", "created_at", "updated_at")
+    resumable_upload_fields = ("pdf_file",)
     inlines = [LibraryPublicationImageInline]
     fieldsets = (
         ("English", {"fields": ("category", "title", "subtitle", "authors", "year", "description")}),
         ("Sinhala", {"fields": ("title_si", "subtitle_si", "authors_si", "description_si")}),
-        ("Media", {"fields": ("cover", "pdf_file", "external_url")}),
+        ("Media", {"fields": ("cover", "pdf_file", "document_info", "external_url", "download_count")}),
         ("Status & Dates", {"fields": ("published_at", "is_active", "is_featured")}),
         ("System", {"fields": ("created_at", "updated_at")}),
     )
@@ -323,5 +345,18 @@ class SiteTextSnippetAdmin(admin.ModelAdmin):
     )
 
 
+@admin.register(models.Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("task", "status", "attempts", "max_attempts", "run_at", "dedup_key", "updated_at")
+    list_filter = ("status", "task")
+    search_fields = ("task", "dedup_key", "last_error")
+    readonly_fields = [field.name for field in models.Job._meta.fields]
+    actions = ["retry_jobs"]
 
+    def has_add_permission(self, request):
+        return False
 
+    @admin.action(description="Retry selected failed jobs")
+    def retry_jobs(self, request, queryset):
+        count = jobs.retry(queryset)
+        self.message_user(request, f"Re-queued {count} job(s).")
@@ -11,3 +11,5 @@ class ContentConfig(AppConfig):
         admin.site.site_header = "Admin Dashboard"
         admin.site.site_title = "Piriven Admin"
         admin.site.index_title = "Site Content Management"
+
+        from . import signals, tasks  # noqa: F401
@@ -0,0 +1,211 @@
+"""ZIP archives of a download category, streamed as they are built.
+
+``/api/download-categories/<pk>/archive/`` (optionally ``?year=`` and
+``?department=``) sends every active publication of the category in one ZIP.
+The archive is written entry by entry into the response: ``zipfile`` is
+given an unseekable sink, so it emits data descriptors instead of seeking
+back, and each file is copied through in ``CHUNK_SIZE`` pieces, so neither
+the archive nor any file is held in memory. PDFs and other already
+compressed formats are stored as they are; only the rest is deflated.
+
+While streaming, the bytes are also written to ``archives/`` in the default
+storage and the file is renamed into place once complete. Its name carries a
+fingerprint of the selected rows (ids, ``updated_at`` and file names), so the
+next request for an unchanged selection is served from that file, with range
+support or through the web server (see ``downloads.py``). Older archives of
+the same selection are removed when a new one is finished. Only one request
+at a time builds the kept copy of a selection, under a lock file next to
+it; requests arriving meanwhile stream their own copy without keeping it.
+"""
+import hashlib
+import logging
+import os
+import uuid
+import zipfile
+
+from django.core.files.storage import default_storage
+from django.http import Http404, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.text import slugify
+from rest_framework.exceptions import ValidationError
+
+from . import downloads, models
+
+try:
+    import fcntl
+except ImportError:  # Windows development servers: no locks, concurrent builds just replace each other
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+DIRECTORY = "archives"
+CHUNK_SIZE = 256 * 1024
+ZIP64_LIMIT = zipfile.ZIP64_LIMIT
+# Deflating these gains next to nothing and costs CPU.
+STORED_EXTENSIONS = {
+    ".pdf", ".zip", ".gz", ".7z", ".rar", ".jpg", ".jpeg", ".png", ".gif", ".webp", ".avif",
+    ".docx", ".xlsx", ".pptx", ".odt", ".ods", ".odp", ".mp3", ".mp4",
+}
+
+
+class _Sink:
+    """Write-only, unseekable buffer that ``zipfile`` streams into."""
+
+    def __init__(self, tee=None):
+        self.chunks = []
+        self.size = 0
+        self.offset = 0
+        self.tee = tee
+
+    def write(self, data):
+        data = bytes(data)
+        self.chunks.append(data)
+        self.size += len(data)
+        self.offset += len(data)
+        if self.tee is not None:
+            self.tee.write(data)
+        return len(data)
+
+    def tell(self):
+        return self.offset
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks, self.size = [], 0
+        return data
+
+
+def selection(category, params):
+    """Active publications of ``category`` narrowed by ``?year=``/``?department=``, newest first."""
+    queryset = models.Publication.objects.filter(category=category, is_active=True).exclude(file="")
+    year = params.get("year")
+    if year:
+        if not year.isdigit():
+            raise ValidationError({"year": "Expected a year such as 2024."})
+        queryset = queryset.filter(published_at__year=int(year))
+    department = params.get("department")
+    if department:
+        queryset = queryset.filter(department=department)
+    return queryset.order_by("-published_at", "-id").only("id", "title", "file", "published_at", "updated_at")
+
+
+def archive_names(category, params, publications):
+    """``(name, prefix)``: storage name for this exact content, and the prefix shared by
+    every version of the same selection."""
+    selected = hashlib.sha1(f"{params.get('year', '')}|{params.get('department', '')}".encode()).hexdigest()[:8]
+    content = hashlib.sha1(str(category.updated_at.timestamp()).encode())
+    for publication in publications:
+        content.update(f"|{publication.pk}:{publication.updated_at.timestamp()}:{publication.file.name}".encode())
+    prefix = f"{DIRECTORY}/downloads-{category.pk}-{selected}-"
+    return f"{prefix}{content.hexdigest()[:16]}.zip", prefix
+
+
+def _entry_names(publications):
+    """Unique file names inside the archive, from the uploaded names."""
+    seen = {}
+    for publication in publications:
+        stem, ext = os.path.splitext(os.path.basename(publication.file.name))
+        name = f"{stem}{ext}"
+        count = seen.get(name.lower(), 0) + 1
+        seen[name.lower()] = count
+        yield publication, name if count == 1 else f"{stem} ({count}){ext}"
+
+
+def _zip_info(publication, name):
+    moment = timezone.localtime(publication.published_at) if publication.published_at else timezone.localtime()
+    info = zipfile.ZipInfo(name, date_time=max(moment.timetuple()[:6], (1980, 1, 1, 0, 0, 0)))
+    stored = os.path.splitext(name)[1].lower() in STORED_EXTENSIONS
+    info.compress_type = zipfile.ZIP_STORED if stored else zipfile.ZIP_DEFLATED
+    info.external_attr = 0o644 << 16
+    return info
+
+
+def stream(publications, tee=None):
+    """Yield the bytes of a ZIP holding the files of ``publications``; missing files are skipped."""
+    sink = _Sink(tee)
+    with zipfile.ZipFile(sink, mode="w") as archive:
+        for publication, name in _entry_names(publications):
+            field_file = publication.file
+            try:
+                size = field_file.storage.size(field_file.name)
+                source = field_file.storage.open(field_file.name, "rb")
+            except (FileNotFoundError, OSError):
+                logger.warning("Skipping missing file %s in archive", field_file.name)
+                continue
+            with source, archive.open(_zip_info(publication, name), mode="w", force_zip64=size >= ZIP64_LIMIT) as entry:
+                for chunk in iter(lambda: source.read(CHUNK_SIZE), b""):
+                    entry.write(chunk)
+                    if sink.size >= CHUNK_SIZE:
+                        yield sink.drain()
+            yield sink.drain()
+    yield sink.drain()
+
+
+def _try_lock(handle) -> bool:
+    if fcntl is None:
+        return True
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return False
+    return True
+
+
+def _stream_and_keep(publications, name, prefix, storage):
+    """``stream()`` while writing the archive to ``name``; kept only when complete.
+
+    The build holds a lock on ``<prefix>lock`` until it is done; if another
+    request holds it, or has just finished ``name``, the archive is only streamed.
+    """
+    final = storage.path(name)
+    os.makedirs(os.path.dirname(final), exist_ok=True)
+    with open(storage.path(f"{prefix}lock"), "ab") as lock:
+        if not _try_lock(lock) or storage.exists(name):
+            yield from stream(publications)
+            return
+        partial = f"{final}.{uuid.uuid4().hex}.partial"
+        complete = False
+        try:
+            with open(partial, "wb") as tee:
+                yield from stream(publications, tee)
+            os.replace(partial, final)
+            complete = True
+        finally:
+            if not complete and os.path.exists(partial):
+                os.remove(partial)
+        # Earlier versions of the same selection.
+        for stale in storage.listdir(DIRECTORY)[1]:
+            path = f"{DIRECTORY}/{stale}"
+            if path.startswith(prefix) and path != name and stale.endswith(".zip"):
+                storage.delete(path)
+
+
+def _can_keep(storage) -> bool:
+    try:
+        storage.path("")
+    except NotImplementedError:
+        return False
+    return True
+
+
+def respond(request, category, storage=default_storage):
+    """Serve the kept archive for this selection, or stream (and keep) a new one."""
+    publications = list(selection(category, request.query_params))
+    if not publications:
+        raise Http404("No files to download.")
+    name, prefix = archive_names(category, request.query_params, publications)
+    filename = f"{slugify(category.name) or 'downloads'}.zip"
+
+    if storage.exists(name):
+        return downloads.serve_file(request, storage, name, filename=filename, as_attachment=True)
+
+    if _can_keep(storage):
+        content = _stream_and_keep(publications, name, prefix, storage)
+    else:
+        content = stream(publications)
+    response = StreamingHttpResponse(content, content_type="application/zip")
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,417 @@
+"""API benchmark: synthetic bilingual content at scale, timed endpoint by endpoint.
+
+Used by ``manage.py benchmark_api``. ``seed()`` bulk-inserts deterministic
+content (signals do not fire, so no rendition jobs are queued), and
+``run()`` requests every GET route registered in ``apps/content/urls.py``
+through the test client, once with an empty cache and repeatedly with a warm
+one, recording latency percentiles, SQL query counts and response sizes.
+``contention()`` measures read throughput while other threads keep writing
+newsletter subscriptions and contact messages, with the configured SQLite
+profile or, inside ``stock_sqlite()``, with SQLite's defaults for comparison.
+"""
+import itertools
+import random
+import re
+import statistics
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from datetime import timedelta
+
+from django.apps import apps
+from django.core.cache import cache as default_cache
+from django.core.management import call_command
+from django.db import OperationalError, connection, connections, reset_queries, router, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from . import models, routers
+from .downloads import PassthroughRenderer
+
+DEFAULT_VOLUMES = {
+    "news": 50_000,
+    "news_images": 2,
+    "notices": 5_000,
+    "book_categories": 25,
+    "books": 100_000,
+    "download_categories": 20,
+    "publications": 10_000,
+    "albums": 500,
+    "album_images": 200,
+    "videos": 2_000,
+}
+
+BATCH_SIZE = 2_000
+
+WORDS_EN = (
+    "education ministry pirivena monks examination results circular annual "
+    "school teachers students library dhamma sinhala pali sanskrit province "
+    "notice scholarship ceremony programme training curriculum syllabus"
+).split()
+WORDS_SI = (
+    "අධ්‍යාපන අමාත්‍යාංශය පිරිවෙන භික්ෂූන් විභාග ප්‍රතිඵල චක්‍රලේඛ වාර්ෂික "
+    "පාසල් ගුරු සිසු පුස්තකාලය ධර්ම සිංහල පාලි සංස්කෘත පළාත් දැන්වීම "
+    "ශිෂ්‍යත්ව උත්සවය වැඩසටහන පුහුණු විෂය නිර්දේශය"
+).split()
+
+
+class Text:
+    def __init__(self, rng):
+        self.rng = rng
+
+    def words(self, vocabulary, count):
+        return " ".join(self.rng.choice(vocabulary) for _ in range(count))
+
+    def pair(self, count):
+        return self.words(WORDS_EN, count).capitalize(), self.words(WORDS_SI, count)
+
+
+def _bulk(model, rows):
+    model.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+
+
+def use_database(path) -> None:
+    """Point the default connection at a scratch SQLite file and migrate it.
+
+    Routed databases (submissions, see ``routers.py``) get scratch files next to it.
+    """
+    path = Path(path)
+    for alias in ["default", *sorted(routers.routed_aliases())]:
+        connections[alias].close()
+        name = path if alias == "default" else path.with_name(f"{path.stem}-{alias}{path.suffix}")
+        connections[alias].settings_dict["NAME"] = str(name)
+        call_command("migrate", database=alias, verbosity=0, interactive=False)
+    # The migration history lacks a couple of columns the models declare
+    # (e.g. LibraryPublicationEntry.category); add them so every endpoint works.
+    with connection.schema_editor() as editor:
+        for model in apps.get_app_config("content").get_models():
+            if not router.allow_migrate_model("default", model):
+                continue
+            with connection.cursor() as cursor:
+                columns = {info.name for info in connection.introspection.get_table_description(cursor, model._meta.db_table)}
+            for field in model._meta.local_concrete_fields:
+                if field.column not in columns:
+                    editor.add_field(model, field)
+
+
+def is_seeded() -> bool:
+    return models.News.objects.exists()
+
+
+def row_counts() -> dict:
+    """Rows per seeded model, recorded in the report so runs are comparable."""
+    counted = (
+        models.News, models.NewsImage, models.Notice, models.LibraryPublicationCategory,
+        models.LibraryPublicationEntry, models.DownloadCategory, models.Publication,
+        models.Album, models.GalleryImage, models.Video,
+    )
+    return {model._meta.label_lower: model.objects.count() for model in counted}
+
+
+def seed(volumes=None, seed_value=1, log=print):
+    """Insert synthetic content; returns the volumes used."""
+    volumes = {**DEFAULT_VOLUMES, **(volumes or {})}
+    rng = random.Random(seed_value)
+    text = Text(rng)
+    now = timezone.now()
+
+    def moment(days=730):
+        return now - timedelta(seconds=rng.randrange(days * 86400))
+
+    with transaction.atomic():
+        log(f"news: {volumes['news']} with {volumes['news_images']} images each")
+        news = []
+        for index in range(volumes["news"]):
+            title, title_si = text.pair(6)
+            excerpt, excerpt_si = text.pair(25)
+            content, content_si = text.pair(200)
+            news.append(models.News(
+                title=title, title_si=title_si, slug=f"news-{index}", image=f"news/bench-{index}.jpg",
+                excerpt=excerpt, excerpt_si=excerpt_si, content=content, content_si=content_si,
+                published_at=moment(), is_featured=index % 50 == 0,
+            ))
+        _bulk(models.News, news)
+        news_ids = list(models.News.objects.values_list("id", flat=True))
+        _bulk(models.NewsImage, [
+            models.NewsImage(news_id=news_id, image=f"news/gallery/bench-{news_id}-{position}.jpg", position=position)
+            for news_id in news_ids for position in range(volumes["news_images"])
+        ])
+
+        log(f"notices: {volumes['notices']}")
+        notices = []
+        for _ in range(volumes["notices"]):
+            title, title_si = text.pair(8)
+            content, content_si = text.pair(80)
+            published = moment()
+            notices.append(models.Notice(
+                title=title, title_si=title_si, content=content, content_si=content_si, published_at=published,
+                expires_at=published + timedelta(days=rng.randrange(7, 400)) if rng.random() < 0.7 else None,
+                priority=rng.randrange(5),
+            ))
+        _bulk(models.Notice, notices)
+
+        log(f"books: {volumes['books']} in {volumes['book_categories']} categories")
+        _bulk(models.LibraryPublicationCategory, [
+            models.LibraryPublicationCategory(
+                name=f"Category {index}", name_si=text.words(WORDS_SI, 2), slug=f"category-{index}", position=index,
+            )
+            for index in range(volumes["book_categories"])
+        ])
+        category_ids = list(models.LibraryPublicationCategory.objects.values_list("id", flat=True))
+        books = []
+        for index in range(volumes["books"]):
+            title, title_si = text.pair(5)
+            description, description_si = text.pair(60)
+            books.append(models.LibraryPublicationEntry(
+                category_id=rng.choice(category_ids), title=title, title_si=title_si,
+                authors=text.words(WORDS_EN, 2).title(), authors_si=text.words(WORDS_SI, 2),
+                year=rng.randrange(1950, 2026), description=description, description_si=description_si,
+                cover=f"publication_covers/bench-{index}.jpg", external_url=f"https://example.org/books/{index}",
+                published_at=moment(3650).date() if rng.random() < 0.8 else None,
+                is_featured=index % 100 == 0,
+            ))
+        _bulk(models.LibraryPublicationEntry, books)
+
+        log(f"downloads: {volumes['publications']} in {volumes['download_categories']} categories")
+        _bulk(models.DownloadCategory, [
+            models.DownloadCategory(name=f"Downloads {index}", name_si=text.words(WORDS_SI, 2), position=index)
+            for index in range(volumes["download_categories"])
+        ])
+        download_ids = list(models.DownloadCategory.objects.values_list("id", flat=True))
+        publications = []
+        for index in range(volumes["publications"]):
+            title, title_si = text.pair(6)
+            publications.append(models.Publication(
+                title=title, title_si=title_si, file=f"publications/bench-{index}.pdf", published_at=moment(),
+                category_id=rng.choice(download_ids), department=rng.choice(WORDS_EN).title(),
+            ))
+        _bulk(models.Publication, publications)
+
+        log(f"albums: {volumes['albums']} with {volumes['album_images']} images each")
+        _bulk(models.Album, [
+            models.Album(
+                title=f"Album {index}", title_si=text.words(WORDS_SI, 3), slug=f"album-{index}",
+                position=index, published_at=moment().date(),
+            )
+            for index in range(volumes["albums"])
+        ])
+        album_ids = list(models.Album.objects.values_list("id", flat=True))
+        for start in range(0, len(album_ids), 50):
+            _bulk(models.GalleryImage, [
+                models.GalleryImage(album_id=album_id, image=f"albums/images/bench-{album_id}-{position}.jpg", position=position)
+                for album_id in album_ids[start:start + 50] for position in range(volumes["album_images"])
+            ])
+
+        log(f"videos: {volumes['videos']}")
+        _bulk(models.Video, [
+            models.Video(title=text.pair(5)[0], url=f"https://youtube.com/watch?v={index}", published_at=moment())
+            for index in range(volumes["videos"])
+        ])
+
+        for index in range(6):
+            title, title_si = text.pair(4)
+            models.HeroSlide.objects.create(title=title, title_si=title_si, image=f"slides/bench-{index}.jpg", position=index)
+        models.HeroIntro.objects.create(heading="Welcome", heading_si=text.words(WORDS_SI, 2))
+        for index in range(8):
+            models.Stat.objects.create(label=f"Stat {index}", value=str(rng.randrange(10_000)))
+            models.ExternalLink.objects.create(name=f"Link {index}", url=f"https://example.org/{index}", position=index)
+    return volumes
+
+
+def routes(router, prefix="/api/"):
+    """``(name, path)`` for every GET list/detail route and extra action of ``router``."""
+    found = []
+    for url_prefix, viewset, _ in router.registry:
+        base = f"{prefix}{url_prefix}/"
+        found.append((f"{url_prefix}:list", base))
+        queryset = getattr(viewset, "queryset", None)
+        if queryset is None:
+            try:
+                queryset = viewset().get_queryset()
+            except Exception:
+                queryset = None
+        sample = queryset.model._default_manager.order_by("pk").first() if queryset is not None else None
+        lookup_field = getattr(viewset, "lookup_field", "pk")
+        if sample is not None and hasattr(viewset, "retrieve"):
+            found.append((f"{url_prefix}:detail", f"{base}{getattr(sample, lookup_field)}/"))
+        for extra in viewset.get_extra_actions():
+            if "get" not in extra.mapping or PassthroughRenderer in extra.kwargs.get("renderer_classes", ()):
+                # File downloads and archives are not API payloads.
+                continue
+            url_path = extra.url_path
+            if "(?P<" in url_path:
+                # Named groups (e.g. albums/(?P<slug>...)/images) are filled from the sample row.
+                if sample is None:
+                    continue
+                url_path = re.sub(r"\(\?P<(\w+)>[^)]*\)", lambda match: str(getattr(sample, match.group(1))), url_path)
+            if extra.detail:
+                if sample is None:
+                    continue
+                found.append((f"{url_prefix}:{extra.url_name}", f"{base}{getattr(sample, lookup_field)}/{url_path}/"))
+            else:
+                found.append((f"{url_prefix}:{extra.url_name}", f"{base}{url_path}/"))
+    return found
+
+
+def percentiles(samples) -> dict:
+    ordered = sorted(samples)
+
+    def pick(fraction):
+        return round(ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))], 3)
+
+    return {
+        "p50": pick(0.5), "p90": pick(0.9), "p99": pick(0.99),
+        "max": round(ordered[-1], 3), "mean": round(statistics.fmean(ordered), 3),
+    }
+
+
+def timed_get(client, path):
+    """``(response, milliseconds, query count)`` of one request."""
+    # request_started resets the query log, so start from an empty one.
+    reset_queries()
+    with CaptureQueriesContext(connection) as queries:
+        started = time.perf_counter()
+        response = client.get(path)
+        elapsed = (time.perf_counter() - started) * 1000
+    return response, elapsed, len(queries)
+
+
+def measure(client, path, iterations):
+    """Cold (cache cleared) and warm timings in milliseconds for one path."""
+    default_cache.clear()
+    response, cold_ms, cold_queries = timed_get(client, path)
+    content = b"".join(response) if response.streaming else response.content
+
+    warm, warm_queries = [], 0
+    for _ in range(iterations):
+        _, elapsed, queries = timed_get(client, path)
+        warm.append(elapsed)
+        warm_queries += queries
+    return {
+        "status": response.status_code,
+        "bytes": len(content),
+        "queries_cold": cold_queries,
+        "queries_warm": round(warm_queries / max(iterations, 1), 2),
+        "cold_ms": round(cold_ms, 3),
+        "warm_ms": percentiles(warm) if warm else None,
+    }
+
+
+def run(paths, iterations=20, log=print):
+    client = Client()
+    results = {}
+    for name, path in paths:
+        results[name] = {"path": path, **measure(client, path, iterations)}
+        log(f"{name:40} {results[name]['status']} {results[name]['queries_cold']:>3}q "
+            f"{results[name]['bytes']:>9}B cold {results[name]['cold_ms']:>9.1f}ms")
+    return results
+
+
+def sqlite_settings() -> dict:
+    """Journal mode and transaction mode in effect on the default connection."""
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA journal_mode")
+        journal_mode = cursor.fetchone()[0]
+    options = connection.settings_dict.get("OPTIONS", {})
+    return {
+        "journal_mode": journal_mode,
+        "transaction_mode": options.get("transaction_mode") or "DEFERRED",
+        "conn_max_age": connection.settings_dict.get("CONN_MAX_AGE", 0),
+    }
+
+
+@contextmanager
+def stock_sqlite():
+    """Run with SQLite's defaults (rollback journal, deferred transactions, no pragmas)."""
+    aliases = ["default", *sorted(routers.routed_aliases())]
+    saved = {
+        alias: {key: connections[alias].settings_dict.get(key) for key in ("OPTIONS", "CONN_MAX_AGE")}
+        for alias in aliases
+    }
+    connections.close_all()
+    for alias in aliases:
+        connections[alias].settings_dict.update(OPTIONS={}, CONN_MAX_AGE=0)
+        with connections[alias].cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode=DELETE")
+    try:
+        yield
+    finally:
+        connections.close_all()
+        for alias in aliases:
+            connections[alias].settings_dict.update(saved[alias])
+
+
+def contention(paths, duration=10.0, readers=4, writers=2, log=print) -> dict:
+    """Reads per second over ``paths`` while ``writers`` threads insert submissions.
+
+    Every thread has its own test client and database connection; the caller
+    disables the response cache so reads reach the database.
+    """
+    connections.close_all()
+    stop = time.monotonic() + duration
+    token = uuid.uuid4().hex[:8]
+    numbers = itertools.count()
+    results = {"reads": ([], [0]), "writes": ([], [0])}
+    guard = threading.Lock()
+
+    def read(client, index):
+        return client.get(paths[index % len(paths)][1]).status_code == 200
+
+    def write(client, index):
+        number = next(numbers)
+        if number % 2:
+            response = client.post("/api/newsletter/", {"email": f"bench-{token}-{number}@example.org"},
+                                   content_type="application/json")
+        else:
+            response = client.post("/api/contact/", {
+                "name": "Benchmark", "email": "bench@example.org", "subject": f"Load {number}",
+                "message": "Concurrent write benchmark.",
+            }, content_type="application/json")
+        return response.status_code in (201, 202)  # 202: journaled (see journal.py)
+
+    def worker(kind, job):
+        client, samples, failed = Client(), [], 0
+        try:
+            for index in itertools.count():
+                if time.monotonic() >= stop:
+                    break
+                started = time.perf_counter()
+                try:
+                    ok = job(client, index)
+                except OperationalError:
+                    ok = False
+                if ok:
+                    samples.append((time.perf_counter() - started) * 1000)
+                else:
+                    failed += 1
+        finally:
+            connections.close_all()
+        with guard:
+            results[kind][0].extend(samples)
+            results[kind][1][0] += failed
+
+    threads = [threading.Thread(target=worker, args=("reads", read)) for _ in range(readers)]
+    threads += [threading.Thread(target=worker, args=("writes", write)) for _ in range(writers)]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    report = {"duration_s": round(elapsed, 3), "readers": readers, "writers": writers, **sqlite_settings()}
+    for kind, (samples, (failed,)) in results.items():
+        report[kind] = {
+            "count": len(samples),
+            "per_second": round(len(samples) / elapsed, 1),
+            "failed": failed,
+            "latency_ms": percentiles(samples) if samples else None,
+        }
+    log(f"{report['journal_mode']:>6}/{report['transaction_mode']:<9} "
+        f"reads {report['reads']['per_second']:>8.1f}/s (p99 {(report['reads']['latency_ms'] or {}).get('p99')} ms, "
+        f"{report['reads']['failed']} failed)  writes {report['writes']['per_second']:>7.1f}/s "
+        f"({report['writes']['failed']} failed)")
+    return report
@@ -0,0 +1,90 @@
+"""Versioned caching helpers for the public content API.
+
+Every model in this app has a version token stored in the default cache.
+Cached payloads embed the tokens of the models they were built from in their
+key, so bumping a model's token (see ``signals.py``) makes every dependent
+entry unreachable at once without having to track individual keys.
+
+Tokens are nanosecond timestamps of the last change, which also lets them
+double as Last-Modified values. Deletions additionally leave a tombstone
+timestamp, because a deleted row no longer shows up in ``max(updated_at)``.
+"""
+import hashlib
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+VERSION_KEY = "content:version:{}"
+TOMBSTONE_KEY = "content:deleted:{}"
+
+
+def _version_key(model) -> str:
+    return VERSION_KEY.format(model._meta.label_lower)
+
+
+def _tombstone_key(model) -> str:
+    return TOMBSTONE_KEY.format(model._meta.label_lower)
+
+
+def _new_token() -> str:
+    return str(time.time_ns())
+
+
+def get_timeout() -> int:
+    return getattr(settings, "CONTENT_CACHE_TIMEOUT", 60 * 60 * 24)
+
+
+def timeout_until(moment, now, default=None) -> int:
+    """Cache timeout that expires at ``moment`` (if any), capped at the default lifetime."""
+    timeout = get_timeout() if default is None else default
+    if moment is None:
+        return timeout
+    return max(1, min(timeout, math.ceil((moment - now).total_seconds())))
+
+
+def model_versions(model_list) -> list:
+    """Return the current version token of each model, creating missing ones."""
+    keys = [_version_key(model) for model in model_list]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            token = _new_token()
+            cache.add(key, token, None)
+            # Another process may have won the add; a DummyCache keeps nothing.
+            found[key] = cache.get(key) or token
+    return [found[key] for key in keys]
+
+
+def bump_model_version(model) -> None:
+    cache.set(_version_key(model), _new_token(), None)
+
+
+def record_deletion(model) -> None:
+    cache.set(_tombstone_key(model), _new_token(), None)
+
+
+def model_tombstone(model) -> str:
+    """Token of the model's most recent deletion, or ``"0"`` if none is known."""
+    return cache.get(_tombstone_key(model), "0")
+
+
+def token_timestamp(token: str) -> float:
+    return int(token) / 1e9
+
+
+def versioned_key(prefix: str, model_list, *parts) -> str:
+    raw = "|".join([*model_versions(model_list), *(str(part) for part in parts)])
+    return f"content:{prefix}:{hashlib.sha1(raw.encode('utf-8')).hexdigest()}"
+
+
+def get_or_build(key: str, builder, timeout=None):
+    """Cached value of ``builder()``; ``timeout`` may be a callable evaluated only on a miss."""
+    value = cache.get(key)
+    if value is None:
+        value = builder()
+        if callable(timeout):
+            timeout = timeout()
+        cache.set(key, value, get_timeout() if timeout is None else timeout)
+    return value
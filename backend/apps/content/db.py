@@ -0,0 +1,65 @@
+"""Short, serialized write transactions for SQLite.
+
+The database profile in ``settings.py`` opens SQLite in WAL mode, so reads
+never wait for a writer, and starts every transaction as ``IMMEDIATE``: the
+write lock is taken at ``BEGIN`` and a second writer waits up to
+``busy_timeout`` for it, instead of failing with ``database is locked`` when
+a read transaction tries to become a write one halfway through.
+
+SQLite still admits one writer at a time, so writes should be short and
+should not overlap within a worker either. ``write()`` runs a function in a
+transaction while holding a per-process lock (threads of one worker queue in
+Python instead of in SQLite's busy handler) and retries it with jittered
+backoff when the lock could not be had within the timeout. It must be the
+outermost transaction; nested inside another one it runs without retries.
+"""
+import functools
+import random
+import threading
+import time
+
+from django.db import DEFAULT_DB_ALIAS, OperationalError, transaction
+
+ATTEMPTS = 5
+BACKOFF = 0.05
+BACKOFF_MAX = 2.0
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def _lock(using):
+    with _locks_guard:
+        return _locks.setdefault(using, threading.Lock())
+
+
+def is_busy(error) -> bool:
+    """Whether ``error`` is SQLite giving up on a lock (``SQLITE_BUSY``/``SQLITE_LOCKED``)."""
+    message = str(error).lower()
+    return "database is locked" in message or "database table is locked" in message or "database is busy" in message
+
+
+def write(func, *args, using=DEFAULT_DB_ALIAS, attempts=ATTEMPTS, **kwargs):
+    """``func(*args, **kwargs)`` in a serialized write transaction, retried while SQLite is busy."""
+    if transaction.get_connection(using).in_atomic_block:
+        # The enclosing transaction cannot be replayed from here.
+        return func(*args, **kwargs)
+    for attempt in range(attempts):
+        try:
+            with _lock(using), transaction.atomic(using=using):
+                return func(*args, **kwargs)
+        except OperationalError as error:
+            if not is_busy(error) or attempt == attempts - 1:
+                raise
+        time.sleep(random.uniform(0, min(BACKOFF * 2 ** attempt, BACKOFF_MAX)))
+
+
+def serialized(func=None, *, using=DEFAULT_DB_ALIAS):
+    """Decorator form of ``write()``."""
+    if func is None:
+        return functools.partial(serialized, using=using)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return write(func, *args, using=using, **kwargs)
+    return wrapper
@@ -0,0 +1,206 @@
+"""Metadata, text and a cover image extracted from uploaded documents.
+
+Each model in ``DOCUMENT_FIELDS`` has a ``document`` JSON column describing
+its file and a ``document_text`` column holding the extracted text, which the
+full-text index (see ``search.py``) reads:
+
+    {"source": "publications/a.pdf", "size": 1048576, "sha256": "…",
+     "pages": 120, "cover": "publication_covers/a-page1.jpg"}
+
+``pages`` is only known for PDFs. After an upload a background job (see
+``tasks.py``) runs ``ingest()``; when the item has no cover, the first page is
+rendered (with PyMuPDF if it is installed, otherwise the largest image on the
+page is used, which covers scanned books) and saved as the cover. ``cover``
+records that image so it is replaced along with the file, while covers
+uploaded by an editor are left alone.
+
+``document_text`` can be large, so the models' default managers defer it.
+"""
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.utils import timezone
+from PIL import Image
+
+from . import cache, jobs, renditions
+
+try:
+    import pypdf
+except ImportError:  # page counts, text and covers need pypdf (see requirements.txt)
+    pypdf = None
+
+try:
+    import pymupdf
+except ImportError:  # optional; renders real first-page covers
+    pymupdf = None
+
+logger = logging.getLogger(__name__)
+
+# model label -> document file field.
+DOCUMENT_FIELDS = {
+    "content.publication": "file",
+    "content.librarypublicationentry": "pdf_file",
+}
+
+COVER_WIDTH = 1200
+CHUNK_SIZE = 1024 * 1024
+
+
+def document_field(model):
+    return DOCUMENT_FIELDS.get(model._meta.label_lower)
+
+
+def get_text_limit() -> int:
+    return getattr(settings, "CONTENT_DOCUMENT_TEXT_LIMIT", 500_000)
+
+
+def is_stale(instance) -> bool:
+    """Whether the document file changed since it was last ingested."""
+    field_file = getattr(instance, document_field(type(instance)))
+    return (instance.document or {}).get("source", "") != (field_file.name if field_file else "")
+
+
+def _checksum(field_file):
+    digest = hashlib.sha256()
+    size = 0
+    with field_file.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+            size += len(chunk)
+    return size, digest.hexdigest()
+
+
+def _is_pdf(field_file) -> bool:
+    with field_file.open("rb") as handle:
+        return handle.read(5) == b"%PDF-"
+
+
+def _extract_text(reader) -> str:
+    limit = get_text_limit()
+    parts, length = [], 0
+    for page in reader.pages:
+        text = (page.extract_text() or "").strip()
+        if text:
+            parts.append(text)
+            length += len(text)
+        if length >= limit:
+            break
+    return "\n".join(parts)[:limit]
+
+
+@contextmanager
+def _local_path(field_file):
+    """Path of ``field_file`` on disk; copied to a temporary file, chunk by chunk, on storages without paths."""
+    try:
+        path = field_file.storage.path(field_file.name)
+    except NotImplementedError:
+        path = None
+    if path is not None:
+        yield path
+        return
+    with tempfile.NamedTemporaryFile(suffix=".pdf") as spool:
+        with field_file.open("rb") as handle:
+            shutil.copyfileobj(handle, spool, CHUNK_SIZE)
+        spool.flush()
+        yield spool.name
+
+
+def _render_first_page(field_file, reader):
+    """First page as a PIL image, or ``None``."""
+    if pymupdf is not None:
+        # By path, so PyMuPDF only reads the pages it needs instead of the whole file.
+        with _local_path(field_file) as path:
+            with pymupdf.open(path, filetype="pdf") as document:
+                page = document[0]
+                zoom = COVER_WIDTH / max(page.rect.width, 1)
+                pixmap = page.get_pixmap(matrix=pymupdf.Matrix(zoom, zoom), alpha=False)
+                return Image.open(BytesIO(pixmap.tobytes("png")))
+    images = [image.image for image in reader.pages[0].images if image.image is not None]
+    if not images:
+        return None
+    return max(images, key=lambda image: image.width * image.height)
+
+
+def _cover_bytes(image) -> bytes:
+    image = image.convert("RGB")
+    if image.width > COVER_WIDTH:
+        image = image.resize((COVER_WIDTH, round(image.height * COVER_WIDTH / image.width)), Image.Resampling.LANCZOS)
+    buffer = BytesIO()
+    image.save(buffer, format="JPEG", quality=85, optimize=True)
+    return buffer.getvalue()
+
+
+def _save_cover(instance, field_file, image):
+    cover = instance.cover
+    stem = os.path.splitext(os.path.basename(field_file.name))[0]
+    name = cover.field.generate_filename(instance, f"{stem}-page1.jpg")
+    return cover.storage.save(name, ContentFile(_cover_bytes(image)))
+
+
+def ingest(instance, force=False) -> bool:
+    """Bring ``document``/``document_text`` (and a generated cover) in line with the file.
+
+    Returns ``True`` when anything was written. Like ``renditions.refresh()``
+    the result is saved with ``update()``, moving ``updated_at`` and the cache
+    version by hand.
+    """
+    model = type(instance)
+    field_file = getattr(instance, document_field(model))
+    current = instance.document or {}
+    source = field_file.name if field_file else ""
+    if not force and current.get("source", "") == source:
+        return False
+
+    data, text = {}, ""
+    generated = current.get("cover", "")
+    cover_name = instance.cover.name if instance.cover else ""
+    owns_cover = not cover_name or cover_name == generated
+    changes = {}
+    if source:
+        data = {"source": source, "size": None, "sha256": "", "pages": None, "cover": ""}
+        try:
+            data["size"], data["sha256"] = _checksum(field_file)
+            if pypdf is not None and _is_pdf(field_file):
+                with field_file.open("rb") as handle:
+                    reader = pypdf.PdfReader(handle)
+                    data["pages"] = len(reader.pages)
+                    text = _extract_text(reader)
+                    image = _render_first_page(field_file, reader) if owns_cover and data["pages"] else None
+                if image is not None:
+                    data["cover"] = _save_cover(instance, field_file, image)
+        except Exception:
+            # Broken or encrypted PDFs still get their size and checksum.
+            logger.warning("Could not ingest %s %s", model._meta.label, instance.pk, exc_info=True)
+
+    if owns_cover and data.get("cover", "") != cover_name:
+        changes["cover"] = data.get("cover", "")
+        if generated and generated != data.get("cover"):
+            instance.cover.storage.delete(generated)
+    elif not owns_cover:
+        data.pop("cover", None)
+
+    changes.update(document=data, document_text=text)
+    for name, value in changes.items():
+        setattr(instance, name, value)
+    model._default_manager.filter(pk=instance.pk).update(updated_at=timezone.now(), **changes)
+    cache.bump_model_version(model)
+
+    if "cover" in changes and "cover" in renditions.image_fields(model):
+        label = model._meta.label_lower
+        jobs.enqueue("content.build_renditions", {"label": label, "pk": instance.pk},
+                     dedup_key=f"renditions:{label}:{instance.pk}")
+    return True
+
+
+def metadata(data, field_file):
+    """Public view of a ``document`` description, or ``None`` while it is outdated or missing."""
+    if not field_file or (data or {}).get("source") != field_file.name:
+        return None
+    return {"size": data.get("size"), "pages": data.get("pages"), "sha256": data.get("sha256", "")}
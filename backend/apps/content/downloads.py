@@ -0,0 +1,239 @@
+"""File downloads for publications and library books, with download counts.
+
+``/api/publications/<pk>/download/`` and ``/api/books/<pk>/download/``
+redirect to the item's external URL or serve its stored file:
+
+* with ``CONTENT_DOWNLOAD_ACCEL = "x-accel-redirect"`` Django only answers
+  with an ``X-Accel-Redirect`` to ``CONTENT_DOWNLOAD_ACCEL_PREFIX`` + the
+  storage name and nginx sends the bytes (ranges included) from an
+  ``internal`` location; ``"x-sendfile"`` does the same for Apache/lighttpd
+  with the file's path;
+* otherwise the file is streamed from storage, honouring ``Range`` (one
+  byte range), ``If-Range`` and the usual conditional headers, so PDF viewers
+  can fetch large files piecewise.
+
+Downloads are counted in memory per process and written with one
+``UPDATE ... download_count = download_count + n`` per distinct increment
+every ``CONTENT_DOWNLOAD_FLUSH_SIZE`` downloads or
+``CONTENT_DOWNLOAD_FLUSH_INTERVAL`` seconds, whichever comes first, and when
+the process exits. Ranged requests for anything but the start of a file are
+not counted, so a viewer reading a PDF in pieces counts once. Counts are not
+part of the API payloads, so flushing invalidates no cached responses.
+"""
+import atexit
+import logging
+import mimetypes
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import quote
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.db.models import F
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseRedirect, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+from rest_framework.decorators import action
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+from . import db
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class PassthroughRenderer(BaseRenderer):
+    """Lets download actions answer any ``Accept`` header with the file itself.
+
+    Listed after ``JSONRenderer`` so errors are still JSON for ordinary clients.
+    """
+    media_type = "*/*"
+    format = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, bytes):
+            return data
+        return JSONRenderer().render(data)
+
+
+class DownloadCounter:
+    """Per-process download counts, written to the database in batches."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = defaultdict(int)
+        self.size = 0
+        self.flushed_at = time.monotonic()
+
+    def add(self, obj) -> None:
+        with self.lock:
+            self.pending[(type(obj), obj.pk)] += 1
+            self.size += 1
+            due = (
+                self.size >= getattr(settings, "CONTENT_DOWNLOAD_FLUSH_SIZE", 50)
+                or time.monotonic() - self.flushed_at >= getattr(settings, "CONTENT_DOWNLOAD_FLUSH_INTERVAL", 60)
+            )
+        if due:
+            self.flush()
+
+    def flush(self) -> None:
+        with self.lock:
+            pending, self.pending = self.pending, defaultdict(int)
+            self.size = 0
+            self.flushed_at = time.monotonic()
+        if not pending:
+            return
+        # One statement per (model, increment) instead of one per file.
+        batches = defaultdict(list)
+        for (model, pk), count in pending.items():
+            batches[model, count].append(pk)
+
+        def apply():
+            for (model, count), pks in batches.items():
+                model._default_manager.filter(pk__in=pks).update(download_count=F("download_count") + count)
+
+        try:
+            db.write(apply)
+        except DatabaseError:
+            logger.warning("Could not record %s downloads; retrying later", sum(pending.values()), exc_info=True)
+            with self.lock:
+                for key, count in pending.items():
+                    self.pending[key] += count
+                    self.size += count
+
+
+counter = DownloadCounter()
+atexit.register(counter.flush)
+
+
+def _accel_response(storage, name, content_type):
+    mode = getattr(settings, "CONTENT_DOWNLOAD_ACCEL", "")
+    if not mode:
+        return None
+    response = HttpResponse(content_type=content_type)
+    if mode == "x-accel-redirect":
+        prefix = getattr(settings, "CONTENT_DOWNLOAD_ACCEL_PREFIX", "/protected-media/")
+        response["X-Accel-Redirect"] = prefix.rstrip("/") + "/" + quote(name)
+    elif mode == "x-sendfile":
+        response["X-Sendfile"] = storage.path(name)
+    else:
+        raise ValueError(f"Unknown CONTENT_DOWNLOAD_ACCEL {mode!r}")
+    return response
+
+
+def _byte_range(header, size):
+    """``(start, end)`` inclusive for a single-range ``Range`` header, ``None`` to send
+    the whole file, or ``False`` when the range cannot be satisfied."""
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ("", ""):
+        # Malformed or multi-range requests get the full file, as RFC 9110 allows.
+        return None
+    first, last = match.groups()
+    if first == "":
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start, end = int(first), min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def _iter_range(handle, start, length):
+    with handle:
+        handle.seek(start)
+        while length > 0:
+            chunk = handle.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def serve(request, field_file):
+    """Response for ``field_file``: handed off to the web server, or streamed with range support."""
+    return serve_file(request, field_file.storage, field_file.name)
+
+
+def serve_file(request, storage, name, filename=None, as_attachment=False):
+    """Like ``serve()``, for any stored ``name``; ``filename`` is what the browser saves it as."""
+    try:
+        size = storage.size(name)
+        modified = storage.get_modified_time(name).timestamp()
+    except (FileNotFoundError, NotImplementedError):
+        raise Http404("File not found.")
+    content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+    etag = f'"{int(modified):x}-{size:x}"'
+    last_modified = http_date(modified)
+    filename = filename or os.path.basename(name)
+    disposition = "attachment" if as_attachment else "inline"
+
+    accelerated = _accel_response(storage, name, content_type)
+    if accelerated is not None:
+        accelerated["Content-Disposition"] = f"{disposition}; filename*=UTF-8''{quote(filename)}"
+        return accelerated
+
+    validators = HttpResponse()
+    validators["ETag"] = etag
+    validators["Last-Modified"] = last_modified
+    conditional = get_conditional_response(request, etag=etag, last_modified=int(modified), response=validators)
+    if conditional is not validators:
+        return conditional
+
+    byte_range = None
+    header = request.headers.get("Range")
+    if header:
+        if_range = request.headers.get("If-Range")
+        if not if_range or if_range == etag or parse_http_date_safe(if_range) == int(modified):
+            byte_range = _byte_range(header, size)
+
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+    elif byte_range:
+        start, end = byte_range
+        response = StreamingHttpResponse(_iter_range(storage.open(name, "rb"), start, end - start + 1), status=206,
+                                         content_type=content_type)
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+        response["Content-Length"] = str(end - start + 1)
+        response["Content-Disposition"] = f"{disposition}; filename*=UTF-8''{quote(filename)}"
+    else:
+        response = FileResponse(
+            storage.open(name, "rb"), filename=filename, as_attachment=as_attachment, content_type=content_type,
+        )
+    response["Accept-Ranges"] = "bytes"
+    response["ETag"] = etag
+    response["Last-Modified"] = last_modified
+    return response
+
+
+def counts(request, response) -> bool:
+    """Whether ``response`` starts a download (also when nginx serves the range)."""
+    if request.method != "GET" or response.status_code not in (200, 206, 302):
+        return False
+    byte_range = request.headers.get("Range", "").replace(" ", "")
+    return not byte_range or byte_range.startswith("bytes=0-")
+
+
+class DownloadMixin:
+    """``download`` action for a viewset whose model has ``external_url``, a file
+    field named ``download_field`` and a ``download_count`` column."""
+    download_field = "file"
+
+    @action(detail=True, methods=["get"], renderer_classes=[JSONRenderer, PassthroughRenderer])
+    def download(self, request, *args, **kwargs):
+        obj = self.get_object()
+        field_file = getattr(obj, self.download_field)
+        if obj.external_url:
+            response = HttpResponseRedirect(obj.external_url)
+        elif field_file:
+            response = serve(request, field_file)
+        else:
+            raise Http404("Nothing to download.")
+        if counts(request, response):
+            counter.add(obj)
+        return response
@@ -0,0 +1,66 @@
+"""Facet counts for the catalogue endpoints.
+
+All facets of a view are counted with one ``GROUP BY`` over the combination
+of facet values (``SELECT a, b, c, COUNT(*) ... GROUP BY a, b, c``); the
+per-facet buckets are rolled up from those rows in Python. The number of
+combinations is bounded by the catalogue's categories and years, so this is
+far cheaper than one COUNT per bucket.
+"""
+from django.db.models import Count, F
+
+from . import i18n
+
+
+class Facet:
+    """One facet: the grouped ``value`` and an optional translated ``label`` path."""
+
+    def __init__(self, value, label=None):
+        self.value = F(value) if isinstance(value, str) else value
+        self.label = label
+
+
+def _key(name, part):
+    return f"facet_{name}_{part}"
+
+
+def facet_counts(queryset, facets, lang=None) -> dict:
+    """Return ``{"count": total, "facets": {name: [bucket, ...]}}`` for ``queryset``.
+
+    Buckets are ``{"value", "count"}`` plus ``label``/``label_si`` (or a single
+    ``label`` in ``lang``) when the facet has a label, most frequent first.
+    """
+    columns = {}
+    for name, facet in facets.items():
+        columns[_key(name, "value")] = facet.value
+        if facet.label:
+            columns[_key(name, "label")] = F(facet.label)
+            columns[_key(name, "label_si")] = F(f"{facet.label}{i18n.SUFFIX}")
+
+    rows = queryset.order_by().values(**columns).annotate(facet_count=Count("pk"))
+
+    total = 0
+    buckets = {name: {} for name in facets}
+    for row in rows:
+        total += row["facet_count"]
+        for name, facet in facets.items():
+            value = row[_key(name, "value")]
+            bucket = buckets[name].get(value)
+            if bucket is None:
+                bucket = buckets[name][value] = {"value": value, "count": 0}
+                if facet.label:
+                    label, label_si = row[_key(name, "label")], row[_key(name, "label_si")]
+                    if lang == "si":
+                        bucket["label"] = label_si or label
+                    elif lang:
+                        bucket["label"] = label
+                    else:
+                        bucket["label"], bucket["label_si"] = label, label_si
+            bucket["count"] += row["facet_count"]
+
+    return {
+        "count": total,
+        "facets": {
+            name: sorted(values.values(), key=lambda bucket: (-bucket["count"], str(bucket["value"])))
+            for name, values in buckets.items()
+        },
+    }
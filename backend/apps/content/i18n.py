@@ -0,0 +1,70 @@
+"""Single-language projection of the bilingual content models.
+
+Every translatable column ``x`` has a Sinhala sibling ``x_si``. By default the
+API returns both; ``?lang=en|si`` (or ``?lang=auto`` to follow the
+Accept-Language header) collapses each pair into one ``x`` value, falling back
+to English where the Sinhala text is blank, and only that value is selected
+from the database.
+"""
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce, NullIf
+from django.utils.translation.trans_real import parse_accept_lang_header
+
+LANGUAGES = ("en", "si")
+DEFAULT_LANGUAGE = "en"
+AUTO = "auto"
+SUFFIX = "_si"
+
+
+def get_request_language(request):
+    """Return the requested projection language, or ``None`` for both languages."""
+    lang = request.GET.get("lang", "").lower()
+    if lang in LANGUAGES:
+        return lang
+    if lang != AUTO:
+        return None
+    for code, _ in parse_accept_lang_header(request.headers.get("Accept-Language", "")):
+        code = code.split("-")[0]
+        if code in LANGUAGES:
+            return code
+    return DEFAULT_LANGUAGE
+
+
+def translated_fields(model) -> list:
+    """Names of the concrete fields that have a ``_si`` counterpart."""
+    names = {field.name for field in model._meta.concrete_fields}
+    return [name for name in sorted(names) if f"{name}{SUFFIX}" in names]
+
+
+def localized_name(field: str) -> str:
+    return f"{field}_localized"
+
+
+def localized_expression(model, field: str, lang: str):
+    if lang == "si":
+        output_field = model._meta.get_field(field)
+        blank_to_null = NullIf(F(f"{field}{SUFFIX}"), Value(""), output_field=output_field)
+        return Coalesce(blank_to_null, F(field), output_field=output_field)
+    return F(field)
+
+
+def localize(obj, field: str, lang: str):
+    """Localized value of ``field`` on ``obj``, using the projected annotation when present."""
+    value = getattr(obj, localized_name(field), None)
+    if value is not None:
+        return value
+    if lang == "si":
+        return getattr(obj, f"{field}{SUFFIX}", "") or getattr(obj, field)
+    return getattr(obj, field)
+
+
+def project_queryset(queryset, lang: str, columns=None):
+    """Select only the requested language of every translated column (of ``columns``, when given)."""
+    fields = translated_fields(queryset.model)
+    if columns is not None:
+        fields = [field for field in fields if field in columns or f"{field}{SUFFIX}" in columns]
+    if not fields:
+        return queryset
+    annotations = {localized_name(field): localized_expression(queryset.model, field, lang) for field in fields}
+    deferred = [name for field in fields for name in (field, f"{field}{SUFFIX}")]
+    return queryset.annotate(**annotations).defer(*deferred)
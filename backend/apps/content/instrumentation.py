@@ -0,0 +1,175 @@
+"""Per-request SQL and timing instrumentation for the API.
+
+``ServerTimingMiddleware`` breaks each ``/api/`` request down into
+
+* ``db``: number of SQL statements and the time spent executing them,
+* ``serialize``: the view and its serializers, excluding SQL (from
+  ``process_view`` until the response is handed over for rendering),
+* ``render``: turning the DRF ``Response`` into bytes,
+* ``total``: the whole request as seen by this middleware,
+
+and reports them in a ``Server-Timing`` header (visible in the browser's
+network panel) and one JSON log line on the ``apps.content.instrumentation``
+logger. Requests over ``API_QUERY_BUDGET`` statements are logged as warnings.
+
+It is off unless ``API_INSTRUMENTATION`` is set; the middleware then raises
+``MiddlewareNotUsed`` and is dropped from the chain, so the cost is nil.
+
+Statements are counted by an execute wrapper installed on every database
+connection as it is opened. The wrapper reads the current request's
+``Metrics`` from a context variable, which asgiref copies into the thread a
+sync view runs in under ASGI, so the numbers are the same under WSGI and ASGI.
+"""
+import json
+import logging
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar("api_request_metrics", default=None)
+
+
+class Metrics:
+    __slots__ = (
+        "started", "queries", "db_time", "view_started", "view_db_time",
+        "view_time", "render_started", "render_time",
+    )
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.view_started = None
+        self.view_db_time = 0.0
+        self.view_time = 0.0
+        self.render_started = None
+        self.render_time = 0.0
+
+    def serialize_time(self) -> float:
+        return max(self.view_time - self.view_db_time, 0.0)
+
+
+def current():
+    """Metrics of the request being handled, or ``None``."""
+    return _current.get()
+
+
+def _execute(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.db_time += time.perf_counter() - started
+        metrics.queries += 1
+
+
+def _install(connection, **kwargs):
+    if _execute not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_execute)
+
+
+def _ms(seconds) -> float:
+    return round(seconds * 1000, 2)
+
+
+class ServerTimingMiddleware:
+    """Time API requests; see the module docstring. Place it first in ``MIDDLEWARE``."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, "API_INSTRUMENTATION", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.prefix = getattr(settings, "API_INSTRUMENTATION_PREFIX", "/api/")
+        self.budget = getattr(settings, "API_QUERY_BUDGET", None)
+        connection_created.connect(_install, dispatch_uid="apps.content.instrumentation")
+        # Connections opened before the middleware was loaded (this thread only).
+        for connection in connections.all(initialized_only=True):
+            _install(connection)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not request.path.startswith(self.prefix):
+            return self.get_response(request)
+        metrics = Metrics()
+        token = _current.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        if not request.path.startswith(self.prefix):
+            return await self.get_response(request)
+        metrics = Metrics()
+        token = _current.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = _current.get()
+        if metrics is not None:
+            metrics.view_started = time.perf_counter()
+            metrics.view_db_time = metrics.db_time
+
+    def process_template_response(self, request, response):
+        metrics = _current.get()
+        if metrics is None or metrics.view_started is None:
+            return response
+        now = time.perf_counter()
+        metrics.view_time = now - metrics.view_started
+        metrics.view_db_time = metrics.db_time - metrics.view_db_time
+        metrics.view_started = None
+        metrics.render_started = now
+
+        def rendered(response):
+            metrics.render_time = time.perf_counter() - metrics.render_started
+
+        response.add_post_render_callback(rendered)
+        return response
+
+    def finish(self, request, response, metrics):
+        total = time.perf_counter() - metrics.started
+        if metrics.view_started is not None:
+            # Plain responses (e.g. cache hits) never reach process_template_response.
+            metrics.view_time = time.perf_counter() - metrics.view_started
+            metrics.view_db_time = metrics.db_time - metrics.view_db_time
+        response["Server-Timing"] = ", ".join((
+            f'db;dur={_ms(metrics.db_time)};desc="{metrics.queries} queries"',
+            f"serialize;dur={_ms(metrics.serialize_time())}",
+            f"render;dur={_ms(metrics.render_time)}",
+            f"total;dur={_ms(total)}",
+        ))
+        over_budget = self.budget is not None and metrics.queries > self.budget
+        record = {
+            "method": request.method,
+            "path": request.get_full_path(),
+            "status": response.status_code,
+            "queries": metrics.queries,
+            "db_ms": _ms(metrics.db_time),
+            "serialize_ms": _ms(metrics.serialize_time()),
+            "render_ms": _ms(metrics.render_time),
+            "total_ms": _ms(total),
+            "over_budget": over_budget,
+        }
+        logger.log(logging.WARNING if over_budget else logging.INFO, json.dumps(record))
+        return response
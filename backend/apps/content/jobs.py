@@ -0,0 +1,202 @@
+"""Database-backed background jobs.
+
+Slow work triggered by saves (image renditions, and whatever comes next) is
+queued as ``Job`` rows and run by ``manage.py run_worker``; no broker needed.
+
+The queue is written for SQLite's single writer: a batch is claimed with one
+``UPDATE ... WHERE id IN (SELECT ... LIMIT n)`` statement that re-checks the
+claimable condition, and every other write is a single short statement, so
+the write lock is never held while a task runs. A claimed job is invisible to
+other workers until ``locked_until``, which the worker pushes forward every
+third of the visibility timeout while the task runs; a worker that dies
+mid-job therefore only delays it, and a long task is never picked up twice.
+Failures are retried with exponential backoff up to ``max_attempts``;
+``dedup_key`` keeps at most one pending job per key.
+
+With ``CONTENT_JOBS_EAGER`` tasks run in-process after commit instead, which
+is convenient for development without a worker.
+"""
+import logging
+import random
+import threading
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+VISIBILITY_TIMEOUT = 300
+BACKOFF_BASE = 10
+BACKOFF_MAX = 60 * 60
+
+TASKS = {}
+
+
+def task(name):
+    """Register the decorated function as the handler for jobs named ``name``."""
+    def register(func):
+        TASKS[name] = func
+        return func
+    return register
+
+
+def is_eager() -> bool:
+    return getattr(settings, "CONTENT_JOBS_EAGER", False)
+
+
+def enqueue(name, payload=None, dedup_key="", delay=0, max_attempts=5):
+    """Queue ``name(**payload)`` once the current transaction commits."""
+    if name not in TASKS:
+        raise KeyError(f"Unknown job task {name!r}")
+    payload = payload or {}
+
+    def create():
+        if is_eager():
+            TASKS[name](**payload)
+            return
+        try:
+            with transaction.atomic():
+                Job.objects.create(
+                    task=name,
+                    payload=payload,
+                    dedup_key=dedup_key,
+                    max_attempts=max_attempts,
+                    run_at=timezone.now() + timedelta(seconds=delay),
+                )
+        except IntegrityError:
+            # An identical job is already waiting; it will see the latest data.
+            pass
+
+    transaction.on_commit(create)
+
+
+def claimable(now):
+    return Q(status=Job.PENDING, run_at__lte=now) | Q(status=Job.RUNNING, locked_until__lt=now)
+
+
+def claim(batch=10, visibility=VISIBILITY_TIMEOUT):
+    """Lock up to ``batch`` due jobs for this caller and return them."""
+    now = timezone.now()
+    token = uuid.uuid4().hex
+    candidates = Job.objects.filter(claimable(now)).order_by("run_at", "id").values("pk")[:batch]
+    claimed = Job.objects.filter(claimable(now), pk__in=candidates).update(
+        status=Job.RUNNING,
+        attempts=F("attempts") + 1,
+        locked_by=token,
+        locked_until=now + timedelta(seconds=visibility),
+    )
+    if not claimed:
+        return []
+    return list(Job.objects.filter(locked_by=token, status=Job.RUNNING))
+
+
+def backoff(attempts) -> float:
+    delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** max(attempts - 1, 0))
+    return delay * random.uniform(0.8, 1.2)
+
+
+class Lease:
+    """Keep a claimed job hidden while it runs by renewing ``locked_until`` in a background thread."""
+
+    def __init__(self, queryset, visibility):
+        self.queryset = queryset
+        self.visibility = visibility
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.renew_periodically, name="job-lease", daemon=True)
+
+    def renew(self) -> bool:
+        """Extend the lease; ``False`` if the job is no longer ours."""
+        locked_until = timezone.now() + timedelta(seconds=self.visibility)
+        return bool(self.queryset.filter(status=Job.RUNNING).update(locked_until=locked_until))
+
+    def renew_periodically(self):
+        try:
+            while not self.stopped.wait(self.visibility / 3):
+                try:
+                    self.renew()
+                except DatabaseError:
+                    logger.warning("Could not renew the lease of a running job", exc_info=True)
+        finally:
+            connection.close()
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stopped.set()
+        self.thread.join()
+
+
+def run(job, visibility=VISIBILITY_TIMEOUT) -> bool:
+    """Run a claimed job and record the outcome; returns ``True`` on success.
+
+    ``attempts`` was already counted by ``claim()``, so a job whose worker keeps
+    dying still runs out of attempts.
+    """
+    mine = Job.objects.filter(pk=job.pk, locked_by=job.locked_by)
+    attempts = job.attempts
+    if job.task not in TASKS or attempts > job.max_attempts:
+        error = f"Unknown task {job.task!r}" if job.task not in TASKS else "Worker lost the job too many times"
+        mine.update(status=Job.FAILED, last_error=error, locked_until=None)
+        return False
+    handler = TASKS[job.task]
+    lease = Lease(mine, visibility)
+    if not lease.renew():
+        # Waited behind the rest of its batch past the lease and was claimed again elsewhere.
+        logger.info("Job %s (%s) was reclaimed by another worker; skipping", job.pk, job.task)
+        return False
+
+    try:
+        with lease:
+            handler(**job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        logger.warning("Job %s (%s) failed, attempt %s/%s", job.pk, job.task, attempts, job.max_attempts, exc_info=True)
+        if attempts >= job.max_attempts:
+            mine.update(status=Job.FAILED, last_error=error, locked_until=None)
+            return False
+        retry_at = timezone.now() + timedelta(seconds=backoff(attempts))
+        try:
+            with transaction.atomic():
+                mine.update(status=Job.PENDING, last_error=error, run_at=retry_at, locked_until=None)
+        except IntegrityError:
+            # A newer pending job with the same dedup key supersedes this retry.
+            mine.delete()
+        return False
+
+    mine.delete()
+    return True
+
+
+def release(claimed) -> None:
+    """Hand claimed jobs that were never started back to the queue."""
+    for job in claimed:
+        mine = Job.objects.filter(pk=job.pk, locked_by=job.locked_by, status=Job.RUNNING)
+        try:
+            with transaction.atomic():
+                mine.update(status=Job.PENDING, attempts=F("attempts") - 1, locked_until=None)
+        except IntegrityError:
+            mine.delete()
+
+
+def retry(queryset) -> int:
+    """Put failed jobs back in the queue, skipping ones superseded by a pending duplicate."""
+    count = 0
+    for job in queryset.filter(status=Job.FAILED):
+        try:
+            with transaction.atomic():
+                Job.objects.filter(pk=job.pk).update(
+                    status=Job.PENDING, attempts=0, run_at=timezone.now(), locked_until=None
+                )
+            count += 1
+        except IntegrityError:
+            Job.objects.filter(pk=job.pk).delete()
+    return count
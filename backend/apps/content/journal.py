@@ -0,0 +1,272 @@
+"""Buffered ingest of public submissions through an append-only journal.
+
+With ``CONTENT_SUBMISSION_JOURNAL`` on, a valid ``POST /api/contact/`` or
+``/api/newsletter/`` is not inserted right away: the validated fields are
+appended as one JSON line to this process's journal segment under
+``CONTENT_SUBMISSION_JOURNAL_DIR`` and answered with ``202 Accepted``. Every
+``CONTENT_SUBMISSION_JOURNAL_FLUSH_SIZE`` records, at the latest
+``CONTENT_SUBMISSION_JOURNAL_FLUSH_INTERVAL`` seconds after the first pending
+one, and at exit, the pending records are written with one
+``bulk_create(ignore_conflicts=True)`` per model, all in one transaction per
+database (both models live in ``submissions``, see ``routers.py``), so the
+database sees one write per batch instead of one per submission.
+
+Durability: with ``CONTENT_SUBMISSION_JOURNAL_FSYNC = "always"`` a record is
+fsynced before the response goes out; ``"flush"`` leaves that to the OS
+until the batch is written (a process crash loses nothing, a power cut may).
+Each segment is created as ``.open``, which replays skip, and only takes its
+``.jsonl`` name once the writing process holds its ``flock``. At flush the
+segment is sealed (renamed, still locked) and deleted once the batch is
+committed; if it cannot be sealed, its records are journaled again in a new
+segment and go out with the next flush. Segments nobody holds a lock on (left by a crashed worker, or a flush whose
+insert failed) are replayed by the next flush in any process and by
+``manage.py flush_submission_journal``.
+
+Replays are idempotent: every record carries a ``journal_key`` stored in a
+unique column, and newsletter addresses stay unique by ``email``, so rows
+already inserted, and addresses subscribed twice, are skipped. ``created_at``
+of a journaled row is the time of the flush.
+"""
+import atexit
+import json
+import logging
+import os
+import socket
+import threading
+import uuid
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DatabaseError, connections, router
+from rest_framework import status
+from rest_framework.response import Response
+
+from . import db
+
+try:
+    import fcntl
+except ImportError:  # Windows development servers: no locks, so orphans are only replayed by the command
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+OPEN_SUFFIX = ".open"
+ACTIVE_SUFFIX = ".jsonl"
+SEALED_SUFFIX = ".sealed"
+
+
+def is_enabled() -> bool:
+    return getattr(settings, "CONTENT_SUBMISSION_JOURNAL", False)
+
+
+def get_directory() -> Path:
+    return Path(getattr(settings, "CONTENT_SUBMISSION_JOURNAL_DIR", Path(settings.BASE_DIR) / "journal"))
+
+
+def _try_lock(handle) -> bool:
+    if fcntl is None:
+        return True
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return False
+    return True
+
+
+def read_segment(path) -> list:
+    """Records of a segment; a torn last line (crash mid-append) is ignored."""
+    records = []
+    with open(path, "rb") as handle:
+        for line in handle:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                logger.warning("Skipping unreadable journal line in %s", path)
+    return records
+
+
+def _bulk_create(batches, using) -> None:
+    for model, rows in batches.items():
+        model._base_manager.using(using).bulk_create(rows, ignore_conflicts=True)
+
+
+def insert(records) -> None:
+    """Write ``records`` to their databases, one transaction per database, skipping rows already there."""
+    databases = {}
+    for record in records:
+        model = apps.get_model(record["model"])
+        batches = databases.setdefault(router.db_for_write(model), {})
+        batches.setdefault(model, []).append(model(journal_key=uuid.UUID(record["key"]), **record["fields"]))
+    for using, batches in databases.items():
+        db.write(_bulk_create, batches, using, using=using)
+
+
+class Journal:
+    """This process's journal segment and the records not yet in the database."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.handle = None
+        self.path = None
+        self.pending = []
+        self.timer = None
+
+    def _open(self):
+        """Create a segment and lock it before it gets a name ``recover()`` looks at."""
+        directory = get_directory()
+        directory.mkdir(parents=True, exist_ok=True)
+        while True:
+            name = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+            path = directory / f"{name}{ACTIVE_SUFFIX}"
+            handle = open(path.with_suffix(OPEN_SUFFIX), "ab")
+            try:
+                # recover() may have removed a lockable .open file in the meantime.
+                if _try_lock(handle) and os.fstat(handle.fileno()).st_nlink:
+                    os.replace(path.with_suffix(OPEN_SUFFIX), path)
+                    self.handle, self.path = handle, path
+                    return
+            except FileNotFoundError:
+                pass
+            handle.close()
+
+    def _write(self, record) -> None:
+        line = json.dumps(record, cls=DjangoJSONEncoder, ensure_ascii=False).encode() + b"\n"
+        if self.handle is None:
+            self._open()
+        self.handle.write(line)
+        self.handle.flush()
+        if getattr(settings, "CONTENT_SUBMISSION_JOURNAL_FSYNC", "always") == "always":
+            os.fsync(self.handle.fileno())
+
+    def _schedule(self) -> None:
+        if self.timer is None:
+            self.timer = threading.Timer(
+                getattr(settings, "CONTENT_SUBMISSION_JOURNAL_FLUSH_INTERVAL", 5), self._flush_in_thread,
+            )
+            self.timer.daemon = True
+            self.timer.start()
+
+    def append(self, model, fields) -> None:
+        record = {"key": uuid.uuid4().hex, "model": model._meta.label_lower, "fields": dict(fields)}
+        with self.lock:
+            opened = self.handle is None
+            self._write(record)
+            self.pending.append(record)
+            due = len(self.pending) >= getattr(settings, "CONTENT_SUBMISSION_JOURNAL_FLUSH_SIZE", 100)
+            if not due:
+                self._schedule()
+        if due:
+            self.flush()
+        elif opened and fcntl is not None:
+            # A new segment, e.g. after a restart: pick up what a crashed worker left.
+            recover()
+
+    def _flush_in_thread(self):
+        try:
+            self.flush()
+        finally:
+            connections.close_all()
+
+    def flush(self) -> int:
+        """Insert the pending records (and orphaned segments); returns how many records were written."""
+        with self.lock:
+            records, handle, path = self.pending, self.handle, self.path
+            self.pending, self.handle, self.path = [], None, None
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+        written = 0
+        if handle is not None:
+            # Still locked after the rename, so no other process replays it meanwhile.
+            sealed = path.with_suffix(SEALED_SUFFIX)
+            try:
+                os.replace(path, sealed)
+            except OSError:
+                logger.warning("Could not seal journal segment %s; journaling its %s records again", path,
+                               len(records), exc_info=True)
+                handle.close()
+                self._restore(records)
+                return recover() if fcntl is not None else 0
+            try:
+                os.fsync(handle.fileno())
+                insert(records)
+                sealed.unlink()
+                written += len(records)
+            except DatabaseError:
+                logger.warning("Could not write %s journaled submissions; kept in %s", len(records), sealed,
+                               exc_info=True)
+            finally:
+                handle.close()
+        return written + (recover() if fcntl is not None else 0)
+
+    def _restore(self, records) -> None:
+        """Journal ``records`` again in a new segment; they are inserted by the next flush."""
+        with self.lock:
+            for record in records:
+                self._write(record)
+            self.pending[:0] = records
+            self._schedule()
+
+
+def recover() -> int:
+    """Replay segments no live process holds; returns how many records were replayed."""
+    directory = get_directory()
+    if not directory.is_dir():
+        return 0
+    written = 0
+    for path in sorted(directory.iterdir()):
+        if path.suffix == OPEN_SUFFIX:
+            _remove_abandoned(path)
+            continue
+        if path.suffix not in (ACTIVE_SUFFIX, SEALED_SUFFIX):
+            continue
+        try:
+            handle = open(path, "rb")
+        except FileNotFoundError:
+            continue
+        with handle:
+            if not _try_lock(handle) or not path.exists():
+                continue
+            records = read_segment(path)
+            try:
+                insert(records)
+            except DatabaseError:
+                logger.warning("Could not replay journal segment %s", path, exc_info=True)
+                continue
+            path.unlink()
+            written += len(records)
+            logger.info("Replayed %s journaled submissions from %s", len(records), path.name)
+    return written
+
+
+def _remove_abandoned(path) -> None:
+    """Delete a ``.open`` segment nobody holds; records are only written after it is renamed."""
+    try:
+        handle = open(path, "rb")
+    except FileNotFoundError:
+        return
+    with handle:
+        if _try_lock(handle) and path.exists():
+            path.unlink()
+
+
+journal = Journal()
+atexit.register(journal.flush)
+
+
+class JournaledCreateMixin:
+    """``create`` that journals the validated submission when ``CONTENT_SUBMISSION_JOURNAL`` is on,
+    and otherwise inserts it through ``db.write()``."""
+
+    def create(self, request, *args, **kwargs):
+        if not is_enabled():
+            return super().create(request, *args, **kwargs)
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        journal.append(self.queryset.model, serializer.validated_data)
+        return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
+
+    def perform_create(self, serializer):
+        db.write(serializer.save, using=router.db_for_write(self.queryset.model))
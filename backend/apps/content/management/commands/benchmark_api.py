@@ -0,0 +1,133 @@
+import json
+import platform
+import subprocess
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from apps.content import benchmark
+from apps.content.urls import router
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a scratch database with synthetic bilingual content and benchmark every "
+        "GET endpoint of the content API (latency, SQL queries, response size)."
+    )
+    # The default database is swapped for the scratch file before anything touches it.
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--database-file", default=str(Path(settings.BASE_DIR) / "benchmark.sqlite3"),
+            help="Scratch SQLite file to seed and query (never the site database).",
+        )
+        parser.add_argument("--reseed", action="store_true", help="Delete the scratch file and seed it again.")
+        parser.add_argument(
+            "--volume", action="append", default=[], metavar="NAME=COUNT",
+            help=f"Override a seed volume; names: {', '.join(benchmark.DEFAULT_VOLUMES)}.",
+        )
+        parser.add_argument("--scale", type=float, default=1.0, help="Multiply every default volume (e.g. 0.01 for a smoke run).")
+        parser.add_argument("--seed", type=int, default=1, help="Random seed for the synthetic content.")
+        parser.add_argument("--iterations", type=int, default=20, help="Warm requests per endpoint.")
+        parser.add_argument("--only", action="append", default=[], help="Only endpoints whose name contains this text.")
+        parser.add_argument("--path", action="append", default=[], help="Extra path to benchmark, e.g. /api/news/?lang=si.")
+        parser.add_argument(
+            "--contention", type=float, default=0, metavar="SECONDS",
+            help="Also measure read throughput under concurrent submission writes for this long (uncached).",
+        )
+        parser.add_argument("--readers", type=int, default=4, help="Reader threads for --contention.")
+        parser.add_argument("--writers", type=int, default=2, help="Writer threads for --contention.")
+        parser.add_argument(
+            "--compare-stock-sqlite", action="store_true",
+            help="Repeat --contention with SQLite's defaults (no WAL, deferred transactions, no pragmas).",
+        )
+        parser.add_argument("--output", default="benchmark-report.json", help="Where to write the JSON report ('-' for stdout).")
+
+    def handle(self, *args, **options):
+        database = Path(options["database_file"]).resolve()
+        configured = {Path(str(config["NAME"])).resolve() for config in settings.DATABASES.values()}
+        if database in configured:
+            raise CommandError("Refusing to benchmark against a configured site database; pick another --database-file.")
+        if options["reseed"] and database.exists():
+            database.unlink()
+
+        volumes = {name: max(1, int(count * options["scale"])) for name, count in benchmark.DEFAULT_VOLUMES.items()}
+        for item in options["volume"]:
+            name, _, count = item.partition("=")
+            if name not in volumes or not count.isdigit():
+                raise CommandError(f"Bad --volume {item!r}.")
+            volumes[name] = int(count)
+
+        benchmark.use_database(database)
+        if benchmark.is_seeded():
+            self.stdout.write(f"Reusing seeded database {database} (pass --reseed to rebuild).")
+        else:
+            self.stdout.write(f"Seeding {database} ...")
+            benchmark.seed(volumes, options["seed"], log=self.stdout.write)
+
+        paths = benchmark.routes(router) + [(path, path) for path in options["path"]]
+        if options["only"]:
+            paths = [(name, path) for name, path in paths if any(text in name for text in options["only"])]
+
+        # An isolated in-memory cache so cold/warm runs neither read nor evict the site cache.
+        with override_settings(
+            ALLOWED_HOSTS=["testserver"],
+            DEBUG=False,
+            CONTENT_THROTTLE_ENABLED=False,
+            CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "benchmark"}},
+        ):
+            results = benchmark.run(paths, options["iterations"], log=self.stdout.write)
+
+        contention = {}
+        if options["contention"] > 0:
+            readable = [
+                (name, path) for name, path in paths
+                if name.endswith((":list", ":detail")) and not name.startswith(("newsletter:", "contact:"))
+            ] or paths
+            contention_options = (options["contention"], options["readers"], options["writers"], self.stdout.write)
+            # No response cache, so every read reaches SQLite.
+            with override_settings(
+                ALLOWED_HOSTS=["testserver"],
+                DEBUG=False,
+                CONTENT_THROTTLE_ENABLED=False,
+                CACHES={"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}},
+            ):
+                contention["profile"] = benchmark.contention(readable, *contention_options)
+                if options["compare_stock_sqlite"]:
+                    with benchmark.stock_sqlite():
+                        contention["stock"] = benchmark.contention(readable, *contention_options)
+
+        report = {
+            "meta": {
+                "created_at": timezone.now().isoformat(),
+                "revision": self.revision(),
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "iterations": options["iterations"],
+                "rows": benchmark.row_counts(),
+                "database": str(database),
+            },
+            "endpoints": results,
+        }
+        if contention:
+            report["contention"] = contention
+        text = json.dumps(report, indent=2, sort_keys=True, ensure_ascii=False)
+        if options["output"] == "-":
+            self.stdout.write(text)
+        else:
+            Path(options["output"]).write_text(text + "\n", encoding="utf-8")
+            self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']} ({len(results)} endpoints)."))
+
+    @staticmethod
+    def revision():
+        try:
+            return subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
@@ -0,0 +1,20 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from apps.content import renditions
+
+
+class Command(BaseCommand):
+    help = "Generate missing or outdated responsive image renditions."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Rebuild renditions that are already up to date.")
+
+    def handle(self, *args, **options):
+        total = 0
+        for label, fields in renditions.IMAGE_FIELDS.items():
+            model = apps.get_model(label)
+            for instance in model._default_manager.order_by("pk").iterator():
+                if renditions.refresh(instance, force=options["force"]):
+                    total += 1
+        self.stdout.write(self.style.SUCCESS(f"Updated renditions for {total} objects."))
@@ -0,0 +1,50 @@
+import os
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from apps.content import snapshot
+from apps.content.urls import router
+
+
+class Command(BaseCommand):
+    help = (
+        "Render every public GET endpoint of the content API (per language and page) into static, "
+        "precompressed JSON files that nginx can serve directly."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output", default=os.getenv("DJANGO_API_SNAPSHOT_ROOT", str(Path(settings.BASE_DIR) / "snapshot")),
+            help="Snapshot directory (the nginx root for /api/).",
+        )
+        parser.add_argument(
+            "--base-url", default=os.getenv("DJANGO_API_SNAPSHOT_BASE_URL", "http://localhost:8000"),
+            help="Public origin of the site; absolute links and media URLs are built from it.",
+        )
+        parser.add_argument(
+            "--incremental", action="store_true",
+            help="Only re-render endpoints whose models changed since the last export.",
+        )
+        parser.add_argument("--only", action="append", default=[], help="Only this router prefix (e.g. news); repeatable.")
+
+    def handle(self, *args, **options):
+        host = urlsplit(options["base_url"]).hostname
+        if not host:
+            raise CommandError(f"Bad --base-url {options['base_url']!r}.")
+        unknown = set(options["only"]) - {prefix for prefix, _, _ in router.registry}
+        if unknown:
+            raise CommandError(f"Unknown --only prefix: {', '.join(sorted(unknown))}.")
+
+        with override_settings(ALLOWED_HOSTS=[host]):
+            summary = snapshot.export(
+                router, options["output"], options["base_url"],
+                incremental=options["incremental"], only=options["only"], log=self.stdout.write,
+            )
+        exported = sum(1 for status in summary.values() if status != "unchanged")
+        self.stdout.write(self.style.SUCCESS(
+            f"Snapshot in {options['output']}: {exported} endpoint groups exported, {len(summary) - exported} unchanged."
+        ))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from apps.content import journal
+
+
+class Command(BaseCommand):
+    help = (
+        "Write journaled contact and newsletter submissions left behind by stopped or crashed "
+        "processes to the database (see apps/content/journal.py)."
+    )
+
+    def handle(self, *args, **options):
+        written = journal.recover()
+        self.stdout.write(self.style.SUCCESS(f"Replayed {written} journaled submissions."))
@@ -0,0 +1,20 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from apps.content import documents
+
+
+class Command(BaseCommand):
+    help = "Extract size, checksum, page count, text and a cover from new or changed publication and book files."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Process files that are already up to date.")
+
+    def handle(self, *args, **options):
+        total = 0
+        for label in documents.DOCUMENT_FIELDS:
+            model = apps.get_model(label)
+            for instance in model._default_manager.order_by("pk").iterator():
+                if documents.ingest(instance, force=options["force"]):
+                    total += 1
+        self.stdout.write(self.style.SUCCESS(f"Processed documents of {total} objects."))
@@ -0,0 +1,57 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from apps.content import routers
+
+BATCH_SIZE = 1000
+# Throttle buckets are routed too, but are short-lived and need no copying.
+LABELS = ("content.contactmessage", "content.newslettersubscription")
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy contact messages and newsletter subscriptions stored in the content database "
+        "before they were routed to their own database (see apps/content/routers.py)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--delete", action="store_true", help="Remove the copied rows from the content database.")
+
+    def handle(self, *args, **options):
+        tables = connections[DEFAULT_DB_ALIAS].introspection.table_names()
+        for label in LABELS:
+            model = apps.get_model(label)
+            target = routers.alias_for(label)
+            if target == DEFAULT_DB_ALIAS or model._meta.db_table not in tables:
+                continue
+            source = model._base_manager.using(DEFAULT_DB_ALIAS).order_by("pk")
+            copied, batch = 0, []
+            for row in source.iterator(chunk_size=BATCH_SIZE):
+                batch.append(row)
+                if len(batch) == BATCH_SIZE:
+                    copied += self.copy(model, target, batch)
+                    batch = []
+            copied += self.copy(model, target, batch)
+            if options["delete"]:
+                source.delete()
+            self.stdout.write(f"{model._meta.verbose_name_plural}: {copied} copied to {target!r}.")
+        self.stdout.write(self.style.SUCCESS("Done."))
+
+    @staticmethod
+    def copy(model, target, rows) -> int:
+        """Insert ``rows`` into ``target``, keeping their ids where free; returns how many were new."""
+        manager = model._base_manager.using(target)
+        existing = {row.pk: row for row in manager.filter(pk__in=[row.pk for row in rows])}
+        fresh = []
+        for row in rows:
+            other = existing.get(row.pk)
+            if other is not None and (other.email, other.created_at) == (row.email, row.created_at):
+                continue  # copied by an earlier run
+            if other is not None:
+                # The id was taken by a submission made after the split.
+                row.pk = None
+            fresh.append(row)
+        # Newsletter addresses that subscribed again since are skipped.
+        manager.bulk_create(fresh, ignore_conflicts=True)
+        return len(fresh)
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.content import search
+
+
+class Command(BaseCommand):
+    help = "Repopulate the FTS5 search index for books, news and notices."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default="default")
+
+    def handle(self, *args, **options):
+        if not search.is_available(options["database"]):
+            raise CommandError("The full-text index does not exist; run migrate on a SQLite database first.")
+        total = search.rebuild(options["database"])
+        self.stdout.write(self.style.SUCCESS(f"Indexed {total} rows."))
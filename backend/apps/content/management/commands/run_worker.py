@@ -0,0 +1,70 @@
+import signal
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, close_old_connections, connections
+
+from apps.content import jobs
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs (image renditions and other slow work triggered by saves)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=2, help="Worker threads claiming jobs in parallel.")
+        parser.add_argument("--batch", type=int, default=5, help="Jobs claimed per round trip.")
+        parser.add_argument("--poll", type=float, default=2.0, help="Seconds to sleep when the queue is empty.")
+        parser.add_argument(
+            "--visibility", type=int, default=jobs.VISIBILITY_TIMEOUT,
+            help="Seconds a claimed job stays hidden from other workers.",
+        )
+        parser.add_argument("--once", action="store_true", help="Exit as soon as the queue is empty.")
+
+    def handle(self, *args, **options):
+        self.stop = threading.Event()
+        self.processed = 0
+        self.lock = threading.Lock()
+        if threading.current_thread() is threading.main_thread():
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                signal.signal(signum, lambda *_: self.stop.set())
+
+        threads = [
+            threading.Thread(target=self.work, kwargs=options, name=f"job-worker-{index}", daemon=True)
+            for index in range(max(1, options["threads"]))
+        ]
+        for thread in threads:
+            thread.start()
+        while any(thread.is_alive() for thread in threads):
+            for thread in threads:
+                thread.join(timeout=0.5)
+        self.stdout.write(self.style.SUCCESS(f"Processed {self.processed} jobs."))
+
+    def work(self, batch, poll, visibility, once, **options):
+        try:
+            while not self.stop.is_set():
+                close_old_connections()
+                try:
+                    claimed = jobs.claim(batch=batch, visibility=visibility)
+                except OperationalError:
+                    # Another writer holds the SQLite lock; try again shortly.
+                    self.stop.wait(poll)
+                    continue
+                if not claimed:
+                    if once:
+                        return
+                    self.stop.wait(poll)
+                    continue
+                for index, job in enumerate(claimed):
+                    if self.stop.is_set():
+                        jobs.release(claimed[index:])
+                        break
+                    started = time.monotonic()
+                    ok = jobs.run(job, visibility=visibility)
+                    with self.lock:
+                        self.processed += 1
+                    self.stdout.write(
+                        f"{'done' if ok else 'failed'} {job.task} #{job.pk} in {time.monotonic() - started:.2f}s"
+                    )
+        finally:
+            connections.close_all()
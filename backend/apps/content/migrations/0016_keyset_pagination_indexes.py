@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0015_newsimage_noticeimage'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='galleryimage',
+            index=models.Index(fields=['album', 'position', 'created_at', 'id'], name='galleryimage_album_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='galleryimage',
+            index=models.Index(fields=['position', 'created_at', 'id'], name='galleryimage_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='librarypublicationentry',
+            index=models.Index(fields=['-created_at', 'id'], name='libentry_created_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='news',
+            index=models.Index(fields=['-published_at', 'id'], name='news_published_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notice',
+            index=models.Index(fields=['-published_at', '-priority', 'id'], name='notice_published_keyset_idx'),
+        ),
+    ]
@@ -0,0 +1,82 @@
+# Full-text index for News, Notice and LibraryPublicationEntry (see apps/content/search.py).
+
+from django.db import migrations
+
+TABLE = "content_search"
+STRIDE = 4
+
+# source table -> (doc_type, title, title_si, body, body_si) over the NEW/OLD row.
+SOURCES = {
+    "content_news": (
+        1, "{r}.title", "{r}.title_si",
+        "{r}.excerpt || ' ' || {r}.content", "{r}.excerpt_si || ' ' || {r}.content_si",
+    ),
+    "content_notice": (
+        2, "{r}.title", "{r}.title_si", "{r}.content", "{r}.content_si",
+    ),
+    "library_publicationentry": (
+        3, "{r}.title || ' ' || {r}.subtitle", "{r}.title_si || ' ' || {r}.subtitle_si",
+        "{r}.authors || ' ' || {r}.description", "{r}.authors_si || ' ' || {r}.description_si",
+    ),
+}
+
+
+def _insert(doc_type, columns, row):
+    values = ", ".join(column.format(r=row) for column in columns)
+    return (
+        f"INSERT INTO {TABLE} (rowid, title, title_si, body, body_si) "
+        f"VALUES ({row}.id * {STRIDE} + {doc_type}, {values});"
+    )
+
+
+def _delete(doc_type, row):
+    return f"DELETE FROM {TABLE} WHERE rowid = {row}.id * {STRIDE} + {doc_type};"
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    execute = schema_editor.execute
+    execute(
+        f"CREATE VIRTUAL TABLE {TABLE} USING fts5("
+        "title, title_si, body, body_si, "
+        "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+    )
+    for table, (doc_type, *columns) in SOURCES.items():
+        execute(
+            f"CREATE TRIGGER {table}_search_ai AFTER INSERT ON {table} BEGIN "
+            f"{_insert(doc_type, columns, 'new')} END"
+        )
+        execute(
+            f"CREATE TRIGGER {table}_search_ad AFTER DELETE ON {table} BEGIN "
+            f"{_delete(doc_type, 'old')} END"
+        )
+        execute(
+            f"CREATE TRIGGER {table}_search_au AFTER UPDATE ON {table} BEGIN "
+            f"{_delete(doc_type, 'old')} {_insert(doc_type, columns, 'new')} END"
+        )
+        values = ", ".join(column.format(r=table) for column in columns)
+        execute(
+            f"INSERT INTO {TABLE} (rowid, title, title_si, body, body_si) "
+            f"SELECT {table}.id * {STRIDE} + {doc_type}, {values} FROM {table}"
+        )
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for table in SOURCES:
+        for suffix in ("ai", "ad", "au"):
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS {table}_search_{suffix}")
+    schema_editor.execute(f"DROP TABLE IF EXISTS {TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0016_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,41 @@
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("content", "0018_image_renditions"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Job",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("task", models.CharField(max_length=100)),
+                ("payload", models.JSONField(blank=True, default=dict)),
+                ("dedup_key", models.CharField(blank=True, help_text="At most one pending job per key", max_length=255)),
+                ("status", models.CharField(choices=[("pending", "Pending"), ("running", "Running"), ("failed", "Failed")], default="pending", max_length=10)),
+                ("attempts", models.PositiveIntegerField(default=0)),
+                ("max_attempts", models.PositiveIntegerField(default=5)),
+                ("run_at", models.DateTimeField(default=django.utils.timezone.now)),
+                ("locked_by", models.CharField(blank=True, max_length=64)),
+                ("locked_until", models.DateTimeField(blank=True, null=True)),
+                ("last_error", models.TextField(blank=True)),
+            ],
+            options={
+                "ordering": ["run_at", "id"],
+                "indexes": [models.Index(fields=["status", "run_at"], name="job_claim_idx")],
+                "constraints": [
+                    models.UniqueConstraint(
+                        condition=models.Q(("status", "pending"), models.Q(("dedup_key", ""), _negated=True)),
+                        fields=("dedup_key",),
+                        name="job_pending_dedup_key_uniq",
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("content", "0019_job"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="notice",
+            index=models.Index(fields=["expires_at", "published_at", "priority"], name="notice_active_window_idx"),
+        ),
+    ]
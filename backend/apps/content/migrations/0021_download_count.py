@@ -0,0 +1,58 @@
+# SQLite adds a column with a default by rebuilding the table, which drops the
+# full-text triggers 0017 put on library_publicationentry; they are
+# reinstalled after the new column.
+
+from django.db import migrations, models
+
+TABLE = "content_search"
+STRIDE = 4
+
+# source table -> (doc_type, title, title_si, body, body_si) over the NEW/OLD row, as in 0017.
+SOURCES = {
+    "library_publicationentry": (
+        3, "{r}.title || ' ' || {r}.subtitle", "{r}.title_si || ' ' || {r}.subtitle_si",
+        "{r}.authors || ' ' || {r}.description", "{r}.authors_si || ' ' || {r}.description_si",
+    ),
+}
+
+
+def install_triggers(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != "sqlite" or TABLE not in connection.introspection.table_names():
+        return
+    execute = schema_editor.execute
+    for table, (doc_type, *columns) in SOURCES.items():
+        values = ", ".join(column.format(r="new") for column in columns)
+        insert = (
+            f"INSERT INTO {TABLE} (rowid, title, title_si, body, body_si) "
+            f"VALUES (new.id * {STRIDE} + {doc_type}, {values});"
+        )
+        delete = f"DELETE FROM {TABLE} WHERE rowid = old.id * {STRIDE} + {doc_type};"
+        for suffix in ("ai", "ad", "au"):
+            execute(f"DROP TRIGGER IF EXISTS {table}_search_{suffix}")
+        execute(f"CREATE TRIGGER {table}_search_ai AFTER INSERT ON {table} BEGIN {insert} END")
+        execute(f"CREATE TRIGGER {table}_search_ad AFTER DELETE ON {table} BEGIN {delete} END")
+        execute(f"CREATE TRIGGER {table}_search_au AFTER UPDATE ON {table} BEGIN {delete} {insert} END")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("content", "0020_notice_active_window_idx"),
+    ]
+
+    operations = [
+        # Runs last when reversed, after RemoveField has rebuilt the table again.
+        migrations.RunPython(migrations.RunPython.noop, install_triggers),
+        migrations.AddField(
+            model_name="publication",
+            name="download_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="librarypublicationentry",
+            name="download_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(install_triggers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,103 @@
+# Document metadata/text for publications and books, and the full-text triggers
+# rebuilt around them (see apps/content/documents.py and apps/content/search.py).
+#
+# The book triggers change to index document_text and publications get their
+# own; every trigger is recreated here.
+
+from django.db import migrations, models
+
+TABLE = "content_search"
+STRIDE = 4
+
+# source table -> (doc_type, title, title_si, body, body_si, indexed columns).
+SOURCES = {
+    "content_publication": (
+        0, "title", "title_si",
+        "description || ' ' || department || ' ' || document_text", "description_si || ' ' || department_si",
+        "department, department_si, description, description_si, document_text, title, title_si",
+    ),
+    "content_news": (
+        1, "title", "title_si", "excerpt || ' ' || content", "excerpt_si || ' ' || content_si",
+        "content, content_si, excerpt, excerpt_si, title, title_si",
+    ),
+    "content_notice": (
+        2, "title", "title_si", "content", "content_si",
+        "content, content_si, title, title_si",
+    ),
+    "library_publicationentry": (
+        3, "title || ' ' || subtitle", "title_si || ' ' || subtitle_si",
+        "authors || ' ' || description || ' ' || document_text", "authors_si || ' ' || description_si",
+        "authors, authors_si, description, description_si, document_text, subtitle, subtitle_si, title, title_si",
+    ),
+}
+
+# The same without document text or publications, for reversing.
+PREVIOUS_SOURCES = {
+    "content_news": SOURCES["content_news"],
+    "content_notice": SOURCES["content_notice"],
+    "library_publicationentry": (
+        3, "title || ' ' || subtitle", "title_si || ' ' || subtitle_si",
+        "authors || ' ' || description", "authors_si || ' ' || description_si",
+        "authors, authors_si, description, description_si, subtitle, subtitle_si, title, title_si",
+    ),
+}
+
+
+def _install(schema_editor, sources):
+    connection = schema_editor.connection
+    if connection.vendor != "sqlite" or TABLE not in connection.introspection.table_names():
+        return
+    execute = schema_editor.execute
+    for table in SOURCES:
+        for suffix in ("ai", "ad", "au"):
+            execute(f"DROP TRIGGER IF EXISTS {table}_search_{suffix}")
+    execute(f"DELETE FROM {TABLE}")
+    for table, (doc_type, title, title_si, body, body_si, columns) in sources.items():
+        select = f"SELECT id * {STRIDE} + {doc_type}, {title}, {title_si}, {body}, {body_si} FROM {table}"
+        insert = f"INSERT INTO {TABLE} (rowid, title, title_si, body, body_si) {select} WHERE id = new.id;"
+        delete = f"DELETE FROM {TABLE} WHERE rowid = old.id * {STRIDE} + {doc_type};"
+        execute(f"CREATE TRIGGER {table}_search_ai AFTER INSERT ON {table} BEGIN {insert} END")
+        execute(f"CREATE TRIGGER {table}_search_ad AFTER DELETE ON {table} BEGIN {delete} END")
+        execute(f"CREATE TRIGGER {table}_search_au AFTER UPDATE OF {columns} ON {table} BEGIN {delete} {insert} END")
+        execute(f"INSERT INTO {TABLE} (rowid, title, title_si, body, body_si) {select}")
+
+
+def install_triggers(apps, schema_editor):
+    _install(schema_editor, SOURCES)
+
+
+def restore_triggers(apps, schema_editor):
+    _install(schema_editor, PREVIOUS_SOURCES)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("content", "0021_download_count"),
+    ]
+
+    operations = [
+        # Runs last when reversing, in case removing the columns rebuilt a table and dropped its triggers.
+        migrations.RunPython(migrations.RunPython.noop, restore_triggers),
+        migrations.AddField(
+            model_name="publication",
+            name="document",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name="publication",
+            name="document_text",
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name="librarypublicationentry",
+            name="document",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name="librarypublicationentry",
+            name="document_text",
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.RunPython(install_triggers, restore_triggers),
+    ]
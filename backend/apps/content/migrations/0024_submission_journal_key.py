@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("content", "0023_upload"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="contactmessage",
+            name="journal_key",
+            field=models.UUIDField(blank=True, editable=False, null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name="newslettersubscription",
+            name="journal_key",
+            field=models.UUIDField(blank=True, editable=False, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("content", "0024_submission_journal_key"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ThrottleBucket",
+            fields=[
+                ("key", models.CharField(max_length=255, primary_key=True, serialize=False)),
+                ("full_at", models.FloatField(db_index=True)),
+            ],
+        ),
+    ]
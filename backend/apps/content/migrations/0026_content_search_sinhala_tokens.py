@@ -0,0 +1,80 @@
+# Recreate the full-text index so Sinhala words stay whole (see apps/content/search.py).
+#
+# unicode61 splits on combining marks (Mn/Mc) and format characters such as
+# the zero-width joiner (Cf) by default, which cuts Sinhala words apart after
+# every consonant: පිරිවෙන was indexed as ප, ර, ව, න. Marks and format
+# characters are token characters now, and the index is refilled from the
+# source tables.
+
+from django.db import migrations
+
+TABLE = "content_search"
+STRIDE = 4
+TOKENIZE = "unicode61 remove_diacritics 2 categories ''L* N* Co M* Cf''"
+PREVIOUS_TOKENIZE = "unicode61 remove_diacritics 2"
+
+# source table -> (doc_type, title, title_si, body, body_si, indexed columns).
+SOURCES = {
+    "content_publication": (
+        0, "title", "title_si",
+        "description || ' ' || department || ' ' || document_text", "description_si || ' ' || department_si",
+        "department, department_si, description, description_si, document_text, title, title_si",
+    ),
+    "content_news": (
+        1, "title", "title_si", "excerpt || ' ' || content", "excerpt_si || ' ' || content_si",
+        "content, content_si, excerpt, excerpt_si, title, title_si",
+    ),
+    "content_notice": (
+        2, "title", "title_si", "content", "content_si",
+        "content, content_si, title, title_si",
+    ),
+    "library_publicationentry": (
+        3, "title || ' ' || subtitle", "title_si || ' ' || subtitle_si",
+        "authors || ' ' || description || ' ' || document_text", "authors_si || ' ' || description_si",
+        "authors, authors_si, description, description_si, document_text, subtitle, subtitle_si, title, title_si",
+    ),
+}
+
+
+def _recreate(schema_editor, tokenize):
+    connection = schema_editor.connection
+    if connection.vendor != "sqlite" or TABLE not in connection.introspection.table_names():
+        return
+    execute = schema_editor.execute
+    for table in SOURCES:
+        for suffix in ("ai", "ad", "au"):
+            execute(f"DROP TRIGGER IF EXISTS {table}_search_{suffix}")
+    execute(f"DROP TABLE {TABLE}")
+    execute(
+        f"CREATE VIRTUAL TABLE {TABLE} USING fts5("
+        "title, title_si, body, body_si, "
+        f"tokenize = '{tokenize}', prefix = '2 3')"
+    )
+    for table, (doc_type, title, title_si, body, body_si, columns) in SOURCES.items():
+        select = f"SELECT id * {STRIDE} + {doc_type}, {title}, {title_si}, {body}, {body_si} FROM {table}"
+        insert = f"INSERT INTO {TABLE} (rowid, title, title_si, body, body_si) {select} WHERE id = new.id;"
+        delete = f"DELETE FROM {TABLE} WHERE rowid = old.id * {STRIDE} + {doc_type};"
+        execute(f"CREATE TRIGGER {table}_search_ai AFTER INSERT ON {table} BEGIN {insert} END")
+        execute(f"CREATE TRIGGER {table}_search_ad AFTER DELETE ON {table} BEGIN {delete} END")
+        execute(f"CREATE TRIGGER {table}_search_au AFTER UPDATE OF {columns} ON {table} BEGIN {delete} {insert} END")
+        execute(f"INSERT INTO {TABLE} (rowid, title, title_si, body, body_si) {select}")
+    execute(f"INSERT INTO {TABLE} ({TABLE}) VALUES ('optimize')")
+
+
+def keep_marks(apps, schema_editor):
+    _recreate(schema_editor, TOKENIZE)
+
+
+def split_on_marks(apps, schema_editor):
+    _recreate(schema_editor, PREVIOUS_TOKENIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("content", "0025_throttlebucket"),
+    ]
+
+    operations = [
+        migrations.RunPython(keep_marks, split_on_marks),
+    ]
@@ -0,0 +1,218 @@
+import hashlib
+
+from django.core.cache import cache as default_cache
+from django.db.models import Count, ForeignKey, Max, OneToOneField
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe
+
+from . import cache, i18n
+from .i18n import get_request_language
+from .serializers import FieldSelection
+
+# Response headers replayed together with cached content.
+CACHED_HEADERS = ("ETag", "Last-Modified", "Cache-Control")
+
+
+class CachedResponseMixin:
+    """Serve rendered list/retrieve responses from the cache.
+
+    Entries are keyed by host, path, query string, language and renderer, plus
+    the version tokens of the queryset model and ``cache_models``, so a save or
+    delete on any of those models invalidates every response built from it.
+    Extra GET actions opt in by returning ``self.cached_response(...)``.
+    """
+    cache_models = ()
+
+    def get_cache_models(self):
+        return (self.get_queryset().model, *self.cache_models)
+
+    def get_cache_key(self, request):
+        return cache.versioned_key(
+            "response",
+            self.get_cache_models(),
+            request.build_absolute_uri(),
+            get_request_language(request),
+            request.accepted_media_type,
+        )
+
+    def get_cache_timeout(self):
+        return cache.get_timeout()
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        # The browsable API embeds per-user markup, so only plain JSON is cached.
+        if request.method not in ("GET", "HEAD") or request.accepted_renderer.format != "json":
+            return handler(request, *args, **kwargs)
+
+        key = self.get_cache_key(request)
+        hit = default_cache.get(key)
+        if hit is not None:
+            content, content_type, headers = hit
+            response = HttpResponse(content, content_type=content_type, headers=headers)
+            response["X-Cache"] = "HIT"
+            return get_conditional_response(
+                request,
+                etag=headers.get("ETag"),
+                last_modified=parse_http_date_safe(headers.get("Last-Modified", "")),
+                response=response,
+            )
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            timeout = self.get_cache_timeout()
+
+            def store(rendered):
+                headers = {name: rendered[name] for name in CACHED_HEADERS if name in rendered}
+                default_cache.set(key, (rendered.content, rendered["Content-Type"], headers), timeout)
+
+            response.add_post_render_callback(store)
+            response["X-Cache"] = "MISS"
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+
+class ConditionalGetMixin:
+    """Answer list/retrieve requests with 304 Not Modified when nothing changed.
+
+    The validator comes from a single aggregate query over the filtered
+    queryset (``max(updated_at)`` and row count), run before any
+    serialization. The primary model's deletion tombstone and the version
+    tokens of ``cache_models`` cover removed rows and nested rows, neither of
+    which move the parent's ``updated_at``.
+    """
+
+    def get_validator_queryset(self):
+        qs = self.filter_queryset(self.get_queryset())
+        if self.action == "retrieve":
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            qs = qs.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        return qs.order_by()
+
+    def get_validator_extras(self):
+        """Additional values that must change the ETag, e.g. time-dependent filters."""
+        return []
+
+    def get_validators(self, request):
+        """Return ``(etag, last_modified)`` or ``None`` when there is nothing to validate."""
+        stats = self.get_validator_queryset().aggregate(last=Max("updated_at"), count=Count("pk"))
+        if self.action == "retrieve" and not stats["count"]:
+            return None
+
+        tombstone = cache.model_tombstone(self.get_queryset().model)
+        versions = cache.model_versions(getattr(self, "cache_models", ()))
+        last = stats["last"].timestamp() if stats["last"] else 0
+        parts = [
+            last, stats["count"], tombstone, *versions, *self.get_validator_extras(),
+            get_request_language(request), request.accepted_media_type,
+        ]
+        etag = '"%s"' % hashlib.sha1("|".join(map(str, parts)).encode("utf-8")).hexdigest()
+        last_modified = max([last, *(cache.token_timestamp(token) for token in (tombstone, *versions))])
+        return etag, int(last_modified)
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return handler(request, *args, **kwargs)
+
+        validators = self.get_validators(request)
+        if validators is None:
+            return handler(request, *args, **kwargs)
+
+        etag, last_modified = validators
+        response = HttpResponse()
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(last_modified)
+        # Let browsers and proxies keep the body but revalidate on every use.
+        patch_cache_control(response, no_cache=True)
+        conditional = get_conditional_response(request, etag=etag, last_modified=last_modified, response=response)
+        if conditional is not response:
+            return conditional
+
+        full = handler(request, *args, **kwargs)
+        if full.status_code == 200:
+            for name in CACHED_HEADERS:
+                full[name] = response[name]
+        return full
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(super().retrieve, request, *args, **kwargs)
+
+
+class LanguageProjectionMixin:
+    """Serve one language per request on ``?lang=en|si|auto``.
+
+    Read requests load only the requested language of each translated column
+    (see ``i18n.project_queryset``) and the serializers collapse ``x``/``x_si``
+    into a single ``x``. Without ``?lang`` both languages are returned as before.
+    """
+
+    def get_language(self):
+        if self.request is None or self.request.method not in ("GET", "HEAD"):
+            return None
+        return get_request_language(self.request)
+
+    def get_queryset(self):
+        qs = super().get_queryset()
+        lang = self.get_language()
+        return i18n.project_queryset(qs, lang, self.get_projected_columns(qs.model)) if lang else qs
+
+    def get_projected_columns(self, model):
+        """Columns narrowed by ``?fields=`` (see ``SparseFieldsMixin``), or ``None`` for all."""
+        selection = self.get_field_selection() if hasattr(self, "get_field_selection") else None
+        if selection is None:
+            return None
+        return selection.columns(model, self.get_serializer_class().Meta)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["lang"] = self.get_language()
+        return context
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if request.GET.get("lang", "").lower() == i18n.AUTO:
+            patch_vary_headers(response, ["Accept-Language"])
+        return response
+
+
+class SparseFieldsMixin:
+    """Let ``?fields=`` and ``?expand=`` shape both the payload and the query.
+
+    Nested relations declared in the serializer's ``Meta.expandable_fields``
+    are only joined or prefetched when they will be rendered, and with
+    ``?fields=`` the SELECT is narrowed to the columns those fields read.
+    """
+
+    def get_field_selection(self):
+        if self.request is None or self.request.method not in ("GET", "HEAD"):
+            return None
+        return FieldSelection.from_query_params(self.request.query_params)
+
+    def get_queryset(self):
+        qs = super().get_queryset()
+        selection = self.get_field_selection()
+        meta = self.get_serializer_class().Meta
+        for name, lookup in getattr(meta, "expandable_fields", {}).items():
+            if selection is not None and not selection.wants(name, expandable=True):
+                continue
+            field = qs.model._meta.get_field(name)
+            if isinstance(lookup, str) and isinstance(field, (ForeignKey, OneToOneField)):
+                qs = qs.select_related(lookup)
+            else:
+                qs = qs.prefetch_related(lookup)
+        columns = selection.columns(qs.model, meta) if selection is not None else None
+        if columns is not None:
+            qs = qs.only(*columns)
+        return qs
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["field_selection"] = self.get_field_selection()
+        return context
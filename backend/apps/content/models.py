@@ -1,4 +1,8 @@
+import uuid
+
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
 from django.utils.text import slugify
 from django.core.exceptions import ValidationError
 
@@ -11,11 +15,19 @@ class TimeStamped(models.Model):
         abstract = True
 
 
+class DocumentManager(models.Manager):
+    """Leaves the (possibly large) extracted ``document_text`` out of ordinary queries."""
+
+    def get_queryset(self):
+        return super().get_queryset().defer("document_text")
+
+
 class News(TimeStamped):
     title = models.CharField(max_length=255)
     title_si = models.CharField(max_length=255, blank=True)
     slug = models.SlugField(max_length=255, unique=True, blank=True)
     image = models.ImageField(upload_to="news", blank=True, null=True)
+    image_renditions = models.JSONField(default=dict, blank=True, editable=False)
     excerpt = models.TextField(blank=True)
     excerpt_si = models.TextField(blank=True)
     content = models.TextField()
@@ -25,6 +37,9 @@ class News(TimeStamped):
 
     class Meta:
         verbose_name_plural = "News"
+        indexes = [
+            models.Index(fields=["-published_at", "id"], name="news_published_keyset_idx"),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -38,6 +53,7 @@ class News(TimeStamped):
 class NewsImage(TimeStamped):
     news = models.ForeignKey(News, on_delete=models.CASCADE, related_name="gallery_images")
     image = models.ImageField(upload_to="news/gallery")
+    image_renditions = models.JSONField(default=dict, blank=True, editable=False)
     caption = models.CharField(max_length=255, blank=True)
     caption_si = models.CharField(max_length=255, blank=True)
     position = models.PositiveIntegerField(default=0)
@@ -63,6 +79,10 @@ class Notice(TimeStamped):
 
     class Meta:
         ordering = ["-published_at", "-priority"]
+        indexes = [
+            models.Index(fields=["-published_at", "-priority", "id"], name="notice_published_keyset_idx"),
+            models.Index(fields=["expires_at", "published_at", "priority"], name="notice_active_window_idx"),
+        ]
 
     def __str__(self):
         return self.title
@@ -96,8 +116,14 @@ class Publication(TimeStamped):
     cover = models.ImageField(upload_to="publication_covers", blank=True, null=True)
     department = models.CharField(max_length=255, blank=True)
     department_si = models.CharField(max_length=255, blank=True)
+    download_count = models.PositiveIntegerField(default=0, editable=False)
+    # Size, checksum, page count and generated cover of `file` (see apps/content/documents.py).
+    document = models.JSONField(default=dict, blank=True, editable=False)
+    document_text = models.TextField(blank=True, editable=False)
     # Category is added below via DownloadCategory foreign key once the model is declared
 
+    objects = DocumentManager()
+
     class Meta:
         verbose_name = "Downloadable file"
         verbose_name_plural = "Downloadable files"
@@ -148,6 +174,7 @@ class Album(TimeStamped):
     description = models.TextField(blank=True)
     description_si = models.TextField(blank=True)
     cover = models.ImageField(upload_to="albums/covers/", blank=True, null=True)
+    cover_renditions = models.JSONField(default=dict, blank=True, editable=False)
     is_active = models.BooleanField(default=True)
     position = models.PositiveIntegerField(default=0)
     published_at = models.DateField(blank=True, null=True)
@@ -166,12 +193,17 @@ class Album(TimeStamped):
 class GalleryImage(TimeStamped):
     album = models.ForeignKey(Album, on_delete=models.CASCADE, related_name="images")
     image = models.ImageField(upload_to="albums/images/")
+    image_renditions = models.JSONField(default=dict, blank=True, editable=False)
     caption = models.CharField(max_length=255, blank=True)
     caption_si = models.CharField(max_length=255, blank=True)
     position = models.PositiveIntegerField(default=0)
 
     class Meta:
         ordering = ["position", "created_at"]
+        indexes = [
+            models.Index(fields=["album", "position", "created_at", "id"], name="galleryimage_album_keyset_idx"),
+            models.Index(fields=["position", "created_at", "id"], name="galleryimage_keyset_idx"),
+        ]
 
     def __str__(self):
         return f"{self.album.title} - {self.caption or self.image.name}"
@@ -234,6 +266,7 @@ class HeroSlide(TimeStamped):
     subtitle = models.CharField(max_length=255, blank=True)
     subtitle_si = models.CharField(max_length=255, blank=True)
     image = models.ImageField(upload_to="slides")
+    image_renditions = models.JSONField(default=dict, blank=True, editable=False)
     button_label = models.CharField(max_length=100, blank=True)
     button_label_si = models.CharField(max_length=100, blank=True)
     button_url = models.URLField(blank=True)
@@ -248,6 +281,8 @@ class HeroSlide(TimeStamped):
 
 class NewsletterSubscription(TimeStamped):
     email = models.EmailField(unique=True)
+    # Set when the row came through the submission journal; makes replays idempotent (see journal.py).
+    journal_key = models.UUIDField(unique=True, null=True, blank=True, editable=False)
 
     def __str__(self):
         return self.email
@@ -320,18 +355,28 @@ class LibraryPublicationEntry(TimeStamped):
     description_si = models.TextField(blank=True)
 
     cover = models.ImageField(upload_to="publication_covers/", blank=True, null=True)
+    cover_renditions = models.JSONField(default=dict, blank=True, editable=False)
     pdf_file = models.FileField(upload_to="publications/", blank=True, null=True, help_text="Optional PDF for the book")
     external_url = models.URLField(blank=True, help_text="If provided, link to this instead of pdf_file")
 
     published_at = models.DateField(null=True, blank=True)
     is_active = models.BooleanField(default=True)
     is_featured = models.BooleanField(default=False, help_text="Show in homepage Publications section")
+    download_count = models.PositiveIntegerField(default=0, editable=False)
+    # Size, checksum, page count and generated cover of `pdf_file` (see apps/content/documents.py).
+    document = models.JSONField(default=dict, blank=True, editable=False)
+    document_text = models.TextField(blank=True, editable=False)
+
+    objects = DocumentManager()
 
     class Meta:
         ordering = ["-published_at", "-created_at"]
         verbose_name = "Book (Library)"
         verbose_name_plural = "Books (Library)"
         db_table = "library_publicationentry"
+        indexes = [
+            models.Index(fields=["-created_at", "id"], name="libentry_created_keyset_idx"),
+        ]
 
     def clean(self):
         if not self.pdf_file and not self.external_url:
@@ -429,6 +474,7 @@ class ContactMessage(TimeStamped):
     subject = models.CharField(max_length=255, blank=True)
     message = models.TextField()
     is_handled = models.BooleanField(default=False)
+    journal_key = models.UUIDField(unique=True, null=True, blank=True, editable=False)
 
     class Meta:
         ordering = ["-created_at"]
@@ -488,3 +534,68 @@ class FooterAbout(TimeStamped):
     def __str__(self):
         return self.title or "Footer about"
 
+
+class Job(TimeStamped):
+    """Unit of background work, claimed and run by ``manage.py run_worker`` (see jobs.py)."""
+
+    PENDING = "pending"
+    RUNNING = "running"
+    FAILED = "failed"
+    STATUS_CHOICES = [(PENDING, "Pending"), (RUNNING, "Running"), (FAILED, "Failed")]
+
+    task = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    dedup_key = models.CharField(max_length=255, blank=True, help_text="At most one pending job per key")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=64, blank=True)
+    locked_until = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ["run_at", "id"]
+        indexes = [
+            models.Index(fields=["status", "run_at"], name="job_claim_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["dedup_key"],
+                condition=models.Q(status="pending") & ~models.Q(dedup_key=""),
+                name="job_pending_dedup_key_uniq",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.task} #{self.pk} ({self.status})"
+
+
+class Upload(TimeStamped):
+    """A file arriving in chunks through the admin (see uploads.py)."""
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    target = models.CharField(max_length=100, help_text="app_label.model.field the file is for")
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    offset = models.PositiveBigIntegerField(default=0)
+    name = models.CharField(max_length=255, blank=True, help_text="Storage name once finalized")
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True, blank=True, related_name="+",
+    )
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.size})"
+
+
+class ThrottleBucket(models.Model):
+    """A client's API token bucket: the time at which it is full again (see throttling.py)."""
+
+    key = models.CharField(max_length=255, primary_key=True)
+    full_at = models.FloatField(db_index=True)
+
+    def __str__(self):
+        return self.key
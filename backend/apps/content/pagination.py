@@ -0,0 +1,87 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.response import Response
+
+from . import cache
+
+# DRF itself ignores these keys; the paginators below honour them.
+PAGE_SIZE_QUERY_PARAM = settings.REST_FRAMEWORK.get("PAGE_SIZE_QUERY_PARAM")
+# Larger ?page_size= values are clamped; whole collections go through exports.py.
+MAX_PAGE_SIZE = settings.REST_FRAMEWORK.get("MAX_PAGE_SIZE")
+
+
+class KeysetPagination(CursorPagination):
+    """Cursor pagination ordered by the view's ``cursor_ordering``.
+
+    Pages are fetched with ``WHERE <first key> < position`` instead of an
+    OFFSET scan and without a COUNT(*), so cost does not grow with depth and
+    rows published mid-browse do not shift later pages. ``?count=true`` adds a
+    total that is counted once and cached until the model changes.
+    """
+    page_size_query_param = PAGE_SIZE_QUERY_PARAM
+    max_page_size = MAX_PAGE_SIZE
+    count_query_param = "count"
+
+    def get_ordering(self, request, queryset, view):
+        # The cursor encodes a position in this exact ordering, so ?ordering= is ignored.
+        return tuple(view.cursor_ordering)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count = None
+        if request.query_params.get(self.count_query_param, "").lower() in ("true", "1", "yes"):
+            self.count = self.get_approximate_count(queryset)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_approximate_count(self, queryset):
+        unordered = queryset.order_by()
+        key = cache.versioned_key("count", [queryset.model], unordered.query)
+        return cache.get_or_build(key, unordered.count)
+
+    def get_paginated_response(self, data):
+        payload = {"next": self.get_next_link(), "previous": self.get_previous_link()}
+        if self.count is not None:
+            payload["count"] = self.count
+        payload["results"] = data
+        return Response(payload)
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema["properties"]["count"] = {"type": "integer", "example": 123}
+        return response_schema
+
+
+class ContentPagination(PageNumberPagination):
+    """Page-number pagination that switches to keyset cursors on request.
+
+    Views that declare ``cursor_ordering`` accept ``?pagination=cursor`` (or
+    any ``?cursor=`` token handed out in a previous response); everything
+    else keeps the regular ``page``/``page_size`` behaviour.
+    """
+    page_size_query_param = PAGE_SIZE_QUERY_PARAM
+    max_page_size = MAX_PAGE_SIZE
+    mode_query_param = "pagination"
+
+    def __init__(self):
+        self.keyset = None
+
+    def use_cursor(self, request, view):
+        if not getattr(view, "cursor_ordering", None):
+            return False
+        params = request.query_params
+        return params.get(self.mode_query_param) == "cursor" or KeysetPagination.cursor_query_param in params
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_cursor(request, view):
+            self.keyset = KeysetPagination()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def to_html(self):
+        if self.keyset is not None:
+            return self.keyset.to_html()
+        return super().to_html()
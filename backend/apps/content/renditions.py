@@ -0,0 +1,194 @@
+"""Responsive derivatives of uploaded images.
+
+Each image field listed in ``IMAGE_FIELDS`` has a ``<field>_renditions``
+JSON column. After an upload a background job (see ``tasks.py``) writes
+width-stepped WebP (and AVIF, when Pillow can encode it) copies next to the
+original under ``renditions/``.
+The column records the source name, its intrinsic size and every variant:
+
+    {"source": "news/a.jpg", "width": 4000, "height": 3000,
+     "variants": {"webp": [{"width": 320, "height": 240, "name": "news/renditions/a-jpg-320w.webp"}, ...]}}
+
+``srcset()`` turns that into what a ``<picture>`` element needs, and
+``preview_url()`` picks the smallest copy for admin thumbnails.
+"""
+import logging
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from . import cache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WIDTHS = (320, 640, 960, 1280, 1920)
+DIRECTORY = "renditions"
+SUFFIX = "_renditions"
+
+# format -> (mime type, Pillow save options); listed from most to least preferred.
+FORMATS = {
+    "avif": ("image/avif", {"quality": 55, "speed": 6}),
+    "webp": ("image/webp", {"quality": 80, "method": 4}),
+}
+
+# model label -> image fields that get renditions.
+IMAGE_FIELDS = {
+    "content.news": ("image",),
+    "content.newsimage": ("image",),
+    "content.galleryimage": ("image",),
+    "content.heroslide": ("image",),
+    "content.album": ("cover",),
+    "content.librarypublicationentry": ("cover",),
+}
+
+
+def get_widths() -> tuple:
+    return tuple(sorted(getattr(settings, "CONTENT_IMAGE_WIDTHS", DEFAULT_WIDTHS)))
+
+
+def get_formats() -> list:
+    Image.init()
+    return [fmt for fmt in FORMATS if fmt.upper() in Image.SAVE]
+
+
+def renditions_name(field: str) -> str:
+    return f"{field}{SUFFIX}"
+
+
+def image_fields(model) -> tuple:
+    return IMAGE_FIELDS.get(model._meta.label_lower, ())
+
+
+def target_widths(width: int) -> list:
+    """Configured widths below ``width``, plus the image itself capped at the largest step."""
+    widths = get_widths()
+    steps = [step for step in widths if step < width]
+    return steps + [min(width, widths[-1])]
+
+
+def _variant_name(source: str, width: int, fmt: str) -> str:
+    directory, filename = os.path.split(source)
+    stem, extension = os.path.splitext(filename)
+    # The source extension keeps a.jpg and a.png in one folder from sharing renditions.
+    if extension:
+        stem = f"{stem}-{extension[1:].lower()}"
+    return os.path.join(directory, DIRECTORY, f"{stem}-{width}w.{fmt}")
+
+
+def generate(field_file) -> dict:
+    """Write every rendition of ``field_file`` to its storage and return the description."""
+    storage = field_file.storage
+    with field_file.open("rb") as handle:
+        image = Image.open(handle)
+        image = ImageOps.exif_transpose(image)
+        image.load()
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "transparency" in image.info or image.mode in ("LA", "PA") else "RGB")
+
+    width, height = image.size
+    variants = {}
+    for fmt in get_formats():
+        options = FORMATS[fmt][1]
+        for step in target_widths(width):
+            size = (step, max(1, round(height * step / width)))
+            resized = image if size == image.size else image.resize(size, Image.Resampling.LANCZOS, reducing_gap=3.0)
+            buffer = BytesIO()
+            resized.save(buffer, format=fmt.upper(), **options)
+            name = _variant_name(field_file.name, step, fmt)
+            if storage.exists(name):
+                storage.delete(name)
+            name = storage.save(name, ContentFile(buffer.getvalue()))
+            variants.setdefault(fmt, []).append({"width": size[0], "height": size[1], "name": name})
+    return {"source": field_file.name, "width": width, "height": height, "variants": variants}
+
+
+def variant_names(data) -> set:
+    return {variant["name"] for variants in (data or {}).get("variants", {}).values() for variant in variants}
+
+
+def delete_files(storage, data, keep=()) -> None:
+    """Delete the variants described by ``data``, except the names in ``keep``."""
+    for name in variant_names(data) - set(keep):
+        storage.delete(name)
+
+
+def is_stale(instance) -> bool:
+    """Whether any image field of ``instance`` changed since its renditions were built."""
+    for field in image_fields(type(instance)):
+        field_file = getattr(instance, field)
+        data = getattr(instance, renditions_name(field)) or {}
+        if data.get("source", "") != (field_file.name if field_file else ""):
+            return True
+    return False
+
+
+def refresh(instance, force=False) -> bool:
+    """Bring the renditions of ``instance`` in line with its image fields.
+
+    Returns ``True`` when anything was written. The new descriptions are saved
+    with ``update()`` so no further post_save fires; ``updated_at`` and the
+    model's cache version are moved by hand so cached responses and validators
+    pick the renditions up.
+    """
+    model = type(instance)
+    changes = {}
+    for field in image_fields(model):
+        field_file = getattr(instance, field)
+        column = renditions_name(field)
+        current = getattr(instance, column) or {}
+        source = field_file.name if field_file else ""
+        if not force and current.get("source", "") == source:
+            continue
+        data = {}
+        if source:
+            try:
+                data = generate(field_file)
+            except (OSError, ValueError, Image.DecompressionBombError):
+                logger.warning("Could not build renditions for %s %s.%s", model._meta.label, instance.pk, field, exc_info=True)
+                data = {"source": source, "variants": {}}
+        # A rebuild writes to the same names; only the ones no longer used go.
+        delete_files(field_file.storage, current, keep=variant_names(data))
+        setattr(instance, column, data)
+        changes[column] = data
+    if not changes:
+        return False
+    model._default_manager.filter(pk=instance.pk).update(updated_at=timezone.now(), **changes)
+    cache.bump_model_version(model)
+    return True
+
+
+def srcset(data, build_url) -> dict:
+    """``<picture>``-ready view of a renditions description, or ``None`` if there is none.
+
+    ``build_url`` maps a storage name to the URL that should be emitted.
+    """
+    variants = (data or {}).get("variants")
+    if not variants:
+        return None
+    sources = [
+        {
+            "type": FORMATS[fmt][0],
+            "srcset": ", ".join(f"{build_url(variant['name'])} {variant['width']}w" for variant in variants[fmt]),
+        }
+        for fmt in FORMATS
+        if variants.get(fmt)
+    ]
+    return {"width": data["width"], "height": data["height"], "sources": sources}
+
+
+def preview_url(instance, field: str) -> str:
+    """URL of the smallest stored copy of ``field``, falling back to the original."""
+    field_file = getattr(instance, field)
+    if not field_file:
+        return ""
+    data = getattr(instance, renditions_name(field), None) or {}
+    if data.get("source") == field_file.name:
+        for fmt in reversed(FORMATS):
+            variants = data.get("variants", {}).get(fmt)
+            if variants:
+                return field_file.storage.url(variants[0]["name"])
+    return field_file.url
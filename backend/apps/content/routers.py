@@ -0,0 +1,53 @@
+"""Database routing: anonymous submissions live in their own SQLite file.
+
+Contact messages and newsletter subscriptions are written by anyone, at any
+rate. SQLite has one write lock per file, so they are kept in the
+``submissions`` database, where a burst of form posts cannot hold up admin
+edits, background jobs or cache rebuilds on the content database.
+
+``ROUTES`` maps model labels to database aliases; write-heavy bookkeeping
+(counters, logs, the API throttle's buckets) belongs there too. A model
+whose alias is not in ``settings.DATABASES`` stays on ``default``, so a
+single-database setup (tests, development) keeps working unchanged.
+
+``manage.py migrate --database submissions`` creates the routed tables; the
+other migrations, including raw SQL and data migrations, only run on
+``default``. ``manage.py move_submissions`` copies rows written before the
+split.
+"""
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+ROUTES = {
+    "content.contactmessage": "submissions",
+    "content.newslettersubscription": "submissions",
+    "content.throttlebucket": "submissions",
+}
+
+
+def alias_for(label) -> str:
+    alias = ROUTES.get(label.lower(), DEFAULT_DB_ALIAS)
+    return alias if alias in settings.DATABASES else DEFAULT_DB_ALIAS
+
+
+def routed_aliases() -> set:
+    return {alias for alias in ROUTES.values() if alias in settings.DATABASES} - {DEFAULT_DB_ALIAS}
+
+
+class SubmissionsRouter:
+    def db_for_read(self, model, **hints):
+        return alias_for(model._meta.label)
+
+    def db_for_write(self, model, **hints):
+        return alias_for(model._meta.label)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if alias_for(obj1._meta.label) != alias_for(obj2._meta.label):
+            return False
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if model_name is None:
+            # RunSQL/RunPython without a model hint: content database only.
+            return db not in routed_aliases()
+        return alias_for(f"{app_label}.{model_name}") == db
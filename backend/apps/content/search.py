@@ -0,0 +1,215 @@
+"""SQLite FTS5 full-text search for books, publications, news and notices.
+
+One FTS5 table, ``content_search``, indexes the English and Sinhala text of
+every indexed row, including the text extracted from book and publication
+PDFs (see ``documents.py``). Its rowid encodes the source row as
+``id * ROWID_STRIDE + doc_type`` so triggers can replace a row's entry by
+rowid. Queries are ranked with bm25, title columns weighted above body text,
+and can return a highlighted snippet. On databases without the table (or
+without FTS5) everything falls back to the regular ``icontains`` search.
+
+The tokenizer keeps combining marks and zero-width joiners inside tokens
+(``categories 'L* N* Co M* Cf'``); by default it splits on them, which cuts
+Sinhala words into single consonants.
+
+SQLite rebuilds a table for most column changes, which drops its triggers;
+``ensure_triggers()`` runs after every ``migrate`` and reinstalls them.
+"""
+import re
+
+from django.apps import apps
+from django.db import connections
+from django.db.models.expressions import RawSQL
+from rest_framework.filters import SearchFilter
+
+TABLE = "content_search"
+ROWID_STRIDE = 4
+TITLE_WEIGHT = 10.0
+BODY_WEIGHT = 1.0
+
+# label -> (doc_type, title, title_si, body, body_si) as SQL over the source table.
+INDEX_SOURCES = {
+    "content.publication": (
+        0, "title", "title_si",
+        "description || ' ' || department || ' ' || document_text", "description_si || ' ' || department_si",
+    ),
+    "content.news": (
+        1, "title", "title_si", "excerpt || ' ' || content", "excerpt_si || ' ' || content_si",
+    ),
+    "content.notice": (
+        2, "title", "title_si", "content", "content_si",
+    ),
+    "content.librarypublicationentry": (
+        3, "title || ' ' || subtitle", "title_si || ' ' || subtitle_si",
+        "authors || ' ' || description || ' ' || document_text", "authors_si || ' ' || description_si",
+    ),
+}
+TRIGGERS = ("ai", "ad", "au")
+
+_available = {}
+
+
+def is_available(using="default") -> bool:
+    if using not in _available:
+        connection = connections[using]
+        if connection.vendor != "sqlite":
+            _available[using] = False
+        else:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [TABLE])
+                _available[using] = cursor.fetchone() is not None
+    return _available[using]
+
+
+def is_indexed(model) -> bool:
+    return model._meta.label_lower in INDEX_SOURCES
+
+
+def match_expression(terms) -> str:
+    """Quote each term as an FTS5 prefix query; terms are ANDed."""
+    return " ".join('"{}"*'.format(term.replace('"', '""')) for term in terms if term)
+
+
+def _rowid_sql(model) -> str:
+    doc_type = INDEX_SOURCES[model._meta.label_lower][0]
+    return f'"{model._meta.db_table}"."{model._meta.pk.column}" * {ROWID_STRIDE} + {doc_type}'
+
+
+def matching_ids(model, match: str) -> RawSQL:
+    doc_type = INDEX_SOURCES[model._meta.label_lower][0]
+    return RawSQL(
+        f"SELECT rowid / {ROWID_STRIDE} FROM {TABLE} WHERE {TABLE} MATCH %s AND rowid %% {ROWID_STRIDE} = {doc_type}",
+        (match,),
+    )
+
+
+def search(queryset, terms, ranked=True):
+    """Restrict ``queryset`` to rows matching ``terms``.
+
+    With ``ranked`` the rows also get ``search_rank`` (lower is better) and a
+    ``search_snippet`` with the matches wrapped in ``<mark>``.
+    """
+    model = queryset.model
+    match = match_expression(terms)
+    if not match:
+        return queryset
+    queryset = queryset.filter(pk__in=matching_ids(model, match))
+    if not ranked:
+        return queryset
+    row = f"FROM {TABLE} WHERE {TABLE} MATCH %s AND rowid = {_rowid_sql(model)}"
+    return queryset.annotate(
+        search_rank=RawSQL(
+            f"SELECT bm25({TABLE}, {TITLE_WEIGHT}, {TITLE_WEIGHT}, {BODY_WEIGHT}, {BODY_WEIGHT}) {row}", (match,)
+        ),
+        search_snippet=RawSQL(f"SELECT snippet({TABLE}, -1, '<mark>', '</mark>', '…', 16) {row}", (match,)),
+    )
+
+
+def rebuild(using="default") -> int:
+    """Repopulate the index from the source tables; returns the number of rows indexed."""
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLE}")
+        total = 0
+        for label, (doc_type, title, title_si, body, body_si) in INDEX_SOURCES.items():
+            table = apps.get_model(label)._meta.db_table
+            cursor.execute(
+                f"INSERT INTO {TABLE} (rowid, title, title_si, body, body_si) "
+                f"SELECT id * {ROWID_STRIDE} + {doc_type}, {title}, {title_si}, {body}, {body_si} FROM {table}"
+            )
+            total += cursor.rowcount
+        cursor.execute(f"INSERT INTO {TABLE} ({TABLE}) VALUES ('optimize')")
+    return total
+
+
+def _columns(expressions) -> list:
+    names = set()
+    for expression in expressions:
+        names.update(re.findall(r"[a-z_]+", re.sub(r"'[^']*'", "", expression)))
+    return sorted(names)
+
+
+def trigger_statements(label) -> list:
+    """SQL (re)creating the insert/delete/update triggers that keep ``label`` indexed.
+
+    The new entry is selected from the source table itself, so the
+    ``INDEX_SOURCES`` expressions are used as they are; updates only
+    re-index when an indexed column changed.
+    """
+    doc_type, title, title_si, body, body_si = INDEX_SOURCES[label]
+    table = apps.get_model(label)._meta.db_table
+    insert = (
+        f"INSERT INTO {TABLE} (rowid, title, title_si, body, body_si) "
+        f"SELECT id * {ROWID_STRIDE} + {doc_type}, {title}, {title_si}, {body}, {body_si} FROM {table} WHERE id = new.id;"
+    )
+    delete = f"DELETE FROM {TABLE} WHERE rowid = old.id * {ROWID_STRIDE} + {doc_type};"
+    columns = ", ".join(_columns((title, title_si, body, body_si)))
+    return [
+        *(f"DROP TRIGGER IF EXISTS {table}_search_{suffix}" for suffix in TRIGGERS),
+        f"CREATE TRIGGER {table}_search_ai AFTER INSERT ON {table} BEGIN {insert} END",
+        f"CREATE TRIGGER {table}_search_ad AFTER DELETE ON {table} BEGIN {delete} END",
+        f"CREATE TRIGGER {table}_search_au AFTER UPDATE OF {columns} ON {table} BEGIN {delete} {insert} END",
+    ]
+
+
+def missing_triggers(using="default") -> list:
+    """Labels of indexed models with a trigger missing, if the index exists at all."""
+    connection = connections[using]
+    if connection.vendor != "sqlite":
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT type, name FROM sqlite_master WHERE type IN ('table', 'trigger')")
+        names = {name for _, name in cursor.fetchall()}
+    if TABLE not in names:
+        return []
+    missing = []
+    for label, (_, *expressions) in INDEX_SOURCES.items():
+        table = apps.get_model(label)._meta.db_table
+        with connection.cursor() as cursor:
+            existing = {column.name for column in connection.introspection.get_table_description(cursor, table)}
+        if not set(_columns(expressions)) <= existing:
+            # Part-way through the migration history; the migrations own the triggers there.
+            return []
+        if any(f"{table}_search_{suffix}" not in names for suffix in TRIGGERS):
+            missing.append(label)
+    return missing
+
+
+def ensure_triggers(using="default") -> bool:
+    """Reinstall missing triggers and rebuild the index; returns whether anything was done."""
+    missing = missing_triggers(using)
+    if not missing:
+        return False
+    with connections[using].cursor() as cursor:
+        for label in missing:
+            for statement in trigger_statements(label):
+                cursor.execute(statement)
+    rebuild(using)
+    return True
+
+
+class FullTextSearchFilter(SearchFilter):
+    """``?search=`` backed by the FTS5 index, ordered by relevance.
+
+    An explicit ``?ordering=`` still wins over relevance. Views on models that
+    are not indexed, or databases without the index, use ``search_fields``.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms or not is_indexed(queryset.model) or not is_available(queryset.db):
+            return super().filter_queryset(request, queryset, view)
+        queryset = search(queryset, terms)
+        if "ordering" not in request.query_params:
+            queryset = queryset.order_by("search_rank")
+        return queryset
+
+
+class FullTextSearchAdminMixin:
+    """Admin changelist search through the FTS5 index instead of OR-ed LIKE scans."""
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term or not is_indexed(queryset.model) or not is_available(queryset.db):
+            return super().get_search_results(request, queryset, search_term)
+        terms = search_term.replace(",", " ").split()
+        return search(queryset, terms, ranked=False), False
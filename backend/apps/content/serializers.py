@@ -1,13 +1,167 @@
-﻿from rest_framework import serializers
-from . import models
+﻿from django.core.exceptions import FieldDoesNotExist
+from django.core.files.storage import default_storage
+from django.db.models import Prefetch
+from rest_framework import serializers
+from rest_framework.reverse import reverse
+from . import documents, i18n, models, renditions, shelves
+
+
+class FieldSelection:
+    """The ``?fields=`` / ``?expand=`` selection of a read request.
+
+    ``fields`` limits the top-level keys. Nested serializers named in
+    ``Meta.expandable_fields`` are embedded when listed in ``expand`` or
+    ``fields``; with neither parameter everything is returned as before.
+    """
+
+    def __init__(self, fields=None, expand=None):
+        self.fields = fields
+        self.expand = expand
+
+    @classmethod
+    def from_query_params(cls, params):
+        def parse(name):
+            if name not in params:
+                return None
+            return {part.strip() for part in params[name].split(",") if part.strip()}
+
+        selection = cls(parse("fields"), parse("expand"))
+        return selection if selection.fields is not None or selection.expand is not None else None
+
+    def wants(self, name, expandable=False):
+        if self.fields is not None and name in self.fields:
+            return True
+        if expandable and self.expand is not None:
+            return name in self.expand
+        return self.fields is None
+
+    def columns(self, model, meta):
+        """Model columns the selected fields read, or ``None`` if that cannot be determined."""
+        if self.fields is None:
+            return None
+        dependencies = getattr(meta, "field_dependencies", {})
+        expandable = getattr(meta, "expandable_fields", {})
+        columns = set()
+        for name in self.fields | set(expandable):
+            if name in expandable and not self.wants(name, expandable=True):
+                continue
+            if name in dependencies:
+                columns.update(dependencies[name])
+                continue
+            try:
+                field = model._meta.get_field(name)
+            except FieldDoesNotExist:
+                if name in self.fields:
+                    return None
+                continue
+            if field.concrete:
+                columns.add(name)
+        return columns
+
+
+class LocalizedField(serializers.Field):
+    """Read-only value of a translated field in the request's language."""
+
+    def __init__(self, field_name, **kwargs):
+        self.translated_field = field_name
+        kwargs["source"] = "*"
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, obj):
+        return i18n.localize(obj, self.translated_field, self.context["lang"])
+
+
+class RenditionsField(serializers.JSONField):
+    """Read-only ``srcset`` view of an image's ``<field>_renditions`` column."""
+
+    def __init__(self, **kwargs):
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        return srcset_representation(value, self.context.get("request"))
+
+
+class DownloadHrefField(serializers.Field):
+    """Where a download button should point: the item's counted ``download`` action.
+
+    Empty when the item has neither an external URL nor a stored file.
+    """
+
+    def __init__(self, basename, file_field, **kwargs):
+        self.basename = basename
+        self.file_field = file_field
+        kwargs["source"] = "*"
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, obj):
+        if not obj.external_url and not getattr(obj, self.file_field):
+            return ""
+        return reverse(f"{self.basename}-download", args=[obj.pk], request=self.context.get("request"))
+
+
+class DocumentField(serializers.Field):
+    """``size``, ``pages`` and ``sha256`` of the item's document file, once ingested."""
+
+    def __init__(self, file_field, **kwargs):
+        self.file_field = file_field
+        kwargs["source"] = "*"
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, obj):
+        return documents.metadata(obj.document, getattr(obj, self.file_field))
+
+
+def srcset_representation(data, request=None):
+    def build_url(name):
+        url = default_storage.url(name)
+        return request.build_absolute_uri(url) if request is not None else url
+
+    return renditions.srcset(data, build_url)
+
+
+class SparseFieldsSerializerMixin:
+    """Apply the context's ``field_selection`` to the top-level serializer only."""
+
+    def get_fields(self):
+        fields = super().get_fields()
+        selection = self.context.get("field_selection")
+        parent = self.parent.parent if isinstance(self.parent, serializers.ListSerializer) else self.parent
+        if selection is None or parent is not None:
+            return fields
+        unknown = sorted((selection.fields or set()) - set(fields))
+        if unknown:
+            raise serializers.ValidationError({"fields": [f"Unknown field: {name}." for name in unknown]})
+        expandable = getattr(self.Meta, "expandable_fields", {})
+        return {name: field for name, field in fields.items() if selection.wants(name, name in expandable)}
 
 
-class NewsImageSerializer(serializers.ModelSerializer):
+class LocalizedSerializerMixin:
+    """Collapse ``x``/``x_si`` pairs into one ``x`` when the context carries ``lang``."""
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if not self.context.get("lang"):
+            return fields
+        for name in list(fields):
+            if f"{name}{i18n.SUFFIX}" in fields:
+                fields.pop(f"{name}{i18n.SUFFIX}")
+                fields[name] = LocalizedField(name)
+        return fields
+
+
+class NewsImageSerializer(SparseFieldsSerializerMixin, LocalizedSerializerMixin, serializers.ModelSerializer):
+    image_renditions = RenditionsField()
+
     class Meta:
         model = models.NewsImage
         fields = [
             "id",
             "image",
+            "image_renditions",
             "caption",
             "caption_si",
             "position",
@@ -16,8 +170,10 @@ class NewsImageSerializer(serializers.ModelSerializer):
         ]
 
 
-class NewsSerializer(serializers.ModelSerializer):
+class NewsSerializer(SparseFieldsSerializerMixin, LocalizedSerializerMixin, serializers.ModelSerializer):
+    image_renditions = RenditionsField()
     gallery_images = NewsImageSerializer(many=True, read_only=True)
+    search_snippet = serializers.CharField(read_only=True, required=False)
 
     class Meta:
         model = models.News
@@ -27,6 +183,7 @@ class NewsSerializer(serializers.ModelSerializer):
             "title_si",
             "slug",
             "image",
+            "image_renditions",
             "excerpt",
             "excerpt_si",
             "content",
@@ -36,10 +193,13 @@ class NewsSerializer(serializers.ModelSerializer):
             "created_at",
             "updated_at",
             "gallery_images",
+            "search_snippet",
         ]
+        expandable_fields = {"gallery_images": "gallery_images"}
+        field_dependencies = {"search_snippet": ()}
 
 
-class NoticeImageSerializer(serializers.ModelSerializer):
+class NoticeImageSerializer(SparseFieldsSerializerMixin, LocalizedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = models.NoticeImage
         fields = [
@@ -53,8 +213,9 @@ class NoticeImageSerializer(serializers.ModelSerializer):
         ]
 
 
-class NoticeSerializer(serializers.ModelSerializer):
+class NoticeSerializer(SparseFieldsSerializerMixin, LocalizedSerializerMixin, serializers.ModelSerializer):
     gallery_images = NoticeImageSerializer(many=True, read_only=True)
+    search_snippet = serializers.CharField(read_only=True, required=False)
 
     class Meta:
         model = models.Notice
@@ -71,17 +232,29 @@ class NoticeSerializer(serializers.ModelSerializer):
             "created_at",
             "updated_at",
             "gallery_images",
+            "search_snippet",
         ]
+        expandable_fields = {"gallery_images": "gallery_images"}
+        field_dependencies = {"search_snippet": ()}
 
 
-class PublicationSerializer(serializers.ModelSerializer):
+class PublicationSerializer(SparseFieldsSerializerMixin, LocalizedSerializerMixin, serializers.ModelSerializer):
+    download_href = DownloadHrefField("publications", "file")
+    document = DocumentField("file")
+    search_snippet = serializers.CharField(read_only=True, required=False)
+
     class Meta:
         model = models.Publication
-        fields = "__all__"
+        # Counts are flushed without touching cache versions, so they stay out of the payload.
+        exclude = ["download_count", "document_text"]
+        field_dependencies = {
+            "download_href": ("external_url", "file"), "document": ("document", "file"), "search_snippet": (),
+        }
 
 
-class DownloadCategorySerializer(serializers.ModelSerializer):
+class DownloadCategorySerializer(SparseFieldsSerializerMixin, LocalizedSerializerMixin, serializers.ModelSerializer):
     publications = PublicationSerializer(many=True, read_only=True)
+    archive_href = serializers.SerializerMethodField()
 
     class Meta:
         model = models.DownloadCategory
@@ -93,10 +266,36 @@ class DownloadCategorySerializer(serializers.ModelSerializer):
             "created_at",
             "updated_at",
             "publications",
+            "archive_href",
         ]
+        expandable_fields = {
+            "publications": Prefetch(
+                "publications",
+                queryset=models.Publication.objects.filter(is_active=True).order_by("-published_at", "-created_at"),
+            ),
+        }
+        field_dependencies = {"archive_href": ()}
+
+    def get_archive_href(self, obj):
+        """The category's files as one ZIP; ``?year=``/``?department=`` narrow it."""
+        return reverse("download-categories-archive", args=[obj.pk], request=self.context.get("request"))
 
 
-class VideoSerializer(serializers.ModelSerializer):
+class DownloadCategoryShelfSerializer(DownloadCategorySerializer):
+    """A category with only its newest publications (``?top=N``)."""
+    publications = PublicationSerializer(source=shelves.SHELF_ATTR, many=True, read_only=True)
+    publications_total = serializers.SerializerMethodField()
+
+    class Meta(DownloadCategorySerializer.Meta):
+        fields = DownloadCategorySerializer.Meta.fields + ["publications_total"]
+        expandable_fields = {}
+        field_dependencies = {"publications": (), "publications_total": (), "archive_href": ()}
+
+    def get_publications_total(self, obj):
+        return shelves.shelf_total(obj)
+
+
+class VideoSerializer(SparseFieldsSerializerMixin, LocalizedSerializerMixin, serializers.ModelSerializer):
     playback_url = serializers.SerializerMethodField()
 
     class Meta:
@@ -104,48 +303,94 @@ class VideoSerializer(serializers.ModelSerializer):
         fields = "__all__"   # includes file, url, thumbnail, etc.
         # Or list explicitly:
         # fields = ["id","title","file","url","thumbnail","description","published_at","created_at","updated_at","playback_url"]
+        field_dependencies = {"playback_url": ("url", "file")}
 
     def get_playback_url(self, obj):
         # Return relative path for uploaded files (frontend uses mediaUrl to make it absolute)
         return obj.url or (obj.file.url if obj.file else "")
 
 
-class GalleryImageSerializer(serializers.ModelSerializer):
+class GalleryImageSerializer(SparseFieldsSerializerMixin, LocalizedSerializerMixin, serializers.ModelSerializer):
+    image_renditions = RenditionsField()
+
     class Meta:
         model = models.GalleryImage
-        fields = ["id", "image", "caption", "caption_si", "position", "created_at", "updated_at"]
+        fields = ["id", "image", "image_renditions", "caption", "caption_si", "position", "created_at", "updated_at"]
 
-class AlbumSerializer(serializers.ModelSerializer):
-    images = GalleryImageSerializer(many=True, read_only=True)
+class GalleryImagePreviewSerializer(SparseFieldsSerializerMixin, LocalizedSerializerMixin, serializers.ModelSerializer):
+    image_renditions = RenditionsField()
+
+    class Meta:
+        model = models.GalleryImage
+        fields = ["id", "image", "image_renditions", "caption", "caption_si"]
+
+
+class AlbumSerializer(SparseFieldsSerializerMixin, LocalizedSerializerMixin, serializers.ModelSerializer):
+    """Album card: counts and a few previews; the images are paged via ``/albums/{slug}/images/``."""
+    cover_renditions = RenditionsField()
+    # Annotated and prefetched by AlbumViewSet.get_queryset().
+    image_count = serializers.IntegerField(read_only=True, required=False)
+    preview_images = GalleryImagePreviewSerializer(many=True, read_only=True, required=False)
+    cover_image = serializers.SerializerMethodField()
+    cover_image_renditions = serializers.SerializerMethodField()
 
     class Meta:
         model = models.Album
         fields = [
-            "id", "title", "title_si", "slug", "description", "description_si", "cover",
+            "id", "title", "title_si", "slug", "description", "description_si", "cover", "cover_renditions",
+            "cover_image", "cover_image_renditions", "image_count", "preview_images",
             "is_active", "position", "published_at",
-            "images", "created_at", "updated_at",
+            "created_at", "updated_at",
         ]
-
-
-class EventSerializer(serializers.ModelSerializer):
+        field_dependencies = {
+            "image_count": (),
+            "preview_images": (),
+            "cover_image": ("cover",),
+            "cover_image_renditions": ("cover", "cover_renditions"),
+        }
+
+    def _cover_source(self, obj):
+        """``(file, renditions)`` of the cover, or of the first image when no cover is set."""
+        if obj.cover:
+            return obj.cover, obj.cover_renditions
+        previews = getattr(obj, "preview_images", None) or []
+        if previews:
+            return previews[0].image, previews[0].image_renditions
+        return None, None
+
+    def get_cover_image(self, obj):
+        image, _ = self._cover_source(obj)
+        if not image:
+            return None
+        request = self.context.get("request")
+        return request.build_absolute_uri(image.url) if request is not None else image.url
+
+    def get_cover_image_renditions(self, obj):
+        _, data = self._cover_source(obj)
+        return srcset_representation(data, self.context.get("request"))
+
+
+class EventSerializer(SparseFieldsSerializerMixin, LocalizedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = models.Event
         fields = "__all__"
 
 
-class StatSerializer(serializers.ModelSerializer):
+class StatSerializer(SparseFieldsSerializerMixin, LocalizedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = models.Stat
         fields = "__all__"
 
 
-class ExternalLinkSerializer(serializers.ModelSerializer):
+class ExternalLinkSerializer(SparseFieldsSerializerMixin, LocalizedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = models.ExternalLink
         fields = "__all__"
 
 
-class HeroSlideSerializer(serializers.ModelSerializer):
+class HeroSlideSerializer(SparseFieldsSerializerMixin, LocalizedSerializerMixin, serializers.ModelSerializer):
+    image_renditions = RenditionsField()
+
     class Meta:
         model = models.HeroSlide
         fields = "__all__"
@@ -154,7 +399,7 @@ class HeroSlideSerializer(serializers.ModelSerializer):
 class NewsletterSubscriptionSerializer(serializers.ModelSerializer):
     class Meta:
         model = models.NewsletterSubscription
-        fields = "__all__"
+        exclude = ["journal_key"]
 
 
 class ContactMessageSerializer(serializers.ModelSerializer):
@@ -163,31 +408,31 @@ class ContactMessageSerializer(serializers.ModelSerializer):
         fields = ["id", "name", "email", "subject", "message", "created_at"]
 
 
-class ContactInfoSerializer(serializers.ModelSerializer):
+class ContactInfoSerializer(SparseFieldsSerializerMixin, LocalizedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = models.ContactInfo
         fields = "__all__"
 
 
-class FooterAboutSerializer(serializers.ModelSerializer):
+class FooterAboutSerializer(SparseFieldsSerializerMixin, LocalizedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = models.FooterAbout
         fields = "__all__"
 
 
-class FooterLinkSerializer(serializers.ModelSerializer):
+class FooterLinkSerializer(SparseFieldsSerializerMixin, LocalizedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = models.FooterLink
         fields = "__all__"
 
 
-class HeroIntroSerializer(serializers.ModelSerializer):
+class HeroIntroSerializer(SparseFieldsSerializerMixin, LocalizedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = models.HeroIntro
         fields = "__all__"
 
 
-class AboutSectionSerializer(serializers.ModelSerializer):
+class AboutSectionSerializer(SparseFieldsSerializerMixin, LocalizedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = models.AboutSection
         fields = [
@@ -196,7 +441,7 @@ class AboutSectionSerializer(serializers.ModelSerializer):
         ]
 
 
-class SiteTextSnippetSerializer(serializers.ModelSerializer):
+class SiteTextSnippetSerializer(SparseFieldsSerializerMixin, LocalizedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = models.SiteTextSnippet
         fields = [
@@ -205,19 +450,20 @@ class SiteTextSnippetSerializer(serializers.ModelSerializer):
         ]
 
 
-class LibraryPublicationImageSerializer(serializers.ModelSerializer):
+class LibraryPublicationImageSerializer(SparseFieldsSerializerMixin, LocalizedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = models.LibraryPublicationImage
         fields = ["id", "image", "caption", "caption_si", "created_at", "updated_at"]
 
 
-class LibraryPublicationCategoryMiniSerializer(serializers.ModelSerializer):
+class LibraryPublicationCategoryMiniSerializer(SparseFieldsSerializerMixin, LocalizedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = models.LibraryPublicationCategory
         fields = ["id", "name", "name_si", "slug"]
 
 
-class LibraryPublicationEntrySerializer(serializers.ModelSerializer):
+class LibraryPublicationEntrySerializer(SparseFieldsSerializerMixin, LocalizedSerializerMixin, serializers.ModelSerializer):
+    cover_renditions = RenditionsField()
     category = LibraryPublicationCategoryMiniSerializer(read_only=True)
     category_id = serializers.PrimaryKeyRelatedField(
         queryset=models.LibraryPublicationCategory.objects.all(),
@@ -227,7 +473,9 @@ class LibraryPublicationEntrySerializer(serializers.ModelSerializer):
         allow_null=True,
     )
     images = LibraryPublicationImageSerializer(many=True, read_only=True)
-    download_href = serializers.ReadOnlyField()
+    download_href = DownloadHrefField("books", "pdf_file")
+    document = DocumentField("pdf_file")
+    search_snippet = serializers.CharField(read_only=True, required=False)
 
     class Meta:
         model = models.LibraryPublicationEntry
@@ -235,15 +483,21 @@ class LibraryPublicationEntrySerializer(serializers.ModelSerializer):
             "id",
             "category", "category_id",
             "title", "title_si", "subtitle", "subtitle_si", "authors", "authors_si", "year", "description", "description_si",
-            "cover", "pdf_file", "external_url", "download_href",
+            "cover", "cover_renditions", "pdf_file", "external_url", "download_href", "document",
             "published_at", "is_active", "is_featured",
             "images",
             "created_at", "updated_at",
+            "search_snippet",
         ]
+        expandable_fields = {"category": "category", "images": "images"}
+        field_dependencies = {
+            "download_href": ("external_url", "pdf_file"), "document": ("document", "pdf_file"), "search_snippet": (),
+        }
 
 
-class LibraryPublicationCategorySerializer(serializers.ModelSerializer):
-    publications_count = serializers.IntegerField(source="publications.count", read_only=True)
+class LibraryPublicationCategorySerializer(SparseFieldsSerializerMixin, LocalizedSerializerMixin, serializers.ModelSerializer):
+    # Annotated by LibraryPublicationCategoryViewSet.get_queryset().
+    publications_count = serializers.IntegerField(read_only=True, required=False)
 
     class Meta:
         model = models.LibraryPublicationCategory
@@ -257,4 +511,17 @@ class LibraryPublicationCategorySerializer(serializers.ModelSerializer):
             "updated_at",
             "publications_count",
         ]
+        field_dependencies = {"publications_count": ()}
+
+
+class LibraryPublicationCategoryShelfSerializer(LibraryPublicationCategorySerializer):
+    """A book category with only its newest books (``?top=N``)."""
+    publications = LibraryPublicationEntrySerializer(source=shelves.SHELF_ATTR, many=True, read_only=True)
+    publications_total = serializers.SerializerMethodField()
+
+    class Meta(LibraryPublicationCategorySerializer.Meta):
+        fields = LibraryPublicationCategorySerializer.Meta.fields + ["publications", "publications_total"]
+        field_dependencies = {"publications_count": (), "publications": (), "publications_total": ()}
 
+    def get_publications_total(self, obj):
+        return shelves.shelf_total(obj)
@@ -0,0 +1,89 @@
+"""Category "shelves": each category with only its newest N items.
+
+``?top=N`` on a category endpoint prefetches the items of every category on
+the page with one windowed query: ``ROW_NUMBER()`` over the category keeps
+the first N rows per category and a ``COUNT(*)`` over the same partition
+carries the category's total, so the response stays bounded however many
+files a category holds. The rest is paged through the per-category items
+action.
+"""
+from django.db.models import Count, F, Prefetch, Window
+from django.db.models.functions import RowNumber
+from rest_framework.response import Response
+
+from . import i18n
+
+SHELF_ATTR = "shelf"
+
+
+def top_per_group(queryset, partition: str, ordering, limit: int):
+    """The first ``limit`` rows of ``queryset`` per ``partition`` value, in ``ordering``.
+
+    Each row carries ``shelf_rank`` (1-based) and ``shelf_total`` (rows in
+    its partition before the limit).
+    """
+    return queryset.annotate(
+        shelf_rank=Window(RowNumber(), partition_by=F(partition), order_by=list(ordering)),
+        shelf_total=Window(Count("pk"), partition_by=F(partition)),
+    ).filter(shelf_rank__lte=limit).order_by(partition, "shelf_rank")
+
+
+def shelf_total(obj) -> int:
+    shelf = getattr(obj, SHELF_ATTR, None) or []
+    return shelf[0].shelf_total if shelf else 0
+
+
+class ShelfMixin:
+    """``?top=N`` shelves and a paginated ``items`` endpoint for a category viewset.
+
+    Subclasses name the reverse relation (``shelf_relation``), the foreign key
+    on the item model (``shelf_partition``), how items are ordered and which
+    serializers render the shelf and the item pages.
+    """
+    shelf_relation = None
+    shelf_partition = None
+    shelf_ordering = ()
+    shelf_serializer_class = None
+    shelf_item_serializer_class = None
+    top_query_param = "top"
+    max_top = 20
+
+    def get_shelf_size(self):
+        if self.request is None or self.action != "list":
+            return None
+        try:
+            size = int(self.request.query_params[self.top_query_param])
+        except (KeyError, ValueError):
+            return None
+        return min(max(size, 1), self.max_top)
+
+    def get_shelf_item_queryset(self):
+        raise NotImplementedError
+
+    def get_serializer_class(self):
+        if self.get_shelf_size():
+            return self.shelf_serializer_class
+        return super().get_serializer_class()
+
+    def get_queryset(self):
+        qs = super().get_queryset()
+        size = self.get_shelf_size()
+        if size:
+            items = top_per_group(self.get_shelf_item_queryset(), self.shelf_partition, self.shelf_ordering, size)
+            qs = qs.prefetch_related(Prefetch(self.shelf_relation, queryset=items, to_attr=SHELF_ATTR))
+        return qs
+
+    def category_items(self, request, *args, **kwargs):
+        """Paginated items of one category, for "show more" on a shelf."""
+        category = self.get_object()
+        items = self.get_shelf_item_queryset().filter(**{self.shelf_partition: category.pk})
+        items = items.order_by(*self.shelf_ordering)
+        lang = self.get_language() if hasattr(self, "get_language") else None
+        if lang:
+            items = i18n.project_queryset(items, lang)
+        context = self.get_serializer_context()
+        page = self.paginate_queryset(items)
+        if page is not None:
+            serializer = self.shelf_item_serializer_class(page, many=True, context=context)
+            return self.get_paginated_response(serializer.data)
+        return Response(self.shelf_item_serializer_class(items, many=True, context=context).data)
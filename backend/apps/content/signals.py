@@ -0,0 +1,82 @@
+from django.db.models.signals import m2m_changed, post_delete, post_migrate, post_save
+from django.db import router
+from django.dispatch import receiver
+
+from . import cache, documents, jobs, renditions, search
+
+# Bookkeeping models that no cached response is built from.
+UNVERSIONED = {"content.job", "content.upload", "content.throttlebucket"}
+
+
+def _is_content_model(sender) -> bool:
+    meta = getattr(sender, "_meta", None)
+    return meta is not None and meta.app_label == "content" and meta.label_lower not in UNVERSIONED
+
+
+@receiver(post_save, dispatch_uid="content_bump_version_on_save")
+def bump_version(sender, **kwargs):
+    if _is_content_model(sender):
+        cache.bump_model_version(sender)
+
+
+@receiver(post_delete, dispatch_uid="content_bump_version_on_delete")
+def bump_version_on_delete(sender, **kwargs):
+    if _is_content_model(sender):
+        cache.bump_model_version(sender)
+        cache.record_deletion(sender)
+
+
+@receiver(m2m_changed, dispatch_uid="content_bump_version_on_m2m")
+def bump_version_on_m2m(sender, instance, action, model, **kwargs):
+    if not action.startswith("post_"):
+        return
+    for changed in (sender, type(instance), model):
+        if _is_content_model(changed):
+            cache.bump_model_version(changed)
+
+
+@receiver(post_save, dispatch_uid="content_build_renditions")
+def build_renditions(sender, instance, raw=False, update_fields=None, **kwargs):
+    fields = renditions.image_fields(sender)
+    if raw or not fields:
+        return
+    if update_fields is not None and not set(update_fields) & set(fields):
+        return
+    if not renditions.is_stale(instance):
+        return
+    label = sender._meta.label_lower
+    jobs.enqueue(
+        "content.build_renditions",
+        {"label": label, "pk": instance.pk},
+        dedup_key=f"renditions:{label}:{instance.pk}",
+    )
+
+
+@receiver(post_delete, dispatch_uid="content_delete_renditions")
+def delete_renditions(sender, instance, **kwargs):
+    for field in renditions.image_fields(sender):
+        renditions.delete_files(getattr(instance, field).storage, getattr(instance, renditions.renditions_name(field)))
+
+
+@receiver(post_save, dispatch_uid="content_ingest_document")
+def ingest_document(sender, instance, raw=False, update_fields=None, **kwargs):
+    field = documents.document_field(sender)
+    if raw or not field:
+        return
+    if update_fields is not None and field not in update_fields:
+        return
+    if not documents.is_stale(instance):
+        return
+    label = sender._meta.label_lower
+    jobs.enqueue(
+        "content.ingest_document",
+        {"label": label, "pk": instance.pk},
+        dedup_key=f"document:{label}:{instance.pk}",
+    )
+
+
+@receiver(post_migrate, dispatch_uid="content_ensure_search_triggers")
+def ensure_search_triggers(sender, using="default", **kwargs):
+    # Table rebuilds in later migrations drop the full-text triggers.
+    if sender.label == "content" and router.allow_migrate(using, "content"):
+        search.ensure_triggers(using)
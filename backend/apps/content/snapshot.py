@@ -0,0 +1,233 @@
+"""Static JSON snapshot of the public API, for nginx or a CDN to serve.
+
+Used by ``manage.py export_api_snapshot``. Every cached GET route registered in
+``apps/content/urls.py`` (lists page by page, every object's detail, and the
+extra actions) is rendered through the normal view stack in each language
+and written under the snapshot directory, next to gzip (and brotli, when the
+``brotli`` package is installed) copies for ``gzip_static``/``brotli_static``:
+
+    /api/news/                  -> api/news/index.json
+    /api/news/?lang=si&page=3   -> api/news/index.lang-si.page-3.json
+
+Routes are exported in groups, one per registered viewset. The state file
+records, per group, the cache version tokens of the models its responses are
+built from (``cache_models``, see ``cache.py``) and the files written; an
+incremental export re-renders only groups whose tokens moved and removes
+files that are no longer produced (deleted objects, pages that went away).
+Groups whose payload also depends on the clock (the homepage follows the
+notices' publish/expiry window) record when they expire.
+
+Files are replaced atomically and rewritten only when their content changes.
+"""
+import gzip
+import json
+import os
+import re
+from datetime import timedelta
+from pathlib import Path
+from urllib.parse import urlencode, urlsplit
+
+from django.test import Client
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import cache, i18n
+from .downloads import PassthroughRenderer
+
+try:
+    import brotli
+except ImportError:  # optional; gzip copies are always written
+    brotli = None
+
+STATE_FILE = ".snapshot-state.json"
+LANGUAGES = ("",) + i18n.LANGUAGES
+PREFIX = "/api/"
+
+
+def file_name(path: str, lang: str = "", page: int = 1) -> str:
+    """Snapshot file (relative to the snapshot root) for ``path`` with ``?lang=`` and ``?page=``."""
+    suffix = (f".lang-{lang}" if lang else "") + (f".page-{page}" if page > 1 else "")
+    return f"{path.strip('/')}/index{suffix}.json"
+
+
+def compressed_names(name: str) -> list:
+    return [f"{name}.gz"] + ([f"{name}.br"] if brotli is not None else [])
+
+
+def _replace(target: Path, content: bytes) -> bool:
+    if target.exists() and target.read_bytes() == content:
+        return False
+    target.parent.mkdir(parents=True, exist_ok=True)
+    temporary = target.with_name(f".{target.name}.tmp")
+    temporary.write_bytes(content)
+    os.replace(temporary, target)
+    return True
+
+
+def write(root: Path, name: str, content: bytes) -> bool:
+    """Write ``content`` and its compressed copies; returns whether anything changed."""
+    if not _replace(root / name, content) and all((root / extra).exists() for extra in compressed_names(name)):
+        return False
+    _replace(root / f"{name}.gz", gzip.compress(content, compresslevel=9, mtime=0))
+    if brotli is not None:
+        _replace(root / f"{name}.br", brotli.compress(content))
+    return True
+
+
+def remove(root: Path, name: str) -> None:
+    for stale in [name, *compressed_names(name)]:
+        try:
+            (root / stale).unlink()
+        except FileNotFoundError:
+            pass
+
+
+def is_public(viewset) -> bool:
+    """Cached read endpoints only; submissions (newsletter, contact) are never cached or exported."""
+    return hasattr(viewset, "cache_models")
+
+
+def group_models(viewset) -> tuple:
+    queryset = getattr(viewset, "queryset", None)
+    own = (queryset.model,) if queryset is not None else ()
+    return own + tuple(getattr(viewset, "cache_models", ()))
+
+
+def group_expiry(viewset, now):
+    """When the group's payload changes without a save, if sooner than the cache lifetime."""
+    if not hasattr(viewset, "get_cache_timeout"):
+        return None
+    view = viewset()
+    view.request = None
+    timeout = view.get_cache_timeout()
+    if timeout >= cache.get_timeout():
+        return None
+    return now + timedelta(seconds=timeout)
+
+
+def group_paths(url_prefix, viewset) -> list:
+    """Path of every GET route of one registered viewset (pagination is followed later)."""
+    base = f"{PREFIX}{url_prefix}/"
+    paths = []
+    if hasattr(viewset, "list"):
+        paths.append(base)
+    queryset = getattr(viewset, "queryset", None)
+    lookup_field = getattr(viewset, "lookup_field", "pk")
+    placeholder = re.compile(r"\(\?P<(\w+)>[^)]*\)")
+    fields = {lookup_field}
+    for extra in viewset.get_extra_actions():
+        fields.update(placeholder.findall(extra.url_path))
+    # Only the columns the URLs need; a catalogue can hold 100k rows.
+    rows = list(queryset.model._default_manager.order_by("pk").values(*fields)) if queryset is not None else []
+    if hasattr(viewset, "retrieve"):
+        paths += [f"{base}{row[lookup_field]}/" for row in rows]
+    for extra in viewset.get_extra_actions():
+        if "get" not in extra.mapping or PassthroughRenderer in extra.kwargs.get("renderer_classes", ()):
+            # File downloads are neither JSON nor to be counted by an export.
+            continue
+        if placeholder.search(extra.url_path):
+            # e.g. albums/(?P<slug>...)/images, filled in from every row.
+            paths += [
+                base + placeholder.sub(lambda match: str(row[match.group(1)]), extra.url_path) + "/" for row in rows
+            ]
+        elif extra.detail:
+            paths += [f"{base}{row[lookup_field]}/{extra.url_path}/" for row in rows]
+        else:
+            paths.append(f"{base}{extra.url_path}/")
+    return paths
+
+
+class Exporter:
+    """Render routes with the test client as if requested from ``base_url``."""
+
+    def __init__(self, root, base_url):
+        self.root = Path(root)
+        self.base_url = base_url.rstrip("/")
+        parts = urlsplit(self.base_url)
+        self.host = parts.netloc
+        self.secure = parts.scheme == "https"
+        self.client = Client()
+        self.written = 0
+
+    def get(self, path, params):
+        query = f"?{urlencode(params)}" if params else ""
+        return self.client.get(
+            path + query, HTTP_HOST=self.host, HTTP_ACCEPT="application/json", secure=self.secure,
+        )
+
+    def export_path(self, path) -> list:
+        """Write every language and page of ``path``; returns the file names produced."""
+        names = []
+        for lang in LANGUAGES:
+            page = 1
+            while True:
+                params = {"lang": lang} if lang else {}
+                if page > 1:
+                    params["page"] = page
+                response = self.get(path, params)
+                if response.status_code != 200 or response.streaming:
+                    break
+                name = file_name(path, lang, page)
+                if write(self.root, name, response.content):
+                    self.written += 1
+                names.append(name)
+                payload = json.loads(response.content)
+                if not (isinstance(payload, dict) and payload.get("next")):
+                    break
+                page += 1
+        return names
+
+    def export_group(self, url_prefix, viewset, now) -> dict:
+        versions = cache.model_versions(group_models(viewset))
+        expires = group_expiry(viewset, now)
+        names = []
+        for path in group_paths(url_prefix, viewset):
+            names += self.export_path(path)
+        return {"versions": versions, "expires": expires.isoformat() if expires else None, "files": sorted(names)}
+
+
+def load_state(root: Path) -> dict:
+    try:
+        return json.loads((root / STATE_FILE).read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def is_current(entry, viewset, now) -> bool:
+    if not entry or entry.get("versions") != cache.model_versions(group_models(viewset)):
+        return False
+    expires = parse_datetime(entry["expires"]) if entry.get("expires") else None
+    return expires is None or expires > now
+
+
+def export(router, root, base_url, incremental=False, only=(), log=print) -> dict:
+    """Export the routes of ``router`` under ``root``; returns a summary per group."""
+    root = Path(root)
+    state = load_state(root)
+    # Kept across full exports too, so files of deleted objects get removed.
+    groups = state.get("groups", {})
+    incremental = incremental and state.get("base_url") == base_url
+    exporter = Exporter(root, base_url)
+    now = timezone.now()
+    summary = {}
+
+    for url_prefix, viewset, _ in router.registry:
+        if not is_public(viewset) or (only and url_prefix not in only):
+            continue
+        previous = groups.get(url_prefix)
+        if incremental and is_current(previous, viewset, now):
+            summary[url_prefix] = "unchanged"
+            continue
+        before = exporter.written
+        entry = exporter.export_group(url_prefix, viewset, now)
+        stale = set((previous or {}).get("files", ())) - set(entry["files"])
+        for name in stale:
+            remove(root, name)
+        groups[url_prefix] = entry
+        summary[url_prefix] = f"{len(entry['files'])} files, {exporter.written - before} rewritten, {len(stale)} removed"
+        log(f"{url_prefix:22} {summary[url_prefix]}")
+
+    root.mkdir(parents=True, exist_ok=True)
+    state = {"base_url": base_url, "exported_at": now.isoformat(), "groups": groups}
+    _replace(root / STATE_FILE, json.dumps(state, indent=2, sort_keys=True).encode())
+    return summary
@@ -0,0 +1,23 @@
+"""Background job handlers (queued through ``jobs.enqueue``)."""
+from django.apps import apps
+
+from . import documents, jobs, renditions, uploads
+
+
+@jobs.task("content.build_renditions")
+def build_renditions(label, pk):
+    instance = apps.get_model(label)._default_manager.filter(pk=pk).first()
+    if instance is not None:
+        renditions.refresh(instance)
+
+
+@jobs.task("content.ingest_document")
+def ingest_document(label, pk):
+    instance = apps.get_model(label)._default_manager.filter(pk=pk).first()
+    if instance is not None:
+        documents.ingest(instance)
+
+
+@jobs.task("content.purge_uploads")
+def purge_uploads():
+    uploads.purge()
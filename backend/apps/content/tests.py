@@ -0,0 +1,38 @@
+from django.test import TestCase
+from django.utils import timezone
+
+from . import search
+from .models import News
+
+
+class SinhalaSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        cls.pirivena = News.objects.create(
+            title="Ministry notice", title_si="අධ්‍යාපන අමාත්‍යාංශය පිරිවෙන සිසු",
+            content="Pirivena students", published_at=now,
+        )
+        cls.sasana = News.objects.create(
+            title="Buddha Sasana", title_si="බුද්ධ සාසනය", content="Sasana", published_at=now,
+        )
+
+    def matches(self, *terms):
+        return set(search.search(News.objects.all(), terms, ranked=False).values_list("pk", flat=True))
+
+    def test_whole_words_match(self):
+        self.assertEqual(self.matches("සිසු"), {self.pirivena.pk})
+        self.assertEqual(self.matches("සාසනය"), {self.sasana.pk})
+
+    def test_prefixes_match_words_with_joiners(self):
+        self.assertEqual(self.matches("පිරි"), {self.pirivena.pk})
+        self.assertEqual(self.matches("අධ්‍යාප"), {self.pirivena.pk})
+        self.assertEqual(self.matches("අමාත්‍ය"), {self.pirivena.pk})
+
+    def test_no_matches_inside_words(self):
+        self.assertEqual(self.matches("රි"), set())
+        self.assertEqual(self.matches("වෙන"), set())
+
+    def test_snippet_keeps_words_whole(self):
+        [row] = search.search(News.objects.all(), ["පිරිවෙන"])
+        self.assertIn("<mark>පිරිවෙන</mark>", row.search_snippet)
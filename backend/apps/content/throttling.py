@@ -0,0 +1,130 @@
+"""Cost-aware token-bucket throttling for the public API.
+
+Every client (user id when signed in, otherwise its address: ``REMOTE_ADDR``,
+or the ``X-Forwarded-For`` entry added by the last of ``NUM_PROXIES`` trusted
+proxies) has one bucket of ``CONTENT_THROTTLE_CAPACITY`` tokens that refills
+at ``CONTENT_THROTTLE_REFILL_RATE`` tokens per second. A request spends
+tokens according to what it costs the server (``CONTENT_THROTTLE_COSTS``):
+
+* ``write``: creating or changing anything (contact and newsletter posts);
+* ``search``: ``?search=`` answered with ``icontains`` scans;
+* ``indexed_search``: ``?search=`` answered from the FTS5 index;
+* ``page``: per extra default-sized page asked for with ``?page_size=``;
+* ``export``: a bulk NDJSON export (see ``exports.py``);
+* ``archive``: a category ZIP archive (see ``archives.py``).
+
+Plain reads cost nothing, are never throttled and touch no bucket. When the
+bucket cannot cover a request the API answers ``429 Too Many Requests`` with
+``Retry-After``. Staff users and requests whose ``REMOTE_ADDR`` is listed in
+``CONTENT_THROTTLE_EXEMPT`` (e.g. the Next.js server) are not throttled.
+
+Each bucket is one ``ThrottleBucket`` row holding the time at which it will
+be full again (GCRA), routed to the ``submissions`` database (see
+``routers.py``). A request spends tokens with a single conditional
+``UPDATE``, so workers racing for the same bucket never spend the same
+tokens twice. Buckets that are full again are deleted whenever a new one is
+created.
+"""
+import math
+import time
+
+from django.conf import settings
+from django.db import router
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+from . import db
+from .models import ThrottleBucket
+from .pagination import MAX_PAGE_SIZE, PAGE_SIZE_QUERY_PARAM
+from .search import FullTextSearchFilter, is_available, is_indexed
+
+DEFAULT_COSTS = {"write": 20, "search": 5, "indexed_search": 1, "page": 1, "export": 10, "archive": 10}
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+# Actions with a cost of their own in ``CONTENT_THROTTLE_COSTS``.
+COSTLY_ACTIONS = ("export", "archive")
+
+
+def get_costs() -> dict:
+    return {**DEFAULT_COSTS, **getattr(settings, "CONTENT_THROTTLE_COSTS", {})}
+
+
+def request_cost(request, view) -> int:
+    """Tokens ``request`` spends; 0 for plain reads."""
+    costs = get_costs()
+    if request.method not in SAFE_METHODS:
+        return costs["write"]
+    action = getattr(view, "action", None)
+    cost = costs[action] if action in COSTLY_ACTIONS else 0
+    params = request.query_params
+    if params.get(api_settings.SEARCH_PARAM, "").strip():
+        cost += costs["indexed_search"] if _uses_index(view) else costs["search"]
+    page_size = params.get(PAGE_SIZE_QUERY_PARAM or "page_size", "")
+    default_size = api_settings.PAGE_SIZE or 1
+    if page_size.isdigit() and int(page_size) > default_size:
+        size = min(int(page_size), MAX_PAGE_SIZE or int(page_size))
+        cost += costs["page"] * (math.ceil(size / default_size) - 1)
+    return cost
+
+
+def _uses_index(view) -> bool:
+    if not any(issubclass(backend, FullTextSearchFilter) for backend in getattr(view, "filter_backends", ())):
+        return False
+    queryset = getattr(view, "queryset", None)
+    return queryset is not None and is_indexed(queryset.model) and is_available(queryset.db)
+
+
+def take(using, key, tokens, now, burst) -> float:
+    """Spend ``tokens`` (in seconds of refill) from bucket ``key``; returns 0, or the seconds to wait."""
+    buckets = ThrottleBucket.objects.using(using)
+    # Fits while max(full_at, now) + tokens - now <= burst; tokens never exceed burst.
+    if buckets.filter(pk=key, full_at__lte=now + burst - tokens).update(
+        full_at=Greatest(F("full_at"), Value(now)) + tokens,
+    ):
+        return 0
+    full_at = buckets.filter(pk=key).values_list("full_at", flat=True).first()
+    if full_at is not None:
+        return max(full_at, now) + tokens - now - burst
+    buckets.filter(full_at__lt=now).delete()
+    buckets.create(key=key, full_at=now + tokens)
+    return 0
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Spends ``request_cost()`` tokens from the client's bucket; see the module docstring."""
+
+    def __init__(self):
+        self.retry_after = None
+
+    def get_client_key(self, request) -> str:
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            return f"user:{user.pk}"
+        return self.get_ident(request)
+
+    def allow_request(self, request, view) -> bool:
+        if not getattr(settings, "CONTENT_THROTTLE_ENABLED", True):
+            return True
+        cost = request_cost(request, view)
+        if cost <= 0:
+            return True
+        user = getattr(request, "user", None)
+        if user is not None and user.is_staff:
+            return True
+        if request.META.get("REMOTE_ADDR") in getattr(settings, "CONTENT_THROTTLE_EXEMPT", ()):
+            return True
+        return self.spend(self.get_client_key(request), cost)
+
+    def spend(self, client, cost) -> bool:
+        capacity = getattr(settings, "CONTENT_THROTTLE_CAPACITY", 120)
+        interval = 1 / getattr(settings, "CONTENT_THROTTLE_REFILL_RATE", 2)
+        # A request dearer than a full bucket would never pass; it costs a full bucket instead.
+        tokens = min(cost, capacity) * interval
+        using = router.db_for_write(ThrottleBucket)
+        wait = db.write(take, using, client, tokens, time.time(), capacity * interval, using=using)
+        self.retry_after = wait or None
+        return not wait
+
+    def wait(self):
+        return self.retry_after
@@ -0,0 +1,418 @@
+"""Resumable, chunked uploads of large files through the admin.
+
+Videos and PDFs can be far larger than one comfortable request, so the admin
+forms of the models using ``ResumableUploadAdminMixin`` send them in pieces,
+following the tus protocol (https://tus.io, core + creation + termination):
+
+    POST   .../<model>/uploads/                 Upload-Length, Upload-Metadata
+                                                (filename, field) -> 201 Location
+    HEAD   .../<model>/uploads/<id>/            -> Upload-Offset, Upload-Length
+    PATCH  .../<model>/uploads/<id>/            Upload-Offset + chunk -> 204 Upload-Offset
+    DELETE .../<model>/uploads/<id>/            abandon
+    POST   .../<model>/uploads/<id>/finalize/   -> {"name": "videos/talk.mp4", ...}
+
+Chunks are appended straight to ``uploads/<id>.part`` in the field's storage
+(``MEDIA_ROOT``); nothing is buffered in memory or in temp files. A client
+that lost its connection asks for the offset with ``HEAD`` and carries on
+from there. Finalizing hard-links the finished file to the name the field
+would have given it (``upload_to`` plus a free file name), so the form only
+submits the upload id and the model is saved with that name, without copying
+the bytes again.
+
+The browser side is ``assets/admin/resumable-upload.js``. Files no larger
+than one chunk, and storages without local paths, use the ordinary file
+input. Uploads untouched for ``CONTENT_UPLOAD_EXPIRY`` seconds are removed by
+the ``content.purge_uploads`` job, along with finalized files that no object
+ended up using.
+"""
+import base64
+import binascii
+import os
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django import forms
+from django.apps import apps
+from django.conf import settings
+from django.contrib.admin.widgets import AdminFileWidget
+from django.core.exceptions import PermissionDenied, ValidationError
+from django.http import Http404, HttpResponse, HttpResponseNotAllowed, JsonResponse
+from django.urls import path, reverse
+from django.utils import timezone
+
+from . import jobs
+from .models import Upload
+
+try:
+    import fcntl
+except ImportError:  # Windows development servers: chunks of one upload are not serialized
+    fcntl = None
+
+TUS_VERSION = "1.0.0"
+PARTIAL_DIRECTORY = "uploads"
+COPY_SIZE = 64 * 1024
+
+
+class UploadError(Exception):
+    """Refused protocol request; ``status`` is the HTTP status to answer with."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def get_chunk_size() -> int:
+    return getattr(settings, "CONTENT_UPLOAD_CHUNK_SIZE", 8 * 1024 * 1024)
+
+
+def get_max_size() -> int:
+    return getattr(settings, "CONTENT_UPLOAD_MAX_SIZE", 4 * 1024 ** 3)
+
+
+def get_expiry() -> int:
+    return getattr(settings, "CONTENT_UPLOAD_EXPIRY", 24 * 60 * 60)
+
+
+def target_label(model, field_name) -> str:
+    return f"{model._meta.label_lower}.{field_name}"
+
+
+def target_field(target):
+    label, _, field_name = target.rpartition(".")
+    return apps.get_model(label)._meta.get_field(field_name)
+
+
+def is_available(storage) -> bool:
+    """Chunks are appended in place, which needs a storage with local paths."""
+    try:
+        storage.path("")
+    except NotImplementedError:
+        return False
+    return True
+
+
+def partial_path(upload) -> str:
+    return target_field(upload.target).storage.path(f"{PARTIAL_DIRECTORY}/{upload.pk}.part")
+
+
+def create(target, filename, size, user=None) -> Upload:
+    field = target_field(target)
+    filename = field.storage.get_valid_name(os.path.basename(filename or ""))
+    if not filename:
+        raise UploadError("A file name is required.")
+    if size < 0:
+        raise UploadError("Upload-Length must not be negative.")
+    if size > get_max_size():
+        raise UploadError("The file is larger than allowed.", status=413)
+    upload = Upload.objects.create(target=target, filename=filename, size=size, created_by=user)
+    location = partial_path(upload)
+    os.makedirs(os.path.dirname(location), exist_ok=True)
+    open(location, "xb").close()
+    jobs.enqueue("content.purge_uploads", delay=get_expiry(), dedup_key="uploads:purge")
+    return upload
+
+
+@contextmanager
+def _locked(upload):
+    """The partial file, opened for writing and held exclusively, with ``upload`` re-read."""
+    try:
+        handle = open(partial_path(upload), "r+b")
+    except FileNotFoundError:
+        upload.refresh_from_db(fields=["offset", "name"])
+        raise UploadError("The upload is already finalized." if upload.name else "Unknown upload.",
+                          status=409 if upload.name else 404)
+    with handle:
+        if fcntl is not None:
+            try:
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                raise UploadError("Another request for this upload is in progress.", status=409)
+        upload.refresh_from_db(fields=["offset", "name"])
+        if upload.name:
+            raise UploadError("The upload is already finalized.", status=409)
+        yield handle
+
+
+def append(upload, offset, stream, length) -> int:
+    """Write ``length`` bytes of ``stream`` at ``offset``; returns the new offset.
+
+    Whatever arrived before a dropped connection is kept, so the client can
+    resume from the offset reported by ``HEAD``.
+    """
+    if length > get_chunk_size():
+        raise UploadError("The chunk is larger than allowed.", status=413)
+    with _locked(upload) as handle:
+        if offset != upload.offset:
+            raise UploadError(f"Expected Upload-Offset {upload.offset}.", status=409)
+        if offset + length > upload.size:
+            raise UploadError("The chunk goes past Upload-Length.")
+        # Drops bytes of a write that was cut off before its offset was recorded.
+        handle.truncate(offset)
+        handle.seek(offset)
+        written = 0
+        while written < length:
+            chunk = stream.read(min(COPY_SIZE, length - written))
+            if not chunk:
+                break
+            handle.write(chunk)
+            written += len(chunk)
+        handle.flush()
+        os.fsync(handle.fileno())
+        upload.offset = offset + written
+        Upload.objects.filter(pk=upload.pk).update(offset=upload.offset, updated_at=timezone.now())
+    return upload.offset
+
+
+def finalize(upload) -> str:
+    """Move the complete file to the field's upload location; returns its storage name."""
+    if upload.name:
+        return upload.name
+    field = target_field(upload.target)
+    storage = field.storage
+    source = partial_path(upload)
+    try:
+        with _locked(upload):
+            if upload.offset != upload.size:
+                raise UploadError(f"The upload is incomplete ({upload.offset} of {upload.size} bytes).", status=409)
+            name = field.generate_filename(None, upload.filename)
+            while True:
+                name = storage.get_available_name(name, max_length=field.max_length)
+                destination = storage.path(name)
+                os.makedirs(os.path.dirname(destination), exist_ok=True)
+                try:
+                    # A link fails instead of overwriting a file saved since get_available_name().
+                    os.link(source, destination)
+                except FileExistsError:
+                    continue
+                break
+            if settings.FILE_UPLOAD_PERMISSIONS is not None:
+                os.chmod(destination, settings.FILE_UPLOAD_PERMISSIONS)
+            upload.name = name
+            Upload.objects.filter(pk=upload.pk).update(name=name, updated_at=timezone.now())
+            os.remove(source)
+    except UploadError:
+        if upload.name:
+            # Finalized by a concurrent request.
+            return upload.name
+        raise
+    return name
+
+
+def discard(upload) -> None:
+    try:
+        os.remove(partial_path(upload))
+    except FileNotFoundError:
+        pass
+    upload.delete()
+
+
+def claim(upload_id, target, user=None) -> str:
+    """Storage name of a finished upload for a form to save; finalizes it if needed."""
+    try:
+        uploads = Upload.objects.filter(pk=upload_id, target=target)
+        if user is not None:
+            uploads = uploads.filter(created_by=user)
+        upload = uploads.get()
+    except (Upload.DoesNotExist, ValidationError):
+        raise UploadError("The uploaded file could not be found; please upload it again.", status=404)
+    return finalize(upload)
+
+
+def is_referenced(upload) -> bool:
+    field = target_field(upload.target)
+    return field.model._default_manager.filter(**{field.name: upload.name}).exists()
+
+
+def purge(now=None) -> int:
+    """Remove uploads untouched for ``CONTENT_UPLOAD_EXPIRY``; returns how many."""
+    cutoff = (now or timezone.now()) - timedelta(seconds=get_expiry())
+    count = 0
+    for upload in Upload.objects.filter(updated_at__lt=cutoff):
+        if upload.name and not is_referenced(upload):
+            target_field(upload.target).storage.delete(upload.name)
+        discard(upload)
+        count += 1
+    if Upload.objects.exists():
+        jobs.enqueue("content.purge_uploads", delay=get_expiry(), dedup_key="uploads:purge")
+    return count
+
+
+def _metadata(header) -> dict:
+    """``Upload-Metadata: key base64value, key base64value``."""
+    values = {}
+    for pair in filter(None, (part.strip() for part in header.split(","))):
+        key, _, value = pair.partition(" ")
+        try:
+            values[key] = base64.b64decode(value, validate=True).decode() if value else ""
+        except (binascii.Error, UnicodeDecodeError):
+            raise UploadError(f"Upload-Metadata value for {key!r} is not valid base64.")
+    return values
+
+
+def _header_int(request, name) -> int:
+    value = request.headers.get(name, "")
+    if not value.isdigit():
+        raise UploadError(f"{name} must be a non-negative integer.")
+    return int(value)
+
+
+def _tus_response(status=204, **headers) -> HttpResponse:
+    response = HttpResponse(status=status)
+    response["Tus-Resumable"] = TUS_VERSION
+    response["Cache-Control"] = "no-store"
+    for name, value in headers.items():
+        response[name.replace("_", "-")] = str(value)
+    return response
+
+
+class PendingUpload:
+    """Form value standing for a finished chunked upload, by id."""
+
+    def __init__(self, upload_id):
+        self.upload_id = upload_id
+
+    def __bool__(self):
+        return True
+
+
+class ResumableFileInput(AdminFileWidget):
+    """File input that hands large files to ``resumable-upload.js``.
+
+    The chosen file is uploaded in chunks while the editor fills in the form;
+    only the upload id is submitted, in ``<name>__upload``.
+    """
+    template_name = "content/widgets/resumable_file_input.html"
+
+    class Media:
+        js = ("admin/resumable-upload.js",)
+
+    def __init__(self, upload_url, field_name, attrs=None):
+        super().__init__(attrs)
+        self.upload_url = upload_url
+        self.field_name = field_name
+
+    def upload_name(self, name):
+        return f"{name}__upload"
+
+    def get_context(self, name, value, attrs):
+        pending = value if isinstance(value, PendingUpload) else None
+        context = super().get_context(name, None if pending else value, attrs)
+        context["widget"].update({
+            "upload_name": self.upload_name(name),
+            "upload_value": pending.upload_id if pending else "",
+            "upload_url": self.upload_url,
+            "upload_field": self.field_name,
+            "chunk_size": get_chunk_size(),
+        })
+        return context
+
+    def value_from_datadict(self, data, files, name):
+        upload_id = data.get(self.upload_name(name))
+        if upload_id:
+            return PendingUpload(upload_id)
+        return super().value_from_datadict(data, files, name)
+
+    def value_omitted_from_data(self, data, files, name):
+        return self.upload_name(name) not in data and super().value_omitted_from_data(data, files, name)
+
+
+class ResumableFileField(forms.FileField):
+    """``FileField`` that also accepts a finished chunked upload and cleans it to its storage name."""
+
+    def __init__(self, *, target, user=None, **kwargs):
+        self.target = target
+        self.user = user
+        super().__init__(**kwargs)
+
+    def clean(self, data, initial=None):
+        if not isinstance(data, PendingUpload):
+            return super().clean(data, initial)
+        try:
+            return claim(data.upload_id, self.target, self.user)
+        except UploadError as error:
+            raise forms.ValidationError(str(error), code="upload")
+
+
+class ResumableUploadAdminMixin:
+    """Chunked uploads for the file fields named in ``resumable_upload_fields``."""
+    resumable_upload_fields = ()
+
+    def get_urls(self):
+        info = self.opts.app_label, self.opts.model_name
+        return [
+            path("uploads/", self.admin_site.admin_view(self.upload_create_view), name="%s_%s_upload" % info),
+            path("uploads/<uuid:upload_id>/", self.admin_site.admin_view(self.upload_view),
+                 name="%s_%s_upload_detail" % info),
+            path("uploads/<uuid:upload_id>/finalize/", self.admin_site.admin_view(self.upload_finalize_view),
+                 name="%s_%s_upload_finalize" % info),
+        ] + super().get_urls()
+
+    def formfield_for_dbfield(self, db_field, request, **kwargs):
+        if db_field.name in self.resumable_upload_fields and is_available(db_field.storage):
+            info = self.opts.app_label, self.opts.model_name
+            kwargs["widget"] = ResumableFileInput(reverse("admin:%s_%s_upload" % info), db_field.name)
+            kwargs["form_class"] = ResumableFileField
+            kwargs["target"] = target_label(self.model, db_field.name)
+            kwargs["user"] = request.user
+            return db_field.formfield(**kwargs)
+        return super().formfield_for_dbfield(db_field, request, **kwargs)
+
+    def _check_upload_permission(self, request):
+        if not (self.has_add_permission(request) or self.has_change_permission(request)):
+            raise PermissionDenied
+
+    def _get_upload(self, request, upload_id, **filters):
+        upload = Upload.objects.filter(pk=upload_id, created_by=request.user, **filters).first()
+        if upload is None:
+            raise Http404("Unknown upload.")
+        return upload
+
+    def upload_create_view(self, request):
+        if request.method != "POST":
+            return HttpResponseNotAllowed(["POST"])
+        self._check_upload_permission(request)
+        try:
+            metadata = _metadata(request.headers.get("Upload-Metadata", ""))
+            if metadata.get("field") not in self.resumable_upload_fields:
+                raise UploadError("Unknown field.")
+            upload = create(
+                target_label(self.model, metadata["field"]), metadata.get("filename", ""),
+                _header_int(request, "Upload-Length"), request.user,
+            )
+        except UploadError as error:
+            return _tus_response(error.status, Upload_Error=error)
+        info = self.opts.app_label, self.opts.model_name
+        location = reverse("admin:%s_%s_upload_detail" % info, args=[upload.pk])
+        return _tus_response(201, Location=location, Upload_Offset=0, Upload_Chunk_Size=get_chunk_size())
+
+    def upload_view(self, request, upload_id):
+        self._check_upload_permission(request)
+        if request.method == "HEAD":
+            upload = self._get_upload(request, upload_id)
+            return _tus_response(200, Upload_Offset=upload.offset, Upload_Length=upload.size)
+        if request.method == "PATCH":
+            upload = self._get_upload(request, upload_id)
+            if request.content_type != "application/offset+octet-stream":
+                return _tus_response(415)
+            try:
+                offset = append(upload, _header_int(request, "Upload-Offset"), request,
+                                _header_int(request, "Content-Length"))
+            except UploadError as error:
+                return _tus_response(error.status, Upload_Error=error)
+            return _tus_response(204, Upload_Offset=offset)
+        if request.method == "DELETE":
+            upload = self._get_upload(request, upload_id, name="")
+            discard(upload)
+            return _tus_response(204)
+        return HttpResponseNotAllowed(["HEAD", "PATCH", "DELETE"])
+
+    def upload_finalize_view(self, request, upload_id):
+        if request.method != "POST":
+            return HttpResponseNotAllowed(["POST"])
+        self._check_upload_permission(request)
+        upload = self._get_upload(request, upload_id)
+        try:
+            name = finalize(upload)
+        except UploadError as error:
+            return JsonResponse({"detail": str(error)}, status=error.status)
+        return JsonResponse({"upload": str(upload.pk), "name": name, "size": upload.size})
@@ -24,6 +24,7 @@ router.register(r"newsletter", views.NewsletterSubscriptionViewSet, basename="ne
 router.register(r"contact", views.ContactMessageViewSet, basename="contact")
 router.register(r"contact-info", views.ContactInfoViewSet, basename="contact-info")
 router.register(r"footer-about", views.FooterAboutViewSet, basename="footer-about")
+router.register(r"home", views.HomeViewSet, basename="home")
 
 urlpatterns = [
     path("", include(router.urls)),
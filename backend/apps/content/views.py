@@ -1,18 +1,39 @@
-﻿from rest_framework import viewsets, mixins
+﻿import copy
+
+from rest_framework import viewsets, mixins
 from rest_framework.decorators import action
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework import filters
 from django_filters.rest_framework import DjangoFilterBackend
+from django.db.models import Count, F, Prefetch, Q
+from django.db.models.functions import ExtractYear
+from django.http import QueryDict
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
 from rest_framework.filters import SearchFilter, OrderingFilter
-from django.db import models as django_models
 
-from . import models, serializers
+from . import archives, cache, models, serializers
+from .downloads import DownloadMixin, PassthroughRenderer
+from .exports import ExportMixin
+from .facets import Facet, facet_counts
 from . import serializers as s
+from .i18n import get_request_language, project_queryset
+from .journal import JournaledCreateMixin
+from .mixins import CachedResponseMixin, ConditionalGetMixin, LanguageProjectionMixin, SparseFieldsMixin
+from .search import FullTextSearchFilter
+from .shelves import ShelfMixin, top_per_group
 
 
-class NewsViewSet(viewsets.ModelViewSet):
-    queryset = models.News.objects.all().prefetch_related("gallery_images").order_by("-published_at")
+class NewsViewSet(CachedResponseMixin, ConditionalGetMixin, LanguageProjectionMixin, SparseFieldsMixin,
+                  ExportMixin, viewsets.ModelViewSet):
+    queryset = models.News.objects.all().order_by("-published_at")
     serializer_class = s.NewsSerializer
+    cache_models = (models.NewsImage,)
+    cursor_ordering = ("-published_at", "id")
+    filter_backends = [FullTextSearchFilter]
+    search_fields = ["title", "title_si", "excerpt", "excerpt_si"]
     lookup_field = "slug"
     lookup_value_regex = "[0-9A-Za-z-]+"
 
@@ -29,60 +50,176 @@ class NewsViewSet(viewsets.ModelViewSet):
                 return queryset.get(pk=int(lookup))
             raise
 
+    def get_featured_queryset(self):
+        return self.get_queryset().filter(is_featured=True)[:5]
+
     @action(detail=False, methods=["get"])
     def featured(self, request):
-        qs = self.get_queryset().filter(is_featured=True)[:5]
+        return self.cached_response(self._featured, request)
+
+    def _featured(self, request):
+        qs = self.get_featured_queryset()
         return Response(self.get_serializer(qs, many=True).data)
 
 
-class NoticeViewSet(viewsets.ModelViewSet):
-    queryset = models.Notice.objects.all().prefetch_related("gallery_images")
+class NoticeViewSet(CachedResponseMixin, ConditionalGetMixin, LanguageProjectionMixin, SparseFieldsMixin,
+                    ExportMixin, viewsets.ModelViewSet):
+    queryset = models.Notice.objects.all()
     serializer_class = s.NoticeSerializer
+    cache_models = (models.NoticeImage,)
+    cursor_ordering = ("-published_at", "-priority", "id")
+    filter_backends = [FullTextSearchFilter]
+    search_fields = ["title", "title_si", "content", "content_si"]
+
+    # ?active=true: only notices inside their publish/expiry window.
+    active_query_param = "active"
+
+    @staticmethod
+    def active_filter(now):
+        return Q(published_at__lte=now) & (Q(expires_at__isnull=True) | Q(expires_at__gt=now))
+
+    @staticmethod
+    def next_boundary(now):
+        """The next moment a notice is published or expires, i.e. the active set changes."""
+        upcoming = [
+            models.Notice.objects.filter(**{f"{field}__gt": now}).order_by(field).values_list(field, flat=True).first()
+            for field in ("published_at", "expires_at")
+        ]
+        upcoming = [moment for moment in upcoming if moment is not None]
+        return min(upcoming) if upcoming else None
+
+    def is_active_mode(self):
+        if self.request is None:
+            return False
+        return self.request.query_params.get(self.active_query_param, "").lower() in ("true", "1", "yes")
+
+    def get_active_queryset(self):
+        return super().get_queryset().filter(self.active_filter(timezone.now()))
 
-
-class PublicationViewSet(viewsets.ModelViewSet):
+    def get_queryset(self):
+        if self.is_active_mode():
+            return self.get_active_queryset()
+        return super().get_queryset()
+
+    def get_validator_extras(self):
+        # Rows entering or leaving the window move neither updated_at nor the
+        # tombstone, so the window itself is part of the validator.
+        if self.is_active_mode():
+            return [self.next_boundary(timezone.now())]
+        return []
+
+    def get_cache_timeout(self):
+        timeout = super().get_cache_timeout()
+        if self.is_active_mode():
+            now = timezone.now()
+            timeout = cache.timeout_until(self.next_boundary(now), now, timeout)
+        return timeout
+
+
+class PublicationViewSet(DownloadMixin, CachedResponseMixin, ConditionalGetMixin, LanguageProjectionMixin,
+                         SparseFieldsMixin, ExportMixin, viewsets.ModelViewSet):
     queryset = models.Publication.objects.filter(is_active=True).order_by("-published_at")
     serializer_class = s.PublicationSerializer
+    cache_models = (models.DownloadCategory,)
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter]
+    filterset_fields = {"category": ["exact"], "department": ["exact"], "published_at": ["year"]}
+    search_fields = ["title", "title_si", "description", "description_si"]
 
+    @action(detail=False, methods=["get"])
+    def facets(self, request):
+        return self.cached_response(self._facets, request)
+
+    def _facets(self, request):
+        queryset = self.filter_queryset(self.get_queryset())
+        facets = {
+            "category": Facet("category_id", label="category__name"),
+            "department": Facet("department", label="department"),
+            "year": Facet(ExtractYear("published_at")),
+        }
+        return Response(facet_counts(queryset, facets, get_request_language(request)))
 
-class VideoViewSet(viewsets.ModelViewSet):
+
+class VideoViewSet(CachedResponseMixin, ConditionalGetMixin, LanguageProjectionMixin, SparseFieldsMixin,
+                   ExportMixin, viewsets.ModelViewSet):
     queryset = models.Video.objects.all().order_by("-published_at")
     serializer_class = s.VideoSerializer
 
 
-class AlbumViewSet(viewsets.ModelViewSet):
+class AlbumViewSet(CachedResponseMixin, ConditionalGetMixin, LanguageProjectionMixin, SparseFieldsMixin,
+                   ExportMixin, viewsets.ModelViewSet):
     queryset = models.Album.objects.all()
     serializer_class = serializers.AlbumSerializer
+    cache_models = (models.GalleryImage,)
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ["is_active", "slug"]
     search_fields = ["title", "description"]
     ordering_fields = ["position", "published_at", "created_at"]
     ordering = ["position", "-published_at", "-created_at"]
+    image_ordering = ("position", "created_at", "id")
+    preview_count = 4
+
+    def get_queryset(self):
+        previews = top_per_group(models.GalleryImage.objects.all(), "album", self.image_ordering, self.preview_count)
+        return super().get_queryset().annotate(image_count=Count("images")).prefetch_related(
+            Prefetch("images", queryset=previews, to_attr="preview_images")
+        )
 
-class GalleryImageViewSet(viewsets.ModelViewSet):
+    @action(detail=False, methods=["get"], url_path=r"(?P<slug>[^/.]+)/images")
+    def images(self, request, *args, **kwargs):
+        return self.cached_response(self._images, request, *args, **kwargs)
+
+    def _images(self, request, slug=None):
+        album = get_object_or_404(models.Album, slug=slug)
+        images = album.images.order_by(*self.image_ordering)
+        lang = self.get_language()
+        if lang:
+            images = project_queryset(images, lang)
+        context = self.get_serializer_context()
+        page = self.paginate_queryset(images)
+        if page is not None:
+            return self.get_paginated_response(serializers.GalleryImageSerializer(page, many=True, context=context).data)
+        return Response(serializers.GalleryImageSerializer(images, many=True, context=context).data)
+
+
+class GalleryImageViewSet(CachedResponseMixin, ConditionalGetMixin, LanguageProjectionMixin, SparseFieldsMixin,
+                          ExportMixin, viewsets.ModelViewSet):
     queryset = models.GalleryImage.objects.all()
     serializer_class = serializers.GalleryImageSerializer
+    # Deactivating an album hides its images.
+    cache_models = (models.Album,)
+    cursor_ordering = ("position", "created_at", "id")
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ["album"]
     ordering_fields = ["position", "created_at"]
 
+    def get_queryset(self):
+        qs = super().get_queryset()
+        action = getattr(self, "action", None)
+        if action in ("list", "retrieve"):
+            return qs.filter(album__is_active=True)
+        return qs
+
 
-class EventViewSet(viewsets.ModelViewSet):
+class EventViewSet(CachedResponseMixin, ConditionalGetMixin, LanguageProjectionMixin, SparseFieldsMixin,
+                   ExportMixin, viewsets.ModelViewSet):
     queryset = models.Event.objects.all().order_by("start_date")
     serializer_class = s.EventSerializer
 
 
-class StatViewSet(viewsets.ModelViewSet):
+class StatViewSet(CachedResponseMixin, ConditionalGetMixin, LanguageProjectionMixin, SparseFieldsMixin,
+                  viewsets.ModelViewSet):
     queryset = models.Stat.objects.all()
     serializer_class = s.StatSerializer
 
 
-class ExternalLinkViewSet(viewsets.ModelViewSet):
+class ExternalLinkViewSet(CachedResponseMixin, ConditionalGetMixin, LanguageProjectionMixin, SparseFieldsMixin,
+                          viewsets.ModelViewSet):
     queryset = models.ExternalLink.objects.all()
     serializer_class = s.ExternalLinkSerializer
 
 
-class FooterLinkViewSet(viewsets.ModelViewSet):
+class FooterLinkViewSet(CachedResponseMixin, ConditionalGetMixin, LanguageProjectionMixin, SparseFieldsMixin,
+                        viewsets.ModelViewSet):
     queryset = models.FooterLink.objects.all().order_by("position", "name")
     serializer_class = s.FooterLinkSerializer
 
@@ -94,41 +231,60 @@ class FooterLinkViewSet(viewsets.ModelViewSet):
         return qs
 
 
-class HeroSlideViewSet(viewsets.ModelViewSet):
+class HeroSlideViewSet(CachedResponseMixin, ConditionalGetMixin, LanguageProjectionMixin, SparseFieldsMixin,
+                       viewsets.ModelViewSet):
     queryset = models.HeroSlide.objects.all().order_by("position")
     serializer_class = s.HeroSlideSerializer
 
 
-class NewsletterSubscriptionViewSet(mixins.CreateModelMixin,
+class NewsletterSubscriptionViewSet(JournaledCreateMixin,
+                                    mixins.CreateModelMixin,
                                     mixins.ListModelMixin,
                                     viewsets.GenericViewSet):
     queryset = models.NewsletterSubscription.objects.all().order_by("-created_at")
     serializer_class = s.NewsletterSubscriptionSerializer
 
 
-class DownloadCategoryViewSet(viewsets.ModelViewSet):
-    queryset = models.DownloadCategory.objects.all().order_by("position").prefetch_related(
-        django_models.Prefetch(
-            "publications",
-            queryset=models.Publication.objects.filter(is_active=True).order_by("-published_at", "-created_at")
-        )
-    )
+class DownloadCategoryViewSet(ShelfMixin, CachedResponseMixin, ConditionalGetMixin, LanguageProjectionMixin,
+                              SparseFieldsMixin, ExportMixin, viewsets.ModelViewSet):
+    queryset = models.DownloadCategory.objects.all().order_by("position")
     serializer_class = s.DownloadCategorySerializer
+    cache_models = (models.Publication,)
+    shelf_relation = "publications"
+    shelf_partition = "category"
+    shelf_ordering = ("-published_at", "-created_at", "-id")
+    shelf_serializer_class = s.DownloadCategoryShelfSerializer
+    shelf_item_serializer_class = s.PublicationSerializer
 
+    def get_shelf_item_queryset(self):
+        return models.Publication.objects.filter(is_active=True)
 
-class ContactMessageViewSet(mixins.CreateModelMixin,
+    @action(detail=True, methods=["get"])
+    def publications(self, request, *args, **kwargs):
+        return self.cached_response(self.category_items, request, *args, **kwargs)
+
+    @action(detail=True, methods=["get"], renderer_classes=[JSONRenderer, PassthroughRenderer])
+    def archive(self, request, *args, **kwargs):
+        """Every active file of the category as one ZIP (``?year=``, ``?department=``)."""
+        return archives.respond(request, self.get_object())
+
+
+class ContactMessageViewSet(JournaledCreateMixin,
+                            mixins.CreateModelMixin,
                             mixins.ListModelMixin,
                             viewsets.GenericViewSet):
     queryset = models.ContactMessage.objects.all().order_by("-created_at")
     serializer_class = s.ContactMessageSerializer
 
 
-class ContactInfoViewSet(viewsets.ModelViewSet):
+class ContactInfoViewSet(CachedResponseMixin, ConditionalGetMixin, LanguageProjectionMixin, SparseFieldsMixin,
+                         viewsets.ModelViewSet):
     queryset = models.ContactInfo.objects.all().order_by("-created_at")
     serializer_class = s.ContactInfoSerializer
 
 
-class FooterAboutViewSet(viewsets.ModelViewSet):
+class FooterAboutViewSet(CachedResponseMixin, ConditionalGetMixin, LanguageProjectionMixin, SparseFieldsMixin,
+                         viewsets.ModelViewSet):
     queryset = models.FooterAbout.objects.all().order_by("-updated_at", "-created_at")
     serializer_class = s.FooterAboutSerializer
 
@@ -140,7 +296,8 @@ class FooterAboutViewSet(viewsets.ModelViewSet):
         return qs
 
 
-class HeroIntroViewSet(viewsets.ModelViewSet):
+class HeroIntroViewSet(CachedResponseMixin, ConditionalGetMixin, LanguageProjectionMixin, SparseFieldsMixin,
+                       viewsets.ModelViewSet):
     serializer_class = s.HeroIntroSerializer
 
     def get_queryset(self):
@@ -151,7 +308,8 @@ class HeroIntroViewSet(viewsets.ModelViewSet):
         return qs
 
 
-class AboutSectionViewSet(viewsets.ModelViewSet):
+class AboutSectionViewSet(CachedResponseMixin, ConditionalGetMixin, LanguageProjectionMixin, SparseFieldsMixin,
+                          viewsets.ModelViewSet):
     serializer_class = s.AboutSectionSerializer
     filter_backends = [OrderingFilter]
     ordering_fields = ["position", "created_at"]
@@ -165,7 +323,8 @@ class AboutSectionViewSet(viewsets.ModelViewSet):
         return qs.order_by("position", "created_at")
 
 
-class SiteTextSnippetViewSet(viewsets.ModelViewSet):
+class SiteTextSnippetViewSet(CachedResponseMixin, ConditionalGetMixin, LanguageProjectionMixin, SparseFieldsMixin,
+                             viewsets.ModelViewSet):
     serializer_class = s.SiteTextSnippetSerializer
     search_fields = ("key", "title", "text")
 
@@ -176,10 +335,15 @@ class SiteTextSnippetViewSet(viewsets.ModelViewSet):
             return qs.filter(is_active=True)
         return qs
 
-class LibraryPublicationEntryViewSet(viewsets.ModelViewSet):
+class LibraryPublicationEntryViewSet(DownloadMixin, CachedResponseMixin, ConditionalGetMixin, LanguageProjectionMixin,
+                                     SparseFieldsMixin, ExportMixin, viewsets.ModelViewSet):
     queryset = models.LibraryPublicationEntry.objects.all()
     serializer_class = s.LibraryPublicationEntrySerializer
-    filter_backends = [DjangoFilterBackend, OrderingFilter, SearchFilter]
+    download_field = "pdf_file"
+    cache_models = (models.LibraryPublicationImage, models.LibraryPublicationCategory)
+    # published_at is nullable and cannot anchor a cursor, so books page by creation time.
+    cursor_ordering = ("-created_at", "id")
+    filter_backends = [DjangoFilterBackend, OrderingFilter, FullTextSearchFilter]
     filterset_fields = ["category", "category__slug", "is_active", "is_featured", "year"]
     ordering_fields = ["published_at", "created_at", "year", "title"]
     search_fields = ["title", "subtitle", "authors", "description"]
@@ -205,14 +369,116 @@ class LibraryPublicationEntryViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=["get"])
     def latest(self, request):
+        return self.cached_response(self._latest, request)
+
+    def _latest(self, request):
         limit = int(request.query_params.get("limit", 6))
         queryset = self.get_queryset().order_by("-published_at", "-created_at")[:limit]
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
 
+    @action(detail=False, methods=["get"])
+    def facets(self, request):
+        return self.cached_response(self._facets, request)
+
+    def _facets(self, request):
+        queryset = self.filter_queryset(self.get_queryset())
+        facets = {
+            "category": Facet("category_id", label="category__name"),
+            "year": Facet("year"),
+            "is_featured": Facet("is_featured"),
+        }
+        return Response(facet_counts(queryset, facets, get_request_language(request)))
+
 
-class LibraryPublicationCategoryViewSet(viewsets.ModelViewSet):
+class LibraryPublicationCategoryViewSet(ShelfMixin, CachedResponseMixin, ConditionalGetMixin, LanguageProjectionMixin,
+                                        SparseFieldsMixin, ExportMixin, viewsets.ModelViewSet):
     queryset = models.LibraryPublicationCategory.objects.all().order_by("position", "name")
     serializer_class = s.LibraryPublicationCategorySerializer
+    cache_models = (models.LibraryPublicationEntry, models.LibraryPublicationImage)
     filter_backends = [SearchFilter]
     search_fields = ["name", "description"]
+    shelf_relation = "publications"
+    shelf_partition = "category"
+    shelf_ordering = (F("published_at").desc(nulls_last=True), "-created_at", "-id")
+    shelf_serializer_class = s.LibraryPublicationCategoryShelfSerializer
+    shelf_item_serializer_class = s.LibraryPublicationEntrySerializer
+
+    def get_shelf_item_queryset(self):
+        return models.LibraryPublicationEntry.objects.filter(is_active=True).select_related("category").prefetch_related("images")
+
+    @action(detail=True, methods=["get"])
+    def books(self, request, *args, **kwargs):
+        return self.cached_response(self.category_items, request, *args, **kwargs)
+
+    def get_queryset(self):
+        return super().get_queryset().annotate(publications_count=Count("publications"))
+
+
+class HomeViewSet(viewsets.ViewSet):
+    """Everything the homepage renders, composed into one cached document.
+
+    The payload is rebuilt only when one of ``cache_models`` changes; see
+    ``cache.py`` for how the version tokens invalidate it.
+    """
+    cache_models = (
+        models.HeroSlide, models.HeroIntro, models.SiteTextSnippet,
+        models.News, models.NewsImage, models.Notice, models.NoticeImage,
+        models.Video, models.Stat, models.ExternalLink,
+        models.Album, models.GalleryImage,
+        models.LibraryPublicationEntry, models.LibraryPublicationImage, models.LibraryPublicationCategory,
+    )
+
+    def get_section_request(self):
+        """The request without its query string, apart from the resolved ``?lang=``.
+
+        The document is cached for every visitor, so filters and ``?fields=``
+        meant for the section endpoints must not shape it.
+        """
+        http_request = copy.copy(self.request._request)
+        http_request.GET = QueryDict(mutable=True)
+        lang = get_request_language(self.request)
+        if lang:
+            http_request.GET["lang"] = lang
+        return Request(http_request, parsers=self.request.parsers, negotiator=self.request.negotiator)
+
+    def _section(self, viewset_class, queryset=None, limit=None):
+        view = viewset_class(request=self.section_request, format_kwarg=None, action="list", args=(), kwargs={})
+        qs = view.get_queryset() if queryset is None else queryset(view)
+        if limit:
+            qs = qs[:limit]
+        return view.get_serializer(qs, many=True).data
+
+    def build(self):
+        self.section_request = self.get_section_request()
+        hero_intro = self._section(HeroIntroViewSet, limit=1)
+        return {
+            "hero_intro": hero_intro[0] if hero_intro else None,
+            "text_snippets": self._section(SiteTextSnippetViewSet),
+            "slides": self._section(HeroSlideViewSet),
+            "featured_news": self._section(NewsViewSet, queryset=lambda view: view.get_featured_queryset()),
+            "notices": self._section(NoticeViewSet, queryset=lambda view: view.get_active_queryset(), limit=10),
+            "videos": self._section(VideoViewSet, limit=10),
+            "stats": self._section(StatViewSet),
+            "links": self._section(ExternalLinkViewSet),
+            "albums": self._section(
+                AlbumViewSet, queryset=lambda view: view.get_queryset().filter(is_active=True), limit=10
+            ),
+            "books": self._section(
+                LibraryPublicationEntryViewSet,
+                queryset=lambda view: view.get_queryset().filter(is_featured=True),
+                limit=6,
+            ),
+        }
+
+    def list(self, request):
+        # Media URLs are absolute, so the host is part of the key.
+        key = cache.versioned_key(
+            "home", self.cache_models, request.build_absolute_uri("/"), get_request_language(request)
+        )
+        return Response(cache.get_or_build(key, self.build, self.get_cache_timeout))
+
+    def get_cache_timeout(self):
+        # Expire together with the notices window rather than on the next save.
+        now = timezone.now()
+        return cache.timeout_until(NoticeViewSet.next_boundary(now), now)
@@ -0,0 +1,155 @@
+// Chunked, resumable uploads for large admin file fields (see apps/content/uploads.py).
+//
+// When an editor picks a file larger than one chunk, it is sent with the tus
+// protocol while they fill in the rest of the form; on a dropped connection the
+// upload resumes from the offset the server reports, also after a page reload.
+// Once finalized, the file input is cleared and only the upload id is submitted.
+(() => {
+  const TUS_VERSION = '1.0.0';
+  const MAX_RETRIES = 8;
+
+  const csrfToken = () => {
+    const input = document.querySelector('input[name="csrfmiddlewaretoken"]');
+    if (input) return input.value;
+    const match = document.cookie.match(/(?:^|;\s*)csrftoken=([^;]+)/);
+    return match ? decodeURIComponent(match[1]) : '';
+  };
+
+  const request = (method, url, headers = {}, body = null) =>
+    fetch(url, {
+      method,
+      body,
+      credentials: 'same-origin',
+      headers: { 'Tus-Resumable': TUS_VERSION, 'X-CSRFToken': csrfToken(), ...headers },
+    });
+
+  const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+  const encode = (value) => btoa(unescape(encodeURIComponent(value)));
+  const formatSize = (bytes) => `${(bytes / 1024 / 1024).toFixed(1)} MB`;
+  const storageKey = (url, field, file) =>
+    `resumable-upload:${url}:${field}:${file.name}:${file.size}:${file.lastModified}`;
+
+  const serverOffset = async (location) => {
+    const response = await request('HEAD', location);
+    return response.ok ? Number(response.headers.get('Upload-Offset')) : null;
+  };
+
+  // Location and offset of an earlier attempt at the same file, or of a new upload.
+  const start = async (url, field, file) => {
+    const key = storageKey(url, field, file);
+    const previous = window.localStorage.getItem(key);
+    if (previous) {
+      const offset = await serverOffset(previous).catch(() => null);
+      if (offset !== null) return { key, location: previous, offset };
+      window.localStorage.removeItem(key);
+    }
+    const response = await request('POST', url, {
+      'Upload-Length': String(file.size),
+      'Upload-Metadata': `filename ${encode(file.name)},field ${encode(field)}`,
+    });
+    if (response.status !== 201) {
+      throw new Error(response.headers.get('Upload-Error') || `Upload refused (${response.status})`);
+    }
+    const location = response.headers.get('Location');
+    window.localStorage.setItem(key, location);
+    return { key, location, offset: 0 };
+  };
+
+  const send = async (location, file, offset, chunkSize, onProgress, isCurrent) => {
+    let failures = 0;
+    while (offset < file.size) {
+      if (!isCurrent()) return null;
+      const chunk = file.slice(offset, Math.min(offset + chunkSize, file.size));
+      let response = null;
+      try {
+        response = await request(
+          'PATCH',
+          location,
+          { 'Upload-Offset': String(offset), 'Content-Type': 'application/offset+octet-stream' },
+          chunk,
+        );
+      } catch (error) {
+        response = null;
+      }
+      if (response && response.status === 204) {
+        offset = Number(response.headers.get('Upload-Offset'));
+        failures = 0;
+        onProgress(offset);
+        continue;
+      }
+      if (response && response.status !== 409 && response.status < 500) {
+        throw new Error(response.headers.get('Upload-Error') || `Upload failed (${response.status})`);
+      }
+      failures += 1;
+      if (failures > MAX_RETRIES) throw new Error('The connection keeps failing; pick the file again to resume.');
+      await sleep(Math.min(1000 * 2 ** failures, 30000));
+      // Part of the chunk may have arrived; carry on from what the server has.
+      const current = await serverOffset(location).catch(() => null);
+      if (current !== null) offset = current;
+    }
+    return offset;
+  };
+
+  const setup = (hidden) => {
+    const fileInput = document.getElementById(hidden.dataset.fileInput);
+    if (!fileInput || !window.fetch) return;
+    const form = hidden.form;
+    const status = hidden.nextElementSibling;
+    const progress = status.querySelector('progress');
+    const message = status.querySelector('.resumable-upload-message');
+    const chunkSize = Number(hidden.dataset.chunkSize);
+    let generation = 0;
+
+    const show = (text, percent = null) => {
+      status.hidden = false;
+      message.textContent = text;
+      progress.hidden = percent === null;
+      if (percent !== null) progress.value = percent;
+    };
+
+    fileInput.addEventListener('change', async () => {
+      const file = fileInput.files[0];
+      hidden.value = '';
+      generation += 1;
+      const current = generation;
+      const isCurrent = () => current === generation;
+      if (!file || file.size <= chunkSize) {
+        status.hidden = true;
+        delete form.dataset.uploading;
+        return;
+      }
+      form.dataset.uploading = 'true';
+      try {
+        const { key, location, offset } = await start(hidden.dataset.resumableUpload, hidden.dataset.uploadField, file);
+        const onProgress = (sent) =>
+          show(`Uploading ${file.name}: ${formatSize(sent)} of ${formatSize(file.size)}`, (sent / file.size) * 100);
+        onProgress(offset);
+        if ((await send(location, file, offset, chunkSize, onProgress, isCurrent)) === null) return;
+        const response = await request('POST', `${location}finalize/`);
+        if (!response.ok) throw new Error(`Could not finish the upload (${response.status})`);
+        const result = await response.json();
+        if (!isCurrent()) return;
+        window.localStorage.removeItem(key);
+        hidden.value = result.upload;
+        // The bytes are on the server already; do not send them again with the form.
+        fileInput.value = '';
+        show(`${file.name} uploaded (${formatSize(result.size)}). Save to attach it.`);
+      } catch (error) {
+        if (isCurrent()) show(error.message);
+      } finally {
+        if (isCurrent()) delete form.dataset.uploading;
+      }
+    });
+
+    form.addEventListener('submit', (event) => {
+      if (form.dataset.uploading) {
+        event.preventDefault();
+        show('Please wait for the upload to finish before saving.', progress.value);
+      }
+    });
+  };
+
+  document.addEventListener('DOMContentLoaded', () => {
+    document.querySelectorAll('input[data-resumable-upload]').forEach(setup);
+  });
+})();
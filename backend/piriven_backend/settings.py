@@ -35,6 +35,7 @@ INSTALLED_APPS = [
 # ==== Middleware ====
 # NOTE: Place CorsMiddleware as high as possible and BEFORE CommonMiddleware.
 MIDDLEWARE = [
+    "apps.content.instrumentation.ServerTimingMiddleware",  # no-op unless API_INSTRUMENTATION
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -66,12 +67,49 @@ TEMPLATES = [
 WSGI_APPLICATION = "piriven_backend.wsgi.application"
 
 # ==== Database ====
-DATABASES = {
-    "default": {
+# SQLite tuned for several workers: WAL lets readers carry on while one writer
+# commits, IMMEDIATE transactions take the write lock at BEGIN so concurrent
+# writers wait for it (up to busy_timeout ms) instead of failing halfway, and
+# each worker keeps its connection for CONN_MAX_AGE seconds. Writes from the
+# API go through apps/content/db.py, which serializes and retries them.
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    # Durable at checkpoints; a power cut can lose the last commits but never corrupts (with WAL).
+    "synchronous": "NORMAL",
+    "busy_timeout": os.getenv("DJANGO_SQLITE_BUSY_TIMEOUT", "5000"),
+    # Negative values are KiB: 64 MB of page cache per connection.
+    "cache_size": os.getenv("DJANGO_SQLITE_CACHE_SIZE", "-65536"),
+    "mmap_size": os.getenv("DJANGO_SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)),
+    "temp_store": "MEMORY",
+}
+
+
+def sqlite_database(name, **pragmas):
+    return {
         "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+        "NAME": name,
+        # Set to 0 under ASGI, where persistent connections are not supported.
+        "CONN_MAX_AGE": int(os.getenv("DJANGO_DB_CONN_MAX_AGE", "600")),
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {
+            "init_command": "".join(
+                f"PRAGMA {pragma}={value};" for pragma, value in {**SQLITE_PRAGMAS, **pragmas}.items()
+            ),
+            "transaction_mode": "IMMEDIATE",
+        },
     }
+
+
+DATABASES = {
+    "default": sqlite_database(BASE_DIR / "db.sqlite3"),
+    # Contact messages and newsletter sign-ups, written anonymously, get their own
+    # file and write lock (see apps/content/routers.py). Small, so a small cache.
+    "submissions": sqlite_database(
+        os.getenv("DJANGO_SUBMISSIONS_DB", str(BASE_DIR / "submissions.sqlite3")),
+        cache_size="-8192", mmap_size="0",
+    ),
 }
+DATABASE_ROUTERS = ["apps.content.routers.SubmissionsRouter"]
 
 # ==== Password validation ====
 AUTH_PASSWORD_VALIDATORS = [
@@ -98,13 +136,100 @@ MEDIA_ROOT = BASE_DIR / "media"
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# ==== Cache ====
+# File-based by default so every gunicorn worker shares entries and sees the
+# version bumps made by admin saves; swap the backend for Redis/Memcached if available.
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("DJANGO_CACHE_BACKEND", "django.core.cache.backends.filebased.FileBasedCache"),
+        "LOCATION": os.getenv("DJANGO_CACHE_LOCATION", str(BASE_DIR / "cache")),
+    }
+}
+# Lifetime of cached API payloads; entries are invalidated on change regardless.
+CONTENT_CACHE_TIMEOUT = int(os.getenv("DJANGO_CONTENT_CACHE_TIMEOUT", str(60 * 60 * 24)))
+
+# ==== Background jobs ====
+# Run queued jobs inline after commit instead of in `manage.py run_worker` (handy in development).
+CONTENT_JOBS_EAGER = os.getenv("DJANGO_JOBS_EAGER", "0") == "1"
+
+# ==== Images ====
+# Widths of the WebP/AVIF renditions generated for uploaded images (see apps/content/renditions.py).
+CONTENT_IMAGE_WIDTHS = tuple(
+    int(width) for width in os.getenv("DJANGO_CONTENT_IMAGE_WIDTHS", "320,640,960,1280,1920").split(",")
+)
+
+# ==== Documents ====
+# Characters of text extracted per PDF for search (see apps/content/documents.py).
+CONTENT_DOCUMENT_TEXT_LIMIT = int(os.getenv("DJANGO_CONTENT_DOCUMENT_TEXT_LIMIT", "500000"))
+
+# ==== Downloads ====
+# Hand file bytes to the web server: "" (stream from Django), "x-accel-redirect" (nginx) or "x-sendfile".
+CONTENT_DOWNLOAD_ACCEL = os.getenv("DJANGO_DOWNLOAD_ACCEL", "")
+# nginx `internal` location aliasing MEDIA_ROOT, used with x-accel-redirect.
+CONTENT_DOWNLOAD_ACCEL_PREFIX = os.getenv("DJANGO_DOWNLOAD_ACCEL_PREFIX", "/protected-media/")
+# Download counts are buffered per process and written every N downloads or T seconds.
+CONTENT_DOWNLOAD_FLUSH_SIZE = int(os.getenv("DJANGO_DOWNLOAD_FLUSH_SIZE", "50"))
+CONTENT_DOWNLOAD_FLUSH_INTERVAL = int(os.getenv("DJANGO_DOWNLOAD_FLUSH_INTERVAL", "60"))
+
+# ==== Uploads ====
+# Large admin uploads (videos, PDFs) are sent in chunks of this size; keep nginx's
+# client_max_body_size above it (see apps/content/uploads.py).
+CONTENT_UPLOAD_CHUNK_SIZE = int(os.getenv("DJANGO_UPLOAD_CHUNK_SIZE", str(8 * 1024 * 1024)))
+CONTENT_UPLOAD_MAX_SIZE = int(os.getenv("DJANGO_UPLOAD_MAX_SIZE", str(4 * 1024 ** 3)))
+# Unfinished (or finished but never saved) uploads are removed after this many seconds.
+CONTENT_UPLOAD_EXPIRY = int(os.getenv("DJANGO_UPLOAD_EXPIRY", str(24 * 60 * 60)))
+
+# ==== Submission journal ====
+# "1": contact and newsletter posts are appended to a journal file and inserted in
+# batches (see apps/content/journal.py); the API answers 202 instead of 201.
+CONTENT_SUBMISSION_JOURNAL = os.getenv("DJANGO_SUBMISSION_JOURNAL", "0") == "1"
+CONTENT_SUBMISSION_JOURNAL_DIR = Path(os.getenv("DJANGO_SUBMISSION_JOURNAL_DIR", str(BASE_DIR / "journal")))
+CONTENT_SUBMISSION_JOURNAL_FLUSH_SIZE = int(os.getenv("DJANGO_SUBMISSION_JOURNAL_FLUSH_SIZE", "100"))
+CONTENT_SUBMISSION_JOURNAL_FLUSH_INTERVAL = float(os.getenv("DJANGO_SUBMISSION_JOURNAL_FLUSH_INTERVAL", "5"))
+# "always" fsyncs every record before answering; "flush" only when a batch is written.
+CONTENT_SUBMISSION_JOURNAL_FSYNC = os.getenv("DJANGO_SUBMISSION_JOURNAL_FSYNC", "always")
+
+# ==== Instrumentation ====
+# Server-Timing header and a JSON log line (db / serialize / render / total) for every /api/ request.
+API_INSTRUMENTATION = os.getenv("DJANGO_API_INSTRUMENTATION", "0") == "1"
+# Requests running more SQL statements than this are logged as warnings.
+API_QUERY_BUDGET = int(os.getenv("DJANGO_API_QUERY_BUDGET", "20"))
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {
+        "apps.content.instrumentation": {"handlers": ["console"], "level": "INFO", "propagate": False},
+    },
+}
+
 # ==== DRF ====
 REST_FRAMEWORK = {
-    "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
+    "DEFAULT_PAGINATION_CLASS": "apps.content.pagination.ContentPagination",
     "PAGE_SIZE": 10,
     "PAGE_SIZE_QUERY_PARAM": "page_size",
+    # Hard cap on ?page_size=; use /api/<collection>/export/ for whole collections.
+    "MAX_PAGE_SIZE": int(os.getenv("DJANGO_MAX_PAGE_SIZE", "200")),
+    "DEFAULT_THROTTLE_CLASSES": ["apps.content.throttling.TokenBucketThrottle"],
+    # Proxies in front of Django (nginx: 1). With 0, X-Forwarded-For is ignored: clients can forge it.
+    "NUM_PROXIES": int(os.getenv("DJANGO_NUM_PROXIES", "0")),
 }
 
+# ==== Exports ====
+# Rows fetched, prefetched and serialized per step of an NDJSON export (see apps/content/exports.py).
+CONTENT_EXPORT_CHUNK_SIZE = int(os.getenv("DJANGO_EXPORT_CHUNK_SIZE", "500"))
+
+# ==== Throttling ====
+# Token bucket per client, a row in the submissions database (see apps/content/throttling.py):
+# writes, ?search= and large ?page_size= spend tokens, plain reads are free.
+CONTENT_THROTTLE_ENABLED = os.getenv("DJANGO_THROTTLE", "1") == "1"
+CONTENT_THROTTLE_CAPACITY = int(os.getenv("DJANGO_THROTTLE_CAPACITY", "120"))
+CONTENT_THROTTLE_REFILL_RATE = float(os.getenv("DJANGO_THROTTLE_REFILL_RATE", "2"))
+CONTENT_THROTTLE_COSTS = {"write": 20, "search": 5, "indexed_search": 1, "page": 1, "export": 10, "archive": 10}
+# REMOTE_ADDR values never throttled, e.g. the Next.js server rendering pages.
+CONTENT_THROTTLE_EXEMPT = tuple(filter(None, os.getenv("DJANGO_THROTTLE_EXEMPT", "").split(",")))
+
 # ==== CORS / CSRF ====
 _default_cors_origins = [
     "http://localhost:8080",
@@ -132,6 +132,14 @@ const DownloadsPage = () => {
               <div className="flex items-center">
                 <Calendar className="w-4 h-4 mr-1 text-red-800" /> Updated Monthly
               </div>
+              {selectedCategory?.archive_href && (selectedCategory?.publications?.length || 0) > 0 ? (
+                <>
+                  <span>•</span>
+                  <a href={selectedCategory.archive_href} className="flex items-center text-red-800 hover:text-red-900 font-medium">
+                    <Download className="w-4 h-4 mr-1" /> Download all (ZIP)
+                  </a>
+                </>
+              ) : null}
             </div>
           </div>
 
@@ -142,8 +150,11 @@ const DownloadsPage = () => {
                 const department = preferLanguage(pdf.department, pdf.department_si, lang) || pdf.department || "";
                 const description = preferLanguage(pdf.description, pdf.description_si, lang) || pdf.description || "";
                 const publishedDate = pdf.published_at ? dayjs(pdf.published_at).format("MMMM YYYY") : "";
-                const downloadHref = pdf.external_url || (pdf.file ? mediaUrl(pdf.file) : "");
+                const downloadHref = pdf.download_href || pdf.external_url || (pdf.file ? mediaUrl(pdf.file) : "");
                 const canDownload = Boolean(downloadHref);
+                const fileSize = pdf.document?.size ? `${(pdf.document.size / (1024 * 1024)).toFixed(1)} MB` : "";
+                const pageCount = pdf.document?.pages ? `${pdf.document.pages} pages` : "";
+                const fileDetails = [fileSize, pageCount].filter(Boolean).join(" · ");
 
                 return (
                   <div
@@ -174,6 +185,12 @@ const DownloadsPage = () => {
                             <span>{department}</span>
                           </div>
                         ) : null}
+                        {fileDetails ? (
+                          <div className="flex items-center">
+                            <FileText className="w-4 h-4 mr-2 text-red-800 flex-shrink-0" />
+                            <span>{fileDetails}</span>
+                          </div>
+                        ) : null}
                         {description ? (
                           <div className="flex flex-wrap gap-2">
                             <span className="bg-gray-100 text-gray-800 px-3 py-1 rounded-full text-xs font-semibold border border-gray-200">
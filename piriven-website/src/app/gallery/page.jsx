@@ -1,6 +1,6 @@
 'use client';
 
-import React, { useState, useEffect, useMemo } from 'react';
+import React, { useState, useEffect } from 'react';
 import Link from 'next/link';
 
 import { Header } from '@/components/Header';
@@ -9,7 +9,7 @@ import { MainNavigation } from '@/components/MainNavigation';
 import { MobileMenu } from '@/components/MobileMenu';
 import T from '@/components/T';
 
-import { fetchAlbums, mediaUrl } from '@/lib/api';
+import { fetchAlbums, fetchGalleryPage, mediaUrl } from '@/lib/api';
 
 export default function FullGallery() {
   const [mobileMenuOpen, setMobileMenuOpen] = useState(false);
@@ -19,8 +19,11 @@ export default function FullGallery() {
   const [albums, setAlbums] = useState([]);
   const [err, setErr] = useState('');
   const [selectedSlug, setSelectedSlug] = useState('all');
+  const [images, setImages] = useState([]);
+  const [nextPage, setNextPage] = useState(null);
+  const [loadingImages, setLoadingImages] = useState(false);
 
-  // Load albums (expects backend AlbumSerializer to include nested `images`)
+  // Load album cards (the images themselves are paged below)
   useEffect(() => {
     (async () => {
       try {
@@ -61,24 +64,48 @@ export default function FullGallery() {
     return () => observer.disconnect();
   }, []);
 
-  // Build the images list based on selection
-  const images = useMemo(() => {
-    const make = img => ({
-      id: img.id,
-      url: mediaUrl(img.image),
-      caption: img.caption || '',
-    });
+  const makeImage = img => ({
+    id: img.id,
+    url: mediaUrl(img.image),
+    caption: img.caption || '',
+  });
 
-    if (!albums.length) return [];
+  // Load the first page of images for the selected album (or all albums)
+  useEffect(() => {
+    let ignore = false;
+    setImages([]);
+    setNextPage(null);
+    setLoadingImages(true);
+    (async () => {
+      try {
+        const page = await fetchGalleryPage(selectedSlug === 'all' ? null : selectedSlug);
+        if (ignore) return;
+        setImages(page.results.map(makeImage));
+        setNextPage(page.next);
+      } catch (e) {
+        if (!ignore) setErr(e?.message || 'Failed to load images');
+      } finally {
+        if (!ignore) setLoadingImages(false);
+      }
+    })();
+    return () => {
+      ignore = true;
+    };
+  }, [selectedSlug]);
 
-    if (selectedSlug === 'all') {
-      return albums.flatMap(a => Array.isArray(a.images) ? a.images.map(make) : []);
+  const loadMore = async () => {
+    if (!nextPage || loadingImages) return;
+    setLoadingImages(true);
+    try {
+      const page = await fetchGalleryPage(null, nextPage);
+      setImages(prev => [...prev, ...page.results.map(makeImage)]);
+      setNextPage(page.next);
+    } catch (e) {
+      setErr(e?.message || 'Failed to load images');
+    } finally {
+      setLoadingImages(false);
     }
-
-    const album = albums.find(a => a.slug === selectedSlug);
-    if (!album) return [];
-    return Array.isArray(album.images) ? album.images.map(make) : [];
-  }, [albums, selectedSlug]);
+  };
 
   return (
     <div className="min-h-screen bg-gray-50 animate-fade-in overflow-x-hidden">
@@ -150,7 +177,9 @@ export default function FullGallery() {
           }`}
         >
           {!images.length ? (
-            <div className="text-sm text-neutral-600 font-light"><T>No photos to display.</T></div>
+            <div className="text-sm text-neutral-600 font-light">
+              {loadingImages ? <T>Loading…</T> : <T>No photos to display.</T>}
+            </div>
           ) : (
             <div className="grid grid-cols-1 sm:grid-cols-2 lg:grid-cols-3 gap-8">
               {images.map((img, index) => (
@@ -181,6 +210,17 @@ export default function FullGallery() {
               ))}
             </div>
           )}
+          {nextPage ? (
+            <div className="text-center pt-8">
+              <button
+                onClick={loadMore}
+                disabled={loadingImages}
+                className="cursor-pointer bg-transparent border-2 border-black hover:bg-black text-black hover:text-white px-8 py-3 rounded-lg font-light transition-colors duration-300 disabled:opacity-50"
+              >
+                <T>Load more</T>
+              </button>
+            </div>
+          ) : null}
         </section>
 
         <div className="text-center pt-10 animate-fade-in-up animation-delay-600">
@@ -82,7 +82,7 @@ export default function PublicationsPage() {
     const cover = mediaUrl(item?.cover);
     const pdf = mediaUrl(item?.pdf_file);
     const externalUrl = item?.external_url || '';
-    const href = externalUrl || pdf || '';
+    const href = item?.download_href || externalUrl || pdf || '';
     const isExternal = Boolean(externalUrl);
     return {
       id: item?.id ?? title,
@@ -20,7 +20,7 @@ import { VideosSection } from './Videos';
 import { NewsletterSection } from './NewsLetter';
 import { Footer } from './Footer';
 import T from '@/components/T';
-import { fetchSlides, fetchNews, fetchFeaturedNews, fetchNotices, fetchVideos, fetchStats, fetchLinks, fetchAlbums, fetchHeroIntro, fetchSiteTextSnippets, mediaUrl } from '@/lib/api';
+import { fetchHome, mediaUrl } from '@/lib/api';
 import { useLanguage } from '@/context/LanguageContext';
 import { preferLanguage } from '@/lib/i18n';
 
@@ -216,9 +216,9 @@ const ModernMinistryWebsite = () => {
 
   const galleryImages = useMemo(() => {
     if (!Array.isArray(rawAlbums) || !rawAlbums.length) return [];
-    const albumWithImages = rawAlbums.find((album) => Array.isArray(album.images) && album.images.length);
+    const albumWithImages = rawAlbums.find((album) => Array.isArray(album.preview_images) && album.preview_images.length);
     if (!albumWithImages) return [];
-    return albumWithImages.images.map((img) => mediaUrl(img.image));
+    return albumWithImages.preview_images.map((img) => mediaUrl(img.image));
   }, [rawAlbums]);
 
   useEffect(() => {
@@ -227,90 +227,24 @@ const ModernMinistryWebsite = () => {
     const loadData = async () => {
       setIsLoading(true);
       try {
-        const results = await Promise.allSettled([
-          fetchHeroIntro(),
-          fetchSiteTextSnippets(),
-          fetchSlides(),
-          fetchFeaturedNews(),
-          fetchNotices(),
-          fetchVideos(),
-          fetchStats(),
-          fetchLinks(),
-          fetchAlbums(),
-        ]);
+        const home = await fetchHome();
 
         if (cancelled) return;
 
-        const [
-          heroResult,
-          snippetResult,
-          slidesResult,
-          newsResult,
-          noticesResult,
-          videosResult,
-          statsResult,
-          linksResult,
-          albumsResult,
-        ] = results;
-
-        const heroList = heroResult.status === 'fulfilled'
-          ? (Array.isArray(heroResult.value)
-              ? heroResult.value
-              : (heroResult.value?.results ?? []))
-          : [];
-        const heroIntro = heroList.length ? heroList[0] : null;
-
-        const snippetsList = snippetResult.status === 'fulfilled'
-          ? (Array.isArray(snippetResult.value)
-              ? snippetResult.value
-              : (snippetResult.value?.results ?? []))
-          : [];
-        const snippetsMap = snippetsList.reduce((acc, item) => {
+        const listOf = (value) => (Array.isArray(value) ? value : []);
+        const snippetsMap = listOf(home?.text_snippets).reduce((acc, item) => {
           if (item?.key) acc[item.key] = item;
           return acc;
         }, {});
 
-        const slides = slidesResult.status === 'fulfilled'
-          ? (Array.isArray(slidesResult.value)
-              ? slidesResult.value
-              : (slidesResult.value?.results ?? []))
-          : [];
-
-        const news = newsResult.status === 'fulfilled'
-          ? (Array.isArray(newsResult.value)
-              ? newsResult.value
-              : (newsResult.value?.results ?? []))
-          : [];
-
-        const notices = noticesResult.status === 'fulfilled'
-          ? (Array.isArray(noticesResult.value)
-              ? noticesResult.value
-              : (noticesResult.value?.results ?? []))
-          : [];
-
-        const videos = videosResult.status === 'fulfilled'
-          ? (Array.isArray(videosResult.value)
-              ? videosResult.value
-              : (videosResult.value?.results ?? []))
-          : [];
-
-        const stats = statsResult.status === 'fulfilled'
-          ? (Array.isArray(statsResult.value)
-              ? statsResult.value
-              : (statsResult.value?.results ?? []))
-          : [];
-
-        const links = linksResult.status === 'fulfilled'
-          ? (Array.isArray(linksResult.value)
-              ? linksResult.value
-              : (linksResult.value?.results ?? []))
-          : [];
-
-        const albums = albumsResult.status === 'fulfilled'
-          ? (Array.isArray(albumsResult.value)
-              ? albumsResult.value
-              : (albumsResult.value?.results ?? []))
-          : [];
+        const heroIntro = home?.hero_intro ?? null;
+        const slides = listOf(home?.slides);
+        const news = listOf(home?.featured_news);
+        const notices = listOf(home?.notices);
+        const videos = listOf(home?.videos);
+        const stats = listOf(home?.stats);
+        const links = listOf(home?.links);
+        const albums = listOf(home?.albums);
 
         setData({
           heroIntro,
@@ -323,6 +257,8 @@ const ModernMinistryWebsite = () => {
           links,
           albums,
         });
+      } catch (err) {
+        console.warn("Failed to load homepage data", err);
       } finally {
         if (!cancelled) setIsLoading(false);
       }
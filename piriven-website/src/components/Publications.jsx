@@ -65,7 +65,7 @@ export const PublicationsSection = () => {
         <div className="flex flex-col md:flex-row space-y-4 md:space-y-0 md:space-x-6">
           {items.map((book) => {
             const cover = mediaUrl(book?.cover);
-            const href = book?.external_url || mediaUrl(book?.pdf_file) || '#';
+            const href = book?.download_href || book?.external_url || mediaUrl(book?.pdf_file) || '#';
             const isExternal = Boolean(book?.external_url);
             const localizedTitle = preferLanguage(book?.title, book?.title_si, lang) || book?.title || 'Publication';
             const subtitleParts = [
@@ -57,6 +57,11 @@ export function fetchBookCategories(params?: QueryParams) {
   return getList("/book-categories/", params);
 }
 
+/** Everything the homepage renders, in one cached request. */
+export async function fetchHome() {
+  return apiFetch("/home/");
+}
+
 export async function fetchSlides() {
   return apiFetch("/slides/");
 }
@@ -79,8 +84,9 @@ export async function fetchNewsDetail(slug: string) {
   return apiFetch(`/news/${slug}/`);
 }
 
+/** Notices inside their publish/expiry window. */
 export async function fetchNotices() {
-  return apiFetch("/notices/");
+  return apiFetch("/notices/?active=true");
 }
 
 export async function fetchNotice(noticeId: string | number) {
@@ -143,7 +149,7 @@ export async function fetchPublicationCategories() {
 }
 
 export function fetchAlbums(params?: QueryParams) {
-  // pulls albums with nested images when serializer includes them
+  // album cards: image_count, cover_image and a few preview_images (no full image list)
   return getList("/albums/", { is_active: "true", ordering: "position", page_size: 50, ...params });
 }
 
@@ -157,6 +163,22 @@ export function fetchAlbumImages(albumId: number, params?: QueryParams) {
   return getList('/gallery/', { album: albumId, page_size: 200, ...params });
 }
 
+/**
+ * One page of gallery images: a single album's when `slug` is given, otherwise those of every active album.
+ * Pass the previous response's `next` URL as `pageUrl` to load the following page.
+ */
+export async function fetchGalleryPage(slug?: string | null, pageUrl?: string | null, pageSize = 24) {
+  let url = pageUrl;
+  if (!url) {
+    const path = slug ? `/albums/${encodeURIComponent(slug)}/images/` : "/gallery/";
+    url = `${API_BASE}${path}?page_size=${pageSize}`;
+  }
+  const res = await fetch(url, { cache: "no-store" });
+  if (!res.ok) throw new Error(`GET ${url} failed (${res.status})`);
+  const json = await res.json();
+  return { results: listify<Record<string, unknown>>(json), next: (json?.next as string | null) ?? null };
+}
+
 export async function fetchHeroIntro() {
   return apiFetch('/hero-intro/');
 }